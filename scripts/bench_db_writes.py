@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+数据库写入基准测试
+
+分别以逐条写入与批量写入（executemany 单事务）方式写入消息、用户与群成员，
+统计每秒写入行数，并输出 JSON 结果便于跨版本对比。
+
+用法:
+    python scripts/bench_db_writes.py --rows 20000
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.config import config
+from src.core.models import Message, User
+from src.database.db_manager import DatabaseManager
+
+
+def gen_messages(prefix, count):
+    """按需生成消息（生成器，不预先构建列表）"""
+    for i in range(count):
+        yield Message(
+            msg_id=f"{prefix}_{i}",
+            from_user_id=f"user_{i % 50}",
+            from_username=f"user_{i % 50}",
+            to_user_id="me",
+            content=f"基准测试消息 {i}",
+            timestamp=1700000000 + i,
+            status='received'
+        )
+
+
+def gen_users(prefix, count):
+    for i in range(count):
+        yield User(user_id=f"{prefix}_{i}", username=f"{prefix}_{i}", ip_address="127.0.0.1")
+
+
+def gen_member_ids(prefix, count):
+    for i in range(count):
+        yield f"{prefix}_{i}"
+
+
+def measure(label, rows, fn):
+    """执行写入并返回每秒行数"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"  {label:<24} {rows:>8} 行  {elapsed:8.3f} 秒  {rate:12.0f} 行/秒")
+    return {'rows': rows, 'seconds': round(elapsed, 4), 'rows_per_sec': round(rate, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库逐条/批量写入基准测试")
+    parser.add_argument('--rows', type=int, default=20000, help='批量写入的行数')
+    parser.add_argument('--single-rows', type=int, default=2000, help='逐条写入的行数（逐条较慢，默认取较小值）')
+    parser.add_argument('--output', default='db_write_bench.json', help='JSON 结果输出路径')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="minichat_dbbench_")
+    db = DatabaseManager(Path(work_dir) / config.DB_NAME)
+    db.set_local_user_id("me")
+    results = {}
+
+    try:
+        print("📝 消息")
+        results['messages_single'] = measure('save_message', args.single_rows, lambda: [
+            db.save_message(m) for m in gen_messages("single", args.single_rows)
+        ])
+        results['messages_batch'] = measure('save_messages', args.rows, lambda: db.save_messages(
+            gen_messages("batch", args.rows)
+        ))
+
+        print("👤 用户")
+        results['users_single'] = measure('upsert_users([user])', args.single_rows, lambda: [
+            db.upsert_users([u]) for u in gen_users("single", args.single_rows)
+        ])
+        results['users_batch'] = measure('upsert_users', args.rows, lambda: db.upsert_users(
+            gen_users("batch", args.rows)
+        ))
+
+        print("👥 群成员")
+        results['members_single'] = measure('add_group_member', args.single_rows, lambda: [
+            db.add_group_member("group_single", m) for m in gen_member_ids("single", args.single_rows)
+        ])
+        results['members_batch'] = measure('add_group_members', args.rows, lambda: db.add_group_members(
+            "group_batch", gen_member_ids("batch", args.rows)
+        ))
+    finally:
+        lock_stats = db.lock_stats()
+        db.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'benchmark': 'db_writes',
+        'app_version': config.APP_VERSION,
+        'timestamp': int(time.time()),
+        'params': {'rows': args.rows, 'single_rows': args.single_rows},
+        'results': results,
+        'speedup': {
+            kind: round(results[f'{kind}_batch']['rows_per_sec'] / results[f'{kind}_single']['rows_per_sec'], 1)
+            for kind in ('messages', 'users', 'members')
+        },
+        'lock_stats': lock_stats,
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ 批量/逐条加速比: {report['speedup']}")
+    print(f"结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+群聊收发基准测试
+
+在本机回环组播上启动 N 个无界面成员节点（各自独立的数据目录），
+按设定速率与消息大小发送群消息，统计送达率、端到端延迟 p50/p99、
+各节点 CPU 占用与重复消息数，并输出 JSON 结果便于跨版本对比。
+
+用法:
+    python scripts/bench_group_chat.py --nodes 4 --rate 20 --duration 10 --payload 256
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+GROUP_ID = "group_bench"
+
+
+def run_bench_node(index, args, data_dir, barrier, result_queue):
+    """
+    运行一个基准测试节点进程
+    """
+    # 强制设置环境变量以隔离配置（spawn 模式下子进程重新导入 config）
+    os.environ["MINICHAT_DATA_DIR"] = data_dir
+    os.environ["MINICHAT_MULTICAST_IF"] = args.interface
+
+    from src.config import config
+    from src.core.group_manager import GroupManager
+    from src.core.models import Group, User
+    from src.database.db_manager import DatabaseManager
+    from src.utils.dedup import SeenIdCache
+
+    user_id = f"bench_node_{index}"
+    received = []  # (msg_id, from_user_id, send_time, recv_time)
+
+    def on_message(message):
+        send_time = float(message.content.split('|', 1)[0])
+        received.append((message.msg_id, message.from_user_id, send_time, time.time()))
+
+    db = DatabaseManager(Path(data_dir) / config.DB_NAME)
+    seen_cache = SeenIdCache()
+    manager = GroupManager(db, on_group_message_received=on_message, seen_cache=seen_cache)
+    manager.set_current_user(User(user_id=user_id, username=user_id, ip_address=args.interface))
+    manager.start()
+    manager.join_group(Group(
+        group_id=GROUP_ID,
+        group_name="基准测试群",
+        owner_id="bench_node_0",
+        multicast_ip=args.multicast_ip,
+        multicast_port=args.port,
+        member_ids=[f"bench_node_{i}" for i in range(args.nodes)]
+    ))
+
+    barrier.wait()
+    cpu_start = time.process_time()
+    wall_start = time.time()
+
+    sent = 0
+    interval = 1.0 / args.rate
+    padding = "x" * args.payload
+    next_send = time.perf_counter()
+    while time.time() - wall_start < args.duration:
+        content = f"{time.time():.6f}|{padding}"
+        if manager.send_group_message(GROUP_ID, user_id, user_id, content):
+            sent += 1
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    # 等待在途消息送达
+    time.sleep(args.drain)
+    cpu_seconds = time.process_time() - cpu_start
+    wall_seconds = time.time() - wall_start
+
+    manager.stop()
+    db.close()
+
+    stats = seen_cache.stats()
+    result_queue.put({
+        'node': user_id,
+        'sent': sent,
+        'received': received,
+        'cpu_seconds': round(cpu_seconds, 3),
+        'cpu_percent': round(cpu_seconds / wall_seconds * 100, 2),
+        # 自己发出的每条消息都会组播回环一次，不计入重复
+        'duplicates_dropped': max(0, stats['dropped'] - sent),
+    })
+
+
+def percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(args, node_results):
+    """汇总各节点结果"""
+    total_sent = sum(r['sent'] for r in node_results)
+    expected = total_sent * (args.nodes - 1)
+
+    deliveries = set()
+    duplicates_delivered = 0
+    latencies_ms = []
+    for r in node_results:
+        for msg_id, from_user_id, send_time, recv_time in r['received']:
+            key = (r['node'], msg_id)
+            if key in deliveries:
+                duplicates_delivered += 1
+                continue
+            deliveries.add(key)
+            latencies_ms.append((recv_time - send_time) * 1000)
+
+    return {
+        'messages_sent': total_sent,
+        'deliveries_expected': expected,
+        'deliveries': len(deliveries),
+        'delivery_ratio': round(len(deliveries) / expected, 4) if expected else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies_ms, 50), 3) if latencies_ms else None,
+            'p99': round(percentile(latencies_ms, 99), 3) if latencies_ms else None,
+            'max': round(max(latencies_ms), 3) if latencies_ms else None,
+        },
+        'duplicates_dropped': sum(r['duplicates_dropped'] for r in node_results),
+        'duplicates_delivered': duplicates_delivered,
+        'nodes': [
+            {
+                'node': r['node'],
+                'sent': r['sent'],
+                'received': len(r['received']),
+                'cpu_seconds': r['cpu_seconds'],
+                'cpu_percent': r['cpu_percent'],
+                'duplicates_dropped': r['duplicates_dropped'],
+            }
+            for r in sorted(node_results, key=lambda r: r['node'])
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="群聊收发吞吐与延迟基准测试")
+    parser.add_argument('--nodes', type=int, default=4, help='成员节点数')
+    parser.add_argument('--rate', type=float, default=10, help='每个节点每秒发送的消息数')
+    parser.add_argument('--duration', type=float, default=10, help='发送持续时间（秒）')
+    parser.add_argument('--payload', type=int, default=128, help='消息正文填充字节数')
+    parser.add_argument('--drain', type=float, default=2, help='发送结束后等待在途消息的时间（秒）')
+    parser.add_argument('--multicast-ip', default='239.0.0.250', help='基准测试使用的组播地址')
+    parser.add_argument('--port', type=int, default=10101, help='基准测试使用的组播端口')
+    parser.add_argument('--interface', default='127.0.0.1', help='组播网卡 IP（默认回环）')
+    parser.add_argument('--output', default='group_bench.json', help='JSON 结果输出路径')
+    args = parser.parse_args()
+
+    from src.config import config
+
+    print(f"🚀 启动群聊基准测试: {args.nodes} 节点, {args.rate} 条/秒/节点, "
+          f"{args.duration} 秒, 正文 {args.payload} 字节")
+
+    work_dir = tempfile.mkdtemp(prefix="minichat_bench_")
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(args.nodes)
+    result_queue = ctx.Queue()
+
+    processes = [
+        ctx.Process(
+            target=run_bench_node,
+            args=(i, args, os.path.join(work_dir, f"node_{i}"), barrier, result_queue)
+        )
+        for i in range(args.nodes)
+    ]
+    for p in processes:
+        p.start()
+
+    try:
+        timeout = args.duration + args.drain + 30
+        node_results = [result_queue.get(timeout=timeout) for _ in processes]
+    finally:
+        for p in processes:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'benchmark': 'group_chat',
+        'app_version': config.APP_VERSION,
+        'timestamp': int(time.time()),
+        'params': {
+            'nodes': args.nodes,
+            'rate_per_node': args.rate,
+            'duration': args.duration,
+            'payload_bytes': args.payload,
+            'interface': args.interface,
+        },
+        'results': summarize(args, node_results),
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    results = report['results']
+    print(f"✅ 送达率: {results['delivery_ratio']}  "
+          f"延迟 p50/p99: {results['latency_ms']['p50']}/{results['latency_ms']['p99']} ms  "
+          f"重复: 丢弃 {results['duplicates_dropped']} / 漏过 {results['duplicates_delivered']}")
+    print(f"结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
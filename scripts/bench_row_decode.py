@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+查询结果解码基准测试
+
+比较三种将消息行转换为 Message 对象的方式：
+  legacy   - dict(row) + 每行重新计算 dataclasses.fields() 的 from_dict（旧实现）
+  from_dict - dict(row) + 缓存字段集合的 from_dict
+  decoder  - 元组行 + 预编译构造函数（DatabaseManager.query_models）
+
+用法:
+    python scripts/bench_row_decode.py --rows 10000 --page 50
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.config import config
+from src.core.models import Message, private_conversation_id
+from src.database.db_manager import SQL_CONVERSATION_LATEST, DatabaseManager
+
+
+def legacy_from_dict(data):
+    """旧版 Message.from_dict：每行导入 dataclasses 并重新计算字段集合"""
+    import dataclasses as dc
+    valid_fields = {f.name for f in dc.fields(Message)}
+    filtered_data = {k: v for k, v in data.items() if k in valid_fields}
+    if 'is_group' in filtered_data:
+        filtered_data['is_group'] = bool(filtered_data['is_group'])
+    if 'is_read' in filtered_data:
+        filtered_data['is_read'] = bool(filtered_data['is_read'])
+    return Message(**filtered_data)
+
+
+def measure(label, repeat, fn):
+    """重复执行并返回单次平均耗时（毫秒）"""
+    fn()  # 预热（编译解码器、建立只读连接）
+    start = time.perf_counter()
+    for _ in range(repeat):
+        count = len(fn())
+    avg_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"  {label:<10} {count:>6} 行  {avg_ms:9.3f} ms/次  {count / avg_ms * 1000:12.0f} 行/秒")
+    return {'rows': count, 'avg_ms': round(avg_ms, 4), 'rows_per_sec': round(count / avg_ms * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消息行解码基准测试")
+    parser.add_argument('--rows', type=int, default=10000, help='会话中的消息总数')
+    parser.add_argument('--page', type=int, default=50, help='一页消息条数')
+    parser.add_argument('--repeat', type=int, default=200, help='每种方式重复次数')
+    parser.add_argument('--output', default='row_decode_bench.json', help='JSON 结果输出路径')
+    args = parser.parse_args()
+
+    db = DatabaseManager(mode='memory')
+    db.save_messages(
+        Message(msg_id=f"m{i:07d}", from_user_id='alice', from_username='alice', to_user_id='bob',
+                to_username='bob', content=f"消息内容 {i}", timestamp=1700000000 + i, status='sent')
+        for i in range(args.rows)
+    )
+    conversation = private_conversation_id('alice', 'bob')
+
+    report = {
+        'benchmark': 'row_decode',
+        'app_version': config.APP_VERSION,
+        'timestamp': int(time.time()),
+        'params': {'rows': args.rows, 'page': args.page, 'repeat': args.repeat},
+        'results': {},
+    }
+
+    try:
+        for label, limit, repeat in (('page', args.page, args.repeat), ('full', args.rows, max(1, args.repeat // 20))):
+            params = (conversation, limit)
+            print(f"📄 {label}: LIMIT {limit}")
+            report['results'][label] = {
+                'legacy': measure('legacy', repeat, lambda: [
+                    legacy_from_dict(row) for row in db.query(SQL_CONVERSATION_LATEST, params)
+                ]),
+                'from_dict': measure('from_dict', repeat, lambda: [
+                    Message.from_dict(row) for row in db.query(SQL_CONVERSATION_LATEST, params)
+                ]),
+                'decoder': measure('decoder', repeat, lambda: db.query_models(
+                    Message, SQL_CONVERSATION_LATEST, params
+                )),
+            }
+            result = report['results'][label]
+            result['speedup_vs_legacy'] = round(result['legacy']['avg_ms'] / result['decoder']['avg_ms'], 2)
+            print(f"  ✅ 加速比: {result['speedup_vs_legacy']}x")
+    finally:
+        db.close()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
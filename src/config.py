@@ -23,6 +23,8 @@ class Config:
     HEARTBEAT_TIMEOUT = 15  # 秒
     USER_REMOVE_TIMEOUT = 30  # 秒
     BROADCAST_ADDRESS = "255.255.255.255"
+    TCP_REQUEST_TIMEOUT = 5  # 秒，请求/响应类 TCP 连接的读写超时
+    MULTICAST_INTERFACE = os.getenv("MINICHAT_MULTICAST_IF", "")  # 组播收发网卡 IP，留空由系统选择
     
     # 用户配置
     DEFAULT_USERNAME = ""  # 留空使用主机名
@@ -30,7 +32,27 @@ class Config:
     
     # 消息配置
     MAX_MESSAGE_LENGTH = 5000
-    MESSAGE_HISTORY_LIMIT = 100
+    MESSAGE_HISTORY_LIMIT = 10000  # 每个会话保留的最多消息数（不小于历史同步上限与消息窗口行数；0 表示不限）
+    MESSAGE_MAX_AGE = 0  # 秒，超过该时长的消息被清理（0 表示不限）
+    RETENTION_INTERVAL = 60  # 秒，保留策略执行间隔
+    RETENTION_BATCH_SIZE = 500  # 每次删除的最多行数（单批持有写锁的时间上限）
+    
+    # 入站消息去重配置
+    SEEN_CACHE_SIZE = 10000  # 精确记录的最近消息 ID 数量
+    SEEN_CACHE_TTL = 600  # 秒，去重时间窗口
+    SEEN_CACHE_BLOOM = False  # 是否启用 Bloom 过滤器延长记忆（存在极低误判率）
+    
+    # 群聊历史同步配置
+    HISTORY_SYNC_PAGE_SIZE = 200  # 每页消息条数
+    HISTORY_SYNC_MAX_PAGES = 50  # 单次同步最多拉取的页数
+    HISTORY_SYNC_RETRIES = 3  # 断线后的续传重试次数
+    
+    # 群成员反熵配置
+    GROUP_DIGEST_INTERVAL = 15  # 秒，成员摘要通告间隔
+    
+    # 群消息单播扇出配置（组播不可达时启用）
+    GROUP_MULTICAST_SILENCE_TIMEOUT = 45  # 秒，在线成员超过该时间无组播数据到达即切换为单播
+    GROUP_FANOUT_CONCURRENCY = 8  # 单播扇出的最大并发写入数
     
     # 文件传输配置
     CHUNK_SIZE = 4096  # 4KB
@@ -43,6 +65,13 @@ class Config:
     
     # 数据库配置
     DB_NAME = "chat.db"
+    DB_BUSY_TIMEOUT = 5  # 秒，读写连接等待 SQLite 锁的上限
+    DB_WRITE_BATCH_SIZE = 256  # 写线程单个事务最多合并的写操作数
+    DB_WRITE_MAX_LATENCY = 0.02  # 秒，异步写操作最长攒批等待时间
+    DB_READER_POOL_SIZE = 4  # 只读连接池大小（各线程借用后归还，连接数不随线程数增长）
+    DB_MODE = os.getenv("MINICHAT_DB_MODE", "file")  # file: 磁盘文件 / memory: 纯内存（退出即消失）
+    DB_SNAPSHOT_PATH = os.getenv("MINICHAT_DB_SNAPSHOT", "")  # 非空时退出前将数据库快照到该路径
+    DB_MEMORY_DIR = os.getenv("MINICHAT_DB_MEMORY_DIR", "/dev/shm")  # memory 模式数据库文件所在的 tmpfs 目录（不存在时使用系统临时目录）
     
     @property
     def DB_PATH(self):
@@ -63,6 +92,16 @@ class Config:
     WINDOW_HEIGHT = 600
     WINDOW_MIN_WIDTH = 700
     WINDOW_MIN_HEIGHT = 500
+    MESSAGE_WINDOW_SIZE = 50  # 消息列表每次（首屏/翻页）加载的条数
+    MESSAGE_WINDOW_MAX_ROWS = 500  # 消息列表内存窗口最多保留的条数，超出时淘汰远离视口的一端
+    UI_NOTIFY_INTERVAL_MS = 33  # 毫秒，界面变更通知的合并刷新间隔（约每两帧一次）
+    RECENT_CONVERSATIONS_LIMIT = 50  # 最近会话列表启动时加载的会话数
+    HISTORY_CACHE_MAX_BYTES = 4 * 1024 * 1024  # 预取的会话历史窗口缓存的内存上限（估算字节数）
+    HISTORY_PREFETCH_TOP_K = 8  # 后台预取历史的会话数（未读优先，其次按最近活动）
+    UI_WATCHDOG_INTERVAL_MS = 20  # 毫秒，事件循环心跳定时器间隔
+    UI_STALL_THRESHOLD_MS = 200  # 毫秒，界面线程超过该时长未处理心跳即记为卡顿并抓取调用栈
+    UI_STALL_HISTORY = 20  # 保留的最近卡顿记录数
+    UI_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)  # 事件循环延迟直方图的桶上界
     
     # 主题配置
     THEME = "light"  # light/dark
@@ -7,9 +7,17 @@ import threading
 import json
 import uuid
 import time
+from concurrent.futures import Future
 from typing import Callable, Optional, Dict, List
+from src.config import config
 from src.core.models import Group, Message
+from src.core.membership import (
+    bucket_digests, membership_digest, diff_buckets, members_in_buckets
+)
+from src.network.fanout import FanoutSender
+from src.utils.dedup import peek_field
 from src.utils.logger import get_logger
+from src.utils.network_utils import send_json, receive_json
 
 
 logger = get_logger(__name__)
@@ -24,7 +32,14 @@ class GroupManager:
     MULTICAST_END = 255
     MULTICAST_PORT = 10001
     
-    def __init__(self, db_manager, on_group_message_received: Optional[Callable] = None, on_broadcast_needed: Optional[Callable] = None):
+    # 成员反熵同步的 TCP 请求/响应类型
+    MEMBERSHIP_SYNC_TYPE = 'GROUP_MEMBERSHIP_SYNC'
+    MEMBERSHIP_DIFF_TYPE = 'GROUP_MEMBERSHIP_DIFF'
+    MEMBERSHIP_PUSH_TYPE = 'GROUP_MEMBERSHIP_PUSH'
+    
+    def __init__(self, db_manager, on_group_message_received: Optional[Callable] = None,
+                 on_broadcast_needed: Optional[Callable] = None, on_group_joined: Optional[Callable] = None,
+                 on_group_updated: Optional[Callable] = None, user_manager=None, seen_cache=None):
         """
         初始化群组管理器
         
@@ -32,10 +47,19 @@ class GroupManager:
             db_manager: 数据库管理器实例
             on_group_message_received: 接收到群组消息时的回调
             on_broadcast_needed: 需要发送广播时的回调（用于发送群组邀请）
+            on_group_joined: 通过邀请加入群组后的回调（用于补拉群聊历史）
+            on_group_updated: 群成员经反熵同步发生变化后的回调
+            user_manager: 用户管理器实例（用于单播扇出时查询成员地址与在线状态）
+            seen_cache: 共享的已见消息 ID 缓存（SeenIdCache），用于丢弃重复消息
         """
         self.db_manager = db_manager
         self.on_group_message_received = on_group_message_received
         self.on_broadcast_needed = on_broadcast_needed
+        self.on_group_joined = on_group_joined
+        self.on_group_updated = on_group_updated
+        self.user_manager = user_manager
+        self.seen_cache = seen_cache
+        self.current_user = None  # 当前用户信息（用于成员摘要通告）
         
         # 群组 ID -> Group 对象
         self.groups: Dict[str, Group] = {}
@@ -52,6 +76,27 @@ class GroupManager:
         # 已分配的组播地址（用于避免冲突）
         self.allocated_ips = set()
         
+        # 成员摘要通告线程与反熵状态
+        self.digest_thread = None
+        self._stop_event = threading.Event()
+        self._members_lock = threading.Lock()
+        self._reconciling = set()
+        self._last_reconcile: Dict[str, float] = {}
+        
+        # 投递模式：群组 ID -> 'multicast' / 'unicast'
+        self.delivery_modes: Dict[str, str] = {}
+        # 组播可达性探测：群组 ID -> {成员 ID: 最近一次从组播收到其数据的时间}
+        self._multicast_heard: Dict[str, Dict[str, float]] = {}
+        self._listen_started: Dict[str, float] = {}
+        
+        # 单播扇出发送器与最近一次扇出结果（群组 ID -> FanoutReport）
+        self.fanout = FanoutSender()
+        self.fanout_reports = {}
+    
+    def set_current_user(self, user):
+        """设置当前用户信息"""
+        self.current_user = user
+        
     def start(self):
         """启动群组管理器"""
         if self.running:
@@ -67,6 +112,11 @@ class GroupManager:
         for group_id in self.groups.keys():
             self._start_group_listener(group_id)
         
+        # 启动成员摘要通告线程
+        self._stop_event.clear()
+        self.digest_thread = threading.Thread(target=self._digest_loop, daemon=True)
+        self.digest_thread.start()
+        
         logger.info(f"群组管理器已启动，已加载 {len(self.groups)} 个群组")
     
     def stop(self):
@@ -75,17 +125,33 @@ class GroupManager:
             return
         
         self.running = False
+        self._stop_event.set()
         
         # 停止所有监听线程并关闭 socket
         for group_id in list(self.multicast_sockets.keys()):
             self._stop_group_listener(group_id)
         
+        if self.digest_thread:
+            self.digest_thread.join(timeout=2)
+        
+        self.fanout.close()
+        
         logger.info("群组管理器已停止")
     
     def _load_groups_from_db(self):
         """从数据库加载群组"""
         groups = self.db_manager.get_all_groups()
         for group in groups:
+            # 合并 groups.member_ids 与 group_members 表两处的成员记录
+            table_ids = self.db_manager.get_group_member_ids(group.group_id)
+            missing_in_table = [m for m in group.member_ids if m not in table_ids]
+            missing_in_group = [m for m in table_ids if m not in group.member_ids]
+            if missing_in_table:
+                self.db_manager.add_group_members(group.group_id, missing_in_table)
+            if missing_in_group:
+                group.member_ids.extend(missing_in_group)
+                self.db_manager.save_group(group)
+            
             self.groups[group.group_id] = group
             self.allocated_ips.add(group.multicast_ip)
     
@@ -139,9 +205,9 @@ class GroupManager:
                 return None
             
             # 保存成员关系
-            self.db_manager.add_group_member(group_id, owner_id, role='owner')
-            for member_id in member_ids:
-                self.db_manager.add_group_member(group_id, member_id, role='member')
+            self.db_manager.add_group_members(
+                group_id, [(owner_id, 'owner')] + [(member_id, 'member') for member_id in member_ids]
+            )
             
             # 加入内存管理
             self.groups[group_id] = group
@@ -170,8 +236,12 @@ class GroupManager:
             logger.warning(f"已经加入群组: {group.group_id}")
             return
         
-        # 保存到数据库
+        # 保存到数据库（群组与成员关系两处保持一致）
         self.db_manager.save_group(group)
+        self.db_manager.add_group_members(group.group_id, (
+            (member_id, 'owner' if member_id == group.owner_id else 'member')
+            for member_id in group.member_ids
+        ))
         
         # 加入内存管理
         self.groups[group.group_id] = group
@@ -181,6 +251,10 @@ class GroupManager:
         self._start_group_listener(group.group_id)
         
         logger.info(f"已加入群组: {group.group_name} ({group.group_id})")
+        
+        # 补拉加入前的群聊历史
+        if self.on_group_joined:
+            self.on_group_joined(group)
     
     def leave_group(self, group_id: str):
         """
@@ -229,14 +303,14 @@ class GroupManager:
             sock.bind(('', group.multicast_port))
             
             # 加入组播组
-            mreq = struct.pack("4sl", socket.inet_aton(group.multicast_ip), socket.INADDR_ANY)
-            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, self._membership_request(group))
             
             # 设置超时，以便能响应停止信号
             sock.settimeout(1.0)
             
             # 保存 socket
             self.multicast_sockets[group_id] = sock
+            self._listen_started[group_id] = time.time()
             
             # 启动监听线程
             thread = threading.Thread(target=self._listen_loop, args=(group_id,), daemon=True)
@@ -248,6 +322,13 @@ class GroupManager:
         except Exception as e:
             logger.error(f"启动群组监听失败: {e}")
     
+    @staticmethod
+    def _membership_request(group: Group) -> bytes:
+        """构造加入/离开组播组的 mreq（可通过 MULTICAST_INTERFACE 指定网卡）"""
+        if config.MULTICAST_INTERFACE:
+            return socket.inet_aton(group.multicast_ip) + socket.inet_aton(config.MULTICAST_INTERFACE)
+        return struct.pack("4sl", socket.inet_aton(group.multicast_ip), socket.INADDR_ANY)
+    
     def _stop_group_listener(self, group_id: str):
         """停止群组的组播监听"""
         # 关闭 socket
@@ -258,8 +339,7 @@ class GroupManager:
                 
                 if group:
                     # 离开组播组
-                    mreq = struct.pack("4sl", socket.inet_aton(group.multicast_ip), socket.INADDR_ANY)
-                    sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, mreq)
+                    sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, self._membership_request(group))
                 
                 sock.close()
             except:
@@ -302,43 +382,83 @@ class GroupManager:
             addr: 发送方地址
         """
         try:
-            payload = json.loads(data.decode('utf-8'))
-            msg_type = payload.get('type')
-            
-            if msg_type == 'GROUP_MESSAGE':
-                # 构建 Message 对象
-                message = Message(
-                    msg_id=payload.get('msg_id'),
-                    type=payload.get('msg_type', 'TEXT'),
-                    from_user_id=payload.get('from_user_id'),
-                    from_username=payload.get('from_username'),
-                    to_user_id='',  # 群组消息不需要
-                    content=payload.get('content'),
-                    timestamp=payload.get('timestamp', int(time.time())),
-                    is_group=True,
-                    group_id=group_id
-                )
-                
-                # 保存到数据库
-                self.db_manager.save_message(message)
-                
-                # 触发回调
-                if self.on_group_message_received:
-                    self.on_group_message_received(message)
-                
-                logger.info(f"收到群组消息: {group_id} from {message.from_username}")
-            
-            elif msg_type == 'GROUP_INVITE':
-                # 处理群组邀请（接收端）
-                logger.info(f"收到群组邀请: {payload}")
-                # TODO: 通知 UI 显示邀请通知
+            # 同一端口上的多个组播 socket 都会收到本机已加入的所有组的数据，
+            # 先按 group_id 过滤掉其他群组的包，再在解析前丢弃重复消息
+            payload_group_id = peek_field(data, 'group_id')
+            if payload_group_id and payload_group_id != group_id:
+                return
+            msg_id = peek_field(data, 'msg_id')
+            if self.seen_cache and msg_id and self.seen_cache.is_duplicate(msg_id):
+                return
             
+            payload = json.loads(data.decode('utf-8'))
+            self._note_multicast_heard(group_id, payload)
+            self._handle_group_payload(group_id, payload)
         except Exception as e:
             logger.error(f"处理组播数据失败: {e}")
     
-    def send_group_message(self, group_id: str, from_user_id: str, from_username: str, content: str) -> bool:
+    def handle_unicast_message(self, payload: dict):
+        """
+        处理经 TCP 单播扇出收到的群组数据（由 MessageService 路由）
+        
+        Args:
+            payload: 群组消息负载
+        """
+        group_id = payload.get('group_id')
+        if group_id not in self.groups:
+            logger.warning(f"收到未加入群组的单播消息: {group_id}")
+            return
+        try:
+            self._handle_group_payload(group_id, payload)
+        except Exception as e:
+            logger.error(f"处理单播群组数据失败: {e}")
+    
+    def _handle_group_payload(self, group_id: str, payload: dict):
+        """按类型处理群组负载（组播与单播共用）"""
+        msg_type = payload.get('type')
+        
+        if msg_type == 'GROUP_MESSAGE':
+            # 构建 Message 对象
+            message = Message(
+                msg_id=payload.get('msg_id'),
+                type=payload.get('msg_type', 'TEXT'),
+                from_user_id=payload.get('from_user_id'),
+                from_username=payload.get('from_username'),
+                to_user_id='',  # 群组消息不需要
+                content=payload.get('content'),
+                timestamp=payload.get('timestamp', int(time.time())),
+                is_group=True,
+                group_id=group_id
+            )
+            
+            # 保存到数据库（不等待提交，由写线程攒批）；提交后再触发回调，
+            # 保证回调中重新加载的会话窗口包含该消息；保存失败时撤销去重记录，重传的同一消息仍可被接收
+            callback = self.on_group_message_received
+            
+            def on_saved(future):
+                if not self.db_manager.write_succeeded(future):
+                    logger.error(f"群组消息保存失败，未通知界面: {message.msg_id}")
+                    if self.seen_cache and message.msg_id:
+                        self.seen_cache.forget(message.msg_id)
+                elif callback:
+                    callback(message)
+            
+            self.db_manager.save_message(message, wait=False).add_done_callback(on_saved)
+            
+            logger.info(f"收到群组消息: {group_id} from {message.from_username}")
+        
+        elif msg_type == 'GROUP_INVITE':
+            # 处理群组邀请（接收端）
+            logger.info(f"收到群组邀请: {payload}")
+            # TODO: 通知 UI 显示邀请通知
+        
+        elif msg_type == 'GROUP_DIGEST':
+            self._handle_group_digest(group_id, payload)
+    
+    def send_group_message(self, group_id: str, from_user_id: str, from_username: str,
+                           content: str) -> Optional[Message]:
         """
-        发送群组消息（组播）
+        发送群组消息（默认组播，组播不可达时改为单播扇出）
         
         Args:
             group_id: 群组 ID
@@ -347,11 +467,11 @@ class GroupManager:
             content: 消息内容
         
         Returns:
-            是否发送成功
+            发送成功返回已保存的消息对象；群组不存在、保存失败或发送出错返回 None
         """
         if group_id not in self.groups:
             logger.error(f"群组不存在: {group_id}")
-            return False
+            return None
         
         group = self.groups[group_id]
         
@@ -369,15 +489,7 @@ class GroupManager:
                 'timestamp': int(time.time())
             }
             
-            # 创建临时 socket 发送
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 32)
-            
-            data = json.dumps(payload).encode('utf-8')
-            sock.sendto(data, (group.multicast_ip, group.multicast_port))
-            sock.close()
-            
-            # 保存自己的消息到数据库
+            # 先保存自己的消息到数据库，保存失败则不发送，调用方不会把未落盘的消息当作已发送
             message = Message(
                 msg_id=msg_id,
                 type='TEXT',
@@ -390,14 +502,133 @@ class GroupManager:
                 group_id=group_id,
                 status='sent'
             )
-            self.db_manager.save_message(message)
+            if not self.db_manager.save_message(message):
+                logger.error(f"群组消息保存失败，未发送: {msg_id}")
+                return None
+            
+            # 自己的组播回环无需再处理
+            if self.seen_cache:
+                self.seen_cache.mark_seen(msg_id)
+            
+            if self.get_delivery_mode(group_id) == 'unicast':
+                self._send_unicast(group, payload)
+            else:
+                self._send_multicast(group, payload)
             
             logger.info(f"群组消息已发送: {group.group_name} -> {content[:20]}")
-            return True
+            return message
             
         except Exception as e:
             logger.error(f"发送群组消息失败: {e}")
-            return False
+            return None
+    
+    def _send_multicast(self, group: Group, payload: dict):
+        """通过临时 socket 向群组组播地址发送负载"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 32)
+            if config.MULTICAST_INTERFACE:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                socket.inet_aton(config.MULTICAST_INTERFACE))
+            data = json.dumps(payload).encode('utf-8')
+            sock.sendto(data, (group.multicast_ip, group.multicast_port))
+        finally:
+            sock.close()
+    
+    def _send_unicast(self, group: Group, payload: dict) -> Future:
+        """
+        通过 TCP 向所有在线成员并行扇出（提交后立即返回），完成后记录到达各成员的耗时
+        
+        Returns:
+            Future，结果为 FanoutReport
+        """
+        targets = [(u.user_id, u.ip_address, u.tcp_port) for u in self._online_members(group)]
+        
+        def on_done(future):
+            report = future.result()
+            self.fanout_reports[group.group_id] = report
+            slowest = max(report.member_ms.values()) if report.member_ms else 0
+            logger.info(
+                f"群组消息单播扇出: {group.group_name} {len(report.delivered)}/{len(targets)} 成员, "
+                f"总耗时 {report.total_ms}ms, 最慢成员 {slowest}ms"
+            )
+            if report.failed:
+                logger.warning(f"单播扇出失败成员: {report.failed}")
+        
+        future = self.fanout.send(payload.get('msg_id', ''), payload, targets)
+        future.add_done_callback(on_done)
+        return future
+    
+    def _online_members(self, group: Group) -> list:
+        """获取除自己以外的在线成员"""
+        if not self.user_manager:
+            return []
+        my_id = self.current_user.user_id if self.current_user else None
+        members = []
+        for member_id in group.member_ids:
+            if member_id == my_id:
+                continue
+            user = self.user_manager.get_user(member_id)
+            if user and user.status == 'online':
+                members.append(user)
+        return members
+    
+    def get_delivery_mode(self, group_id: str) -> str:
+        """获取群组当前的投递模式（multicast/unicast）"""
+        return self.delivery_modes.get(group_id, 'multicast')
+    
+    def set_delivery_mode(self, group_id: str, mode: str):
+        """
+        设置群组投递模式
+        
+        Args:
+            group_id: 群组 ID
+            mode: 'multicast' 或 'unicast'
+        """
+        if mode not in ('multicast', 'unicast'):
+            raise ValueError(f"未知的投递模式: {mode}")
+        if self.get_delivery_mode(group_id) != mode:
+            logger.info(f"群组投递模式切换: {group_id} -> {mode}")
+        self.delivery_modes[group_id] = mode
+    
+    def _note_multicast_heard(self, group_id: str, payload: dict):
+        """记录经组播收到了某成员的数据"""
+        sender = payload.get('from_user_id') or payload.get('user_id')
+        if sender:
+            self._multicast_heard.setdefault(group_id, {})[sender] = time.time()
+    
+    def _check_delivery_mode(self, group_id: str):
+        """
+        根据组播可达性自动切换投递模式
+        
+        连自己的摘要回环都收不到，或有在线成员在超时时间内没有任何组播数据到达，
+        则认为该网络丢弃组播，切换为单播扇出；全部恢复后切回组播。
+        成员的静默时间从开始监听与该成员上线两者中较晚的时刻算起，刚上线的成员不会立即被判为静默。
+        """
+        group = self.groups.get(group_id)
+        if not group or not self.current_user or not self.user_manager:
+            return
+        
+        now = time.time()
+        timeout = config.GROUP_MULTICAST_SILENCE_TIMEOUT
+        since = self._listen_started.get(group_id, now)
+        if now - since < timeout:
+            return  # 观察期不足
+        
+        heard = self._multicast_heard.get(group_id, {})
+        silent = []
+        for user in self._online_members(group):
+            member_since = max(since, self.user_manager.get_online_since(user.user_id) or since)
+            if now - heard.get(user.user_id, member_since) > timeout:
+                silent.append(user.user_id)
+        loopback_lost = now - heard.get(self.current_user.user_id, since) > timeout
+        
+        if silent or loopback_lost:
+            if self.get_delivery_mode(group_id) != 'unicast':
+                logger.warning(f"组播不可达 (回环丢失: {loopback_lost}, 静默成员: {silent}): {group_id}")
+            self.set_delivery_mode(group_id, 'unicast')
+        else:
+            self.set_delivery_mode(group_id, 'multicast')
     
     def send_group_invite(self, group_id: str, inviter_id: str, target_user_ids: List[str]):
         """
@@ -433,11 +664,7 @@ class GroupManager:
                 logger.info(f"群组邀请广播已提交: {group.group_name}")
             else:
                 # 降级：通过组播尝试（可能由于还没加入而收不到）
-                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 32)
-                data = json.dumps(payload).encode('utf-8')
-                sock.sendto(data, (group.multicast_ip, group.multicast_port))
-                sock.close()
+                self._send_multicast(group, payload)
                 logger.info(f"群组邀请组播已发送 (降级模式): {group.group_name}")
             
         except Exception as e:
@@ -450,3 +677,169 @@ class GroupManager:
     def get_all_groups(self) -> List[Group]:
         """获取所有群组列表"""
         return list(self.groups.values())
+    
+    # --- 成员反熵同步 ---
+    
+    def _digest_loop(self):
+        """周期性在各群组组播通道上通告成员摘要"""
+        while not self._stop_event.wait(config.GROUP_DIGEST_INTERVAL):
+            for group_id in list(self.groups.keys()):
+                self.advertise_digest(group_id)
+                self._check_delivery_mode(group_id)
+    
+    def advertise_digest(self, group_id: str):
+        """
+        通告群组成员摘要（固定大小，与群规模无关）
+        
+        Args:
+            group_id: 群组 ID
+        """
+        group = self.groups.get(group_id)
+        if not group or not self.current_user:
+            return
+        
+        payload = {
+            'type': 'GROUP_DIGEST',
+            'group_id': group_id,
+            'digest': membership_digest(group.member_ids),
+            'member_count': len(group.member_ids),
+            'user_id': self.current_user.user_id,
+            'ip': self.current_user.ip_address,
+            'tcp_port': self.current_user.tcp_port,
+            'timestamp': int(time.time())
+        }
+        try:
+            self._send_multicast(group, payload)
+        except Exception as e:
+            logger.error(f"发送成员摘要失败 ({group_id}): {e}")
+    
+    def _handle_group_digest(self, group_id: str, payload: dict):
+        """收到成员摘要：与本地不一致时发起差异同步"""
+        if self.current_user and payload.get('user_id') == self.current_user.user_id:
+            return
+        
+        group = self.groups.get(group_id)
+        if not group or payload.get('digest') == membership_digest(group.member_ids):
+            return
+        
+        # 冷却期内不重复同步同一群组
+        now = time.time()
+        with self._members_lock:
+            if group_id in self._reconciling:
+                return
+            if now - self._last_reconcile.get(group_id, 0) < config.GROUP_DIGEST_INTERVAL:
+                return
+            self._reconciling.add(group_id)
+            self._last_reconcile[group_id] = now
+        
+        def run():
+            try:
+                self.reconcile_with_peer(group_id, payload.get('ip'), payload.get('tcp_port'))
+            finally:
+                with self._members_lock:
+                    self._reconciling.discard(group_id)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def reconcile_with_peer(self, group_id: str, peer_ip: str, peer_port: int) -> bool:
+        """
+        与指定成员交换差异桶中的成员 ID（请求方）
+        
+        Args:
+            group_id: 群组 ID
+            peer_ip: 对方 IP
+            peer_port: 对方 TCP 端口
+        
+        Returns:
+            是否同步成功
+        """
+        group = self.groups.get(group_id)
+        if not group:
+            return False
+        
+        local_buckets = bucket_digests(group.member_ids)
+        try:
+            with socket.create_connection((peer_ip, peer_port),
+                                          timeout=config.TCP_REQUEST_TIMEOUT) as sock:
+                send_json(sock, {
+                    'type': self.MEMBERSHIP_SYNC_TYPE,
+                    'group_id': group_id,
+                    'user_id': self.current_user.user_id if self.current_user else '',
+                    'buckets': local_buckets
+                })
+                
+                reply = receive_json(sock)
+                if not reply or reply.get('type') != self.MEMBERSHIP_DIFF_TYPE:
+                    logger.warning(f"成员同步未获得有效响应: {group_id}")
+                    return False
+                
+                # 把本地差异桶中对方缺少的成员推送回去
+                remote_members = set(reply.get('members', []))
+                differing = diff_buckets(local_buckets, reply.get('buckets', []))
+                push = [m for m in members_in_buckets(group.member_ids, differing)
+                        if m not in remote_members]
+                send_json(sock, {
+                    'type': self.MEMBERSHIP_PUSH_TYPE,
+                    'group_id': group_id,
+                    'members': push
+                })
+            
+            added = self._merge_members(group_id, remote_members)
+            logger.info(f"成员反熵同步完成: {group_id}, 新增 {added} 人, 推送 {len(push)} 人")
+            return True
+            
+        except Exception as e:
+            logger.error(f"成员反熵同步失败 ({group_id}): {e}")
+            return False
+    
+    def handle_membership_request(self, request: dict, sock: socket.socket):
+        """
+        处理成员差异同步请求（响应方，由 MessageService 在独立线程中调用）
+        
+        Args:
+            request: 请求负载，包含请求方的桶摘要
+            sock: 已切换为阻塞模式的客户端连接
+        """
+        group_id = request.get('group_id')
+        group = self.groups.get(group_id)
+        if not group or request.get('user_id') not in group.member_ids:
+            send_json(sock, {'type': self.MEMBERSHIP_DIFF_TYPE, 'group_id': group_id,
+                             'buckets': [], 'members': []})
+            return
+        
+        local_buckets = bucket_digests(group.member_ids)
+        differing = diff_buckets(local_buckets, request.get('buckets', []))
+        send_json(sock, {
+            'type': self.MEMBERSHIP_DIFF_TYPE,
+            'group_id': group_id,
+            'buckets': local_buckets,
+            'members': members_in_buckets(group.member_ids, differing)
+        })
+        
+        push = receive_json(sock)
+        if push and push.get('type') == self.MEMBERSHIP_PUSH_TYPE:
+            self._merge_members(group_id, push.get('members', []))
+    
+    def _merge_members(self, group_id: str, member_ids) -> int:
+        """
+        合并成员（仅增不减），同时更新 groups.member_ids 与 group_members 表
+        
+        Returns:
+            新增成员数
+        """
+        with self._members_lock:
+            group = self.groups.get(group_id)
+            if not group:
+                return 0
+            new_ids = [m for m in member_ids if m and m not in group.member_ids]
+            if not new_ids:
+                return 0
+            
+            group.member_ids.extend(new_ids)
+            group.updated_at = int(time.time())
+            self.db_manager.save_group(group)
+            self.db_manager.add_group_members(group_id, new_ids)
+        
+        if self.on_group_updated:
+            self.on_group_updated(group)
+        return len(new_ids)
@@ -0,0 +1,254 @@
+"""
+群聊历史同步 - 迟加入 / 重连成员通过 TCP 分页补拉群消息
+"""
+import json
+import socket
+import threading
+import time
+from typing import Optional, Tuple
+from src.config import config
+from src.core.models import Group, Message, User, group_conversation_id
+from src.utils.logger import get_logger
+from src.utils.network_utils import send_json, receive_json
+
+
+logger = get_logger(__name__)
+
+
+class HistorySyncService:
+    """
+    群聊历史同步服务
+
+    请求方向一名在线群成员发送 HISTORY_SYNC_REQUEST（携带 (timestamp, msg_id) 游标），
+    响应方在同一条 TCP 连接上按页回写 HISTORY_SYNC_PAGE，直至 has_more 为 False。
+    请求方每收到一页即单事务批量入库并持久化游标，断线后从最后一页之后续传。
+    """
+
+    REQUEST_TYPE = 'HISTORY_SYNC_REQUEST'
+    PAGE_TYPE = 'HISTORY_SYNC_PAGE'
+
+    # settings 表中的游标键前缀
+    CURSOR_KEY_PREFIX = 'history_sync_cursor:'
+
+    def __init__(self, db_manager, user_manager=None,
+                 page_size: int = None, max_pages: int = None):
+        """
+        初始化历史同步服务
+
+        Args:
+            db_manager: 数据库管理器实例
+            user_manager: 用户管理器实例（用于挑选在线成员与标识自己）
+            page_size: 每页条数，默认 config.HISTORY_SYNC_PAGE_SIZE
+            max_pages: 单次同步最大页数，默认 config.HISTORY_SYNC_MAX_PAGES
+        """
+        self.db_manager = db_manager
+        self.user_manager = user_manager
+        self.page_size = page_size or config.HISTORY_SYNC_PAGE_SIZE
+        self.max_pages = max_pages or config.HISTORY_SYNC_MAX_PAGES
+
+        # 暂无在线成员可请求的群组，等有成员上线后再同步
+        self._pending = set()
+        # 正在同步的群组，避免并发重复拉取
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    # --- 响应方 ---
+
+    def handle_request(self, request: dict, sock: socket.socket):
+        """
+        处理历史同步请求（由 MessageService 在独立线程中调用）
+
+        Args:
+            request: 请求负载
+            sock: 已切换为阻塞模式的客户端连接
+        """
+        group_id = request.get('group_id')
+        group = self.db_manager.get_group(group_id)
+        if not group:
+            logger.warning(f"历史同步请求的群组不存在: {group_id}")
+            send_json(sock, self._build_page(group_id, [], has_more=False))
+            return
+
+        requester_id = request.get('user_id')
+        if group.member_ids and requester_id not in group.member_ids:
+            logger.warning(f"拒绝非群成员的历史同步请求: {requester_id} -> {group_id}")
+            send_json(sock, self._build_page(group_id, [], has_more=False))
+            return
+
+        cursor = tuple(request['after']) if request.get('after') else None
+        page_size = min(int(request.get('page_size') or self.page_size), self.page_size)
+        max_pages = min(int(request.get('max_pages') or self.max_pages), self.max_pages)
+
+        sent = 0
+        for page_no in range(max_pages):
+            messages = self.db_manager.get_messages_after(
+                group_conversation_id(group_id), cursor, page_size
+            )
+            has_more = len(messages) == page_size and page_no + 1 < max_pages
+            send_json(sock, self._build_page(group_id, messages, has_more))
+            sent += len(messages)
+            if not has_more:
+                break
+            cursor = messages[-1].cursor
+
+        logger.info(f"历史同步已响应: {group_id} -> {requester_id}, 共 {sent} 条")
+
+    def _build_page(self, group_id: str, messages, has_more: bool) -> dict:
+        """构建分页响应负载"""
+        return {
+            'type': self.PAGE_TYPE,
+            'group_id': group_id,
+            'messages': [m.to_dict() for m in messages],
+            'has_more': has_more
+        }
+
+    # --- 请求方 ---
+
+    def sync_group_async(self, group: Group):
+        """在后台线程中同步群组历史"""
+        thread = threading.Thread(target=self.sync_group, args=(group,), daemon=True)
+        thread.start()
+
+    def sync_group(self, group: Group) -> int:
+        """
+        向一名在线群成员请求历史并入库
+
+        Args:
+            group: 群组对象
+
+        Returns:
+            本次拉取到的消息条数
+        """
+        peer = self._pick_peer(group)
+        if not peer:
+            with self._lock:
+                self._pending.add(group.group_id)
+            logger.info(f"暂无在线群成员可同步历史，等待成员上线: {group.group_id}")
+            return 0
+
+        with self._lock:
+            if group.group_id in self._in_flight:
+                return 0
+            self._in_flight.add(group.group_id)
+            self._pending.discard(group.group_id)
+
+        try:
+            return self.sync_from_peer(group.group_id, peer.ip_address, peer.tcp_port)
+        finally:
+            with self._lock:
+                self._in_flight.discard(group.group_id)
+
+    def on_peer_online(self, user_id: str):
+        """有用户上线时，重试等待中的群组同步"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending = list(self._pending)
+
+        for group_id in pending:
+            group = self.db_manager.get_group(group_id)
+            if group and user_id in group.member_ids:
+                self.sync_group_async(group)
+
+    def sync_from_peer(self, group_id: str, peer_ip: str, peer_port: int) -> int:
+        """
+        从指定成员处分页拉取群组历史，支持断线续传
+
+        Args:
+            group_id: 群组 ID
+            peer_ip: 对方 IP
+            peer_port: 对方 TCP 端口
+
+        Returns:
+            拉取到的消息条数
+        """
+        cursor = self._load_cursor(group_id)
+        received = 0
+        pages = 0
+        attempts = 0
+
+        while pages < self.max_pages:
+            try:
+                with socket.create_connection((peer_ip, peer_port),
+                                              timeout=config.TCP_REQUEST_TIMEOUT) as sock:
+                    send_json(sock, {
+                        'type': self.REQUEST_TYPE,
+                        'group_id': group_id,
+                        'user_id': self._my_user_id(),
+                        'after': list(cursor),
+                        'page_size': self.page_size,
+                        'max_pages': self.max_pages - pages
+                    })
+
+                    while True:
+                        page = receive_json(sock)
+                        if page is None or page.get('type') != self.PAGE_TYPE:
+                            raise ConnectionError("历史同步连接中断")
+
+                        messages = [self._to_history_message(d) for d in page.get('messages', [])]
+                        if messages:
+                            if not self.db_manager.save_messages(messages):
+                                raise RuntimeError("历史消息入库失败")
+                            cursor = messages[-1].cursor
+                            self._save_cursor(group_id, cursor)
+                            received += len(messages)
+                        pages += 1
+
+                        if not page.get('has_more') or pages >= self.max_pages:
+                            logger.info(f"群组历史同步完成: {group_id}, 共 {received} 条")
+                            return received
+
+            except OSError as e:
+                attempts += 1
+                if attempts > config.HISTORY_SYNC_RETRIES:
+                    logger.error(f"群组历史同步失败 ({group_id}): {e}")
+                    break
+                logger.warning(f"群组历史同步中断，{attempts} 秒后从游标续传 ({group_id}): {e}")
+                time.sleep(attempts)
+            except Exception as e:
+                logger.error(f"群组历史同步失败 ({group_id}): {e}")
+                break
+
+        return received
+
+    @staticmethod
+    def _to_history_message(data: dict) -> Message:
+        """将同步页中的消息转换为本地历史消息（补拉的历史不计入未读）"""
+        message = Message.from_dict(data)
+        message.is_group = True
+        message.is_read = True
+        return message
+
+    def _pick_peer(self, group: Group) -> Optional[User]:
+        """挑选一名在线的群成员"""
+        if not self.user_manager:
+            return None
+        my_id = self._my_user_id()
+        for member_id in group.member_ids:
+            if member_id == my_id:
+                continue
+            user = self.user_manager.get_user(member_id)
+            if user and user.status == 'online':
+                return user
+        return None
+
+    def _my_user_id(self) -> str:
+        """当前用户 ID"""
+        if self.user_manager and self.user_manager.current_user:
+            return self.user_manager.current_user.user_id
+        return ''
+
+    def _load_cursor(self, group_id: str) -> Tuple[int, str]:
+        """读取已同步到的位置"""
+        value = self.db_manager.get_setting(self.CURSOR_KEY_PREFIX + group_id)
+        if value:
+            try:
+                timestamp, msg_id = json.loads(value)
+                return int(timestamp), str(msg_id)
+            except (ValueError, TypeError):
+                pass
+        return 0, ''
+
+    def _save_cursor(self, group_id: str, cursor: Tuple[int, str]):
+        """持久化已同步到的位置"""
+        self.db_manager.set_setting(self.CURSOR_KEY_PREFIX + group_id, json.dumps(list(cursor)))
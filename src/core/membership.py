@@ -0,0 +1,68 @@
+"""
+群成员摘要 - 用于成员列表反熵同步
+
+成员 ID 按哈希分散到固定数量的桶中，每个桶计算一个短摘要，
+桶摘要再汇总为整组摘要。两端整组摘要一致即视为成员一致；
+不一致时只需比较桶摘要并交换差异桶中的成员 ID。
+"""
+import hashlib
+from typing import Iterable, List
+
+
+# 桶数量（越多则差异定位越精确，单次交换的桶摘要也越大）
+MEMBERSHIP_BUCKETS = 16
+
+
+def _bucket_of(user_id: str) -> int:
+    """计算成员 ID 所在的桶"""
+    return hashlib.md5(user_id.encode('utf-8')).digest()[0] % MEMBERSHIP_BUCKETS
+
+
+def bucket_digests(member_ids: Iterable[str]) -> List[str]:
+    """
+    计算每个桶的摘要
+
+    Args:
+        member_ids: 成员 ID 列表
+
+    Returns:
+        长度为 MEMBERSHIP_BUCKETS 的摘要列表，空桶为空字符串
+    """
+    buckets = [[] for _ in range(MEMBERSHIP_BUCKETS)]
+    for user_id in set(member_ids):
+        buckets[_bucket_of(user_id)].append(user_id)
+
+    digests = []
+    for ids in buckets:
+        if ids:
+            digests.append(hashlib.sha1('\n'.join(sorted(ids)).encode('utf-8')).hexdigest()[:8])
+        else:
+            digests.append('')
+    return digests
+
+
+def membership_digest(member_ids: Iterable[str]) -> str:
+    """
+    计算整组成员摘要
+
+    Args:
+        member_ids: 成员 ID 列表
+
+    Returns:
+        16 位十六进制摘要
+    """
+    return hashlib.sha1(','.join(bucket_digests(member_ids)).encode('utf-8')).hexdigest()[:16]
+
+
+def diff_buckets(local_digests: List[str], remote_digests: List[str]) -> List[int]:
+    """返回摘要不一致的桶序号"""
+    return [
+        i for i in range(MEMBERSHIP_BUCKETS)
+        if i >= len(remote_digests) or local_digests[i] != remote_digests[i]
+    ]
+
+
+def members_in_buckets(member_ids: Iterable[str], buckets: Iterable[int]) -> List[str]:
+    """返回落在指定桶中的成员 ID"""
+    wanted = set(buckets)
+    return sorted(user_id for user_id in set(member_ids) if _bucket_of(user_id) in wanted)
@@ -1,11 +1,18 @@
 """
 数据模型定义
 """
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from typing import Optional
 import time
 
 
+@lru_cache(maxsize=None)
+def _field_names(cls) -> frozenset:
+    """模型字段名集合（按类缓存，避免每次 from_dict 重新计算）"""
+    return frozenset(f.name for f in fields(cls))
+
+
 @dataclass
 class User:
     """用户数据模型"""
@@ -35,12 +42,22 @@ class User:
     def from_dict(cls, data: dict) -> 'User':
         """从字典创建"""
         # 过滤掉不存在的字段
-        import dataclasses
-        valid_fields = {f.name for f in dataclasses.fields(cls)}
+        valid_fields = _field_names(cls)
         filtered_data = {k: v for k, v in data.items() if k in valid_fields}
         return cls(**filtered_data)
 
 
+def private_conversation_id(user1_id: str, user2_id: str) -> str:
+    """私聊会话 ID（与双方顺序无关）"""
+    low, high = sorted((user1_id or '', user2_id or ''))
+    return f"u:{low}:{high}"
+
+
+def group_conversation_id(group_id: str) -> str:
+    """群聊会话 ID"""
+    return f"g:{group_id}"
+
+
 @dataclass
 class Message:
     """消息数据模型"""
@@ -57,6 +74,18 @@ class Message:
     is_read: bool = False
     status: str = "sending"  # sending/sent/received/read/failed
     
+    @property
+    def conversation_id(self) -> str:
+        """所属会话 ID（群聊为 g:群组ID，私聊为 u:较小用户ID:较大用户ID）"""
+        if self.is_group:
+            return group_conversation_id(self.group_id)
+        return private_conversation_id(self.from_user_id, self.to_user_id)
+    
+    @property
+    def cursor(self) -> tuple:
+        """分页游标 (timestamp, msg_id)，用于 get_messages_before/after"""
+        return (self.timestamp, self.msg_id)
+    
     def to_dict(self) -> dict:
         """转换为字典"""
         return {
@@ -78,8 +107,7 @@ class Message:
     def from_dict(cls, data: dict) -> 'Message':
         """从字典创建"""
         # 过滤掉不存在的字段并转换类型
-        import dataclasses
-        valid_fields = {f.name for f in dataclasses.fields(cls)}
+        valid_fields = _field_names(cls)
         filtered_data = {k: v for k, v in data.items() if k in valid_fields}
         
         # 处理 SQLite 整数转布尔
@@ -91,6 +119,23 @@ class Message:
         return cls(**filtered_data)
 
 
+@dataclass
+class SearchHit:
+    """全文搜索命中结果"""
+    message: Message
+    snippet: str = ""  # 命中片段（匹配内容以标记包围）
+    rank: float = 0.0  # 相关度（bm25，越小越相关）
+    cursor: tuple = ()  # 翻页游标，传给 search_messages 获取下一页
+    
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        data = self.message.to_dict()
+        data['conversation_id'] = self.message.conversation_id
+        data['snippet'] = self.snippet
+        data['rank'] = self.rank
+        return data
+
+
 @dataclass
 class Group:
     """群组数据模型"""
@@ -123,9 +168,8 @@ class Group:
     @classmethod
     def from_dict(cls, data: dict) -> 'Group':
         """从字典创建"""
-        import dataclasses
         import json
-        valid_fields = {f.name for f in dataclasses.fields(cls)}
+        valid_fields = _field_names(cls)
         filtered_data = {k: v for k, v in data.items() if k in valid_fields}
         
         # 处理 member_ids（可能是 JSON 字符串）
@@ -181,7 +225,6 @@ class FileTransfer:
     def from_dict(cls, data: dict) -> 'FileTransfer':
         """从字典创建"""
         # 过滤掉不存在的字段
-        import dataclasses
-        valid_fields = {f.name for f in dataclasses.fields(cls)}
+        valid_fields = _field_names(cls)
         filtered_data = {k: v for k, v in data.items() if k in valid_fields}
         return cls(**filtered_data)
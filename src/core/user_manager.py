@@ -6,7 +6,7 @@ import hashlib
 import socket
 import uuid
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional
 from src.core.models import User
 from src.config import config
 from src.utils.logger import get_logger
@@ -26,6 +26,8 @@ class UserManager:
         """
         self.db_manager = db_manager
         self.current_user: Optional[User] = None
+        # 用户 ID -> 本次上线后首次被发现的时间（仅内存，用于判断组播静默的观察期）
+        self._online_since: Dict[str, float] = {}
 
     def set_db_manager(self, db_manager):
         """设置数据库管理器（用于延迟注入）"""
@@ -61,6 +63,7 @@ class UserManager:
         # 将当前用户保存到数据库
         if self.db_manager:
             self._save_user_to_db(self.current_user)
+            self.db_manager.set_local_user_id(user_id)
 
         logger.info(f"当前用户已初始化: {self.current_user.username} ({self.current_user.user_id})")
         return self.current_user
@@ -84,8 +87,10 @@ class UserManager:
             existing_user = self.get_user(user.user_id)
             is_new = existing_user is None
 
-            # 保存或更新到数据库
-            self._save_user_to_db(user)
+            # 保存或更新到数据库（心跳频繁，不等待提交）
+            self._save_user_to_db(user, wait=False)
+            if user.status == 'online':
+                self._online_since.setdefault(user.user_id, time.time())
 
             if is_new:
                 logger.info(f"新用户加入: {user.username} ({user.user_id})")
@@ -116,6 +121,7 @@ class UserManager:
             if user:
                 sql = "DELETE FROM users WHERE user_id = ?"
                 self.db_manager.execute(sql, (user_id,))
+                self._online_since.pop(user_id, None)
                 logger.info(f"用户已移除: {user.username} ({user_id})")
                 return True
             return False
@@ -141,6 +147,7 @@ class UserManager:
             if user:
                 sql = "UPDATE users SET status = 'offline', updated_at = ? WHERE user_id = ?"
                 self.db_manager.execute(sql, (int(time.time()), user_id))
+                self._online_since.pop(user_id, None)
                 logger.info(f"用户已标记为下线: {user.username} ({user_id})")
                 return True
             return False
@@ -163,14 +170,24 @@ class UserManager:
                 return None
 
             sql = "SELECT * FROM users WHERE user_id = ?"
-            result = self.db_manager.query(sql, (user_id,))
-            if result:
-                return User.from_dict(dict(result[0]))
-            return None
+            users = self.db_manager.query_models(User, sql, (user_id,))
+            return users[0] if users else None
         except Exception as e:
             logger.error(f"查询用户失败: {e}")
             return None
 
+    def get_online_since(self, user_id: str) -> Optional[float]:
+        """
+        获取用户本次上线后首次被发现的时间
+        
+        Args:
+            user_id: 用户 ID
+        
+        Returns:
+            时间戳（秒），本进程未发现该用户上线时返回 None
+        """
+        return self._online_since.get(user_id)
+
     def get_online_users(self) -> List[User]:
         """
         获取所有在线用户（从数据库查询）
@@ -183,8 +200,7 @@ class UserManager:
                 return []
 
             sql = "SELECT * FROM users WHERE status = 'online'"
-            results = self.db_manager.query(sql)
-            return [User.from_dict(dict(row)) for row in results]
+            return self.db_manager.query_models(User, sql)
         except Exception as e:
             logger.error(f"查询在线用户失败: {e}")
             return []
@@ -201,34 +217,17 @@ class UserManager:
                 return []
 
             sql = "SELECT * FROM users ORDER BY status DESC, username ASC"
-            results = self.db_manager.query(sql)
-            return [User.from_dict(dict(row)) for row in results]
+            return self.db_manager.query_models(User, sql)
         except Exception as e:
             logger.error(f"查询所有用户失败: {e}")
             return []
 
-    def _save_user_to_db(self, user: User):
-        """将用户保存到数据库（INSERT OR REPLACE）"""
+    def _save_user_to_db(self, user: User, wait: bool = True):
+        """将用户保存到数据库（存在则更新），wait 为 False 时不等待提交"""
         if not self.db_manager:
             return
 
-        sql = """
-            INSERT OR REPLACE INTO users 
-            (user_id, username, hostname, ip_address, tcp_port, status, last_seen, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        now = int(time.time())
-        self.db_manager.execute(sql, (
-            user.user_id,
-            user.username,
-            user.hostname,
-            user.ip_address,
-            user.tcp_port,
-            user.status,
-            now,
-            now,
-            now
-        ))
+        self.db_manager.upsert_users([user], wait=wait)
 
     @staticmethod
     def _generate_user_id() -> str:
@@ -1,5 +1,6 @@
 """数据库模块"""
 
 from .db_manager import DatabaseManager
+from .retention import RetentionJob
 
-__all__ = ['DatabaseManager']
+__all__ = ['DatabaseManager', 'RetentionJob']
@@ -2,48 +2,373 @@
 数据库管理器
 """
 import os
+import queue
 import sqlite3
+import tempfile
 import time
 import threading
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import Any, Callable, Dict, List, Optional, Union
 from src.config import config
+from src.database.row_decoder import decode_rows
 from src.utils.logger import get_logger
 
 
 logger = get_logger(__name__)
 
 
+# 当前数据库结构版本（PRAGMA user_version）
+SCHEMA_VERSION = 4
+
+# 本机用户 ID 的设置项键（未读计数触发器据此区分入站消息）
+LOCAL_USER_KEY = 'local_user_id'
+
+# 会话列表中最后一条消息摘要的最大字符数
+SNIPPET_LENGTH = 100
+
+
+def _conversation_columns(alias: str) -> str:
+    """
+    由一条消息计算会话列表字段（kind, peer_id, last_msg_id, last_timestamp, snippet）的 SQL 表达式
+    
+    Args:
+        alias: 消息行的别名（触发器中为 NEW）
+    
+    Returns:
+        逗号分隔的五个表达式
+    """
+    return f'''
+        CASE WHEN {alias}.is_group = 1 THEN 'group' ELSE 'user' END,
+        CASE
+            WHEN {alias}.is_group = 1 THEN {alias}.group_id
+            WHEN {alias}.from_user_id = (SELECT value FROM settings WHERE key = '{LOCAL_USER_KEY}')
+                THEN {alias}.to_user_id
+            ELSE {alias}.from_user_id
+        END,
+        {alias}.msg_id,
+        {alias}.timestamp,
+        CASE WHEN {alias}.is_group = 1 THEN {alias}.from_username || ': ' ELSE '' END
+            || substr({alias}.content, 1, {SNIPPET_LENGTH})
+    '''
+
+
+SQL_INSERT_MESSAGE = '''
+    INSERT OR IGNORE INTO messages (
+        msg_id, type, from_user_id, from_username,
+        to_user_id, to_username, content, timestamp,
+        is_group, group_id, is_read, status, created_at, conversation_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_UPSERT_USER = '''
+    INSERT INTO users
+        (user_id, username, hostname, ip_address, tcp_port, status, last_seen, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        username = excluded.username,
+        hostname = excluded.hostname,
+        ip_address = excluded.ip_address,
+        tcp_port = excluded.tcp_port,
+        status = excluded.status,
+        last_seen = excluded.last_seen,
+        updated_at = excluded.updated_at
+'''
+
+# 会话历史查询：均由 idx_messages_conversation 一次索引查找 + 范围扫描完成，不使用 OFFSET
+SQL_CONVERSATION_LATEST = '''
+    SELECT * FROM messages
+    WHERE conversation_id = ?
+    ORDER BY timestamp DESC, msg_id DESC
+    LIMIT ?
+'''
+SQL_CONVERSATION_EARLIEST = '''
+    SELECT * FROM messages
+    WHERE conversation_id = ?
+    ORDER BY timestamp ASC, msg_id ASC
+    LIMIT ?
+'''
+SQL_CONVERSATION_BEFORE = '''
+    SELECT * FROM messages
+    WHERE conversation_id = ? AND (timestamp, msg_id) < (?, ?)
+    ORDER BY timestamp DESC, msg_id DESC
+    LIMIT ?
+'''
+SQL_CONVERSATION_AFTER = '''
+    SELECT * FROM messages
+    WHERE conversation_id = ? AND (timestamp, msg_id) > (?, ?)
+    ORDER BY timestamp ASC, msg_id ASC
+    LIMIT ?
+'''
+
+
 class DatabaseManager:
     """数据库管理器类"""
     
-    def __init__(self):
-        """初始化数据库管理器"""
-        self.db_path = config.DB_PATH
+    def __init__(self, db_path=None, mode: str = None):
+        """
+        初始化数据库管理器
+        
+        数据库以 WAL 模式打开：写操作由专用写线程从队列中批量取出，
+        每批在一个事务内提交（组提交）；读操作从有界的只读连接池借用连接，用完归还。
+        memory 模式下数据库文件放在 tmpfs（config.DB_MEMORY_DIR）中，接口与 WAL 快照读不变，
+        不产生磁盘 I/O；文件在关闭时删除。
+        
+        Args:
+            db_path: 数据库文件路径，默认使用 config.DB_PATH（memory 模式下不使用）
+            mode: 存储模式 file/memory，默认 config.DB_MODE
+        """
+        self.mode = mode or config.DB_MODE
+        if self.mode == 'memory':
+            # 每个实例独立命名，互不可见
+            memory_dir = Path(config.DB_MEMORY_DIR)
+            if not memory_dir.is_dir():
+                memory_dir = Path(tempfile.gettempdir())
+            self.db_path = memory_dir / f"minichat-{uuid.uuid4().hex}.db"
+        else:
+            self.db_path = db_path or config.DB_PATH
+        self._uri = Path(self.db_path).resolve().as_uri()
         self.conn: Optional[sqlite3.Connection] = None
         self.cursor: Optional[sqlite3.Cursor] = None
         self.lock = threading.Lock()
+        
+        # 只读连接池：最多 DB_READER_POOL_SIZE 个连接，空闲连接后进先出复用
+        self.reader_pool_size = max(1, config.DB_READER_POOL_SIZE)
+        self._idle_readers: "queue.LifoQueue" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        
+        # 写锁等待统计
+        self._lock_acquisitions = 0
+        self._lock_contended = 0
+        self._lock_wait_total = 0.0
+        self._lock_wait_max = 0.0
+        
+        # 写队列：(写函数, Future, 调用方是否同步等待)，None 表示停止
+        self._write_queue: "queue.Queue" = queue.Queue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._batches = 0
+        self._batched_writes = 0
+        
+        # 全文索引分词器（None 表示 FTS5 不可用）
+        self.fts_tokenizer: Optional[str] = None
+        
         self.connect()
         self.init_tables()
+        self._start_writer()
         
     def connect(self):
-        """连接数据库"""
+        """连接数据库（写连接）"""
         try:
             # 确保数据目录存在
-            config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
             
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False,
+                                        timeout=config.DB_BUSY_TIMEOUT)
             self.conn.row_factory = sqlite3.Row  # 使查询结果可以按列名访问
+            self.conn.isolation_level = None  # 事务由写线程显式管理
             self.cursor = self.conn.cursor()
             
-            logger.info(f"数据库已连接: {self.db_path}")
+            # 新库启用增量 vacuum，保留策略删除消息后可逐步归还空闲页（须在建表前设置）
+            self.cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
+            # WAL 模式下读不阻塞写、写不阻塞读
+            self.cursor.execute('PRAGMA journal_mode=WAL')
+            # memory 模式的数据退出即销毁，无需刷盘
+            self.cursor.execute('PRAGMA synchronous=OFF' if self.mode == 'memory' else 'PRAGMA synchronous=NORMAL')
+            
+            logger.info(f"数据库已连接: {self.db_path}{'（内存模式）' if self.mode == 'memory' else ''}")
             
         except Exception as e:
             logger.error(f"连接数据库失败: {e}")
             raise
     
+    def _open_reader(self) -> sqlite3.Connection:
+        """创建一个只读连接"""
+        conn = sqlite3.connect(self._uri + '?mode=ro', uri=True, check_same_thread=False,
+                               timeout=config.DB_BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        """
+        从连接池借用一个只读连接，退出时归还
+        
+        有空闲连接时直接复用；连接数未达上限时新建；否则等待其他线程归还。
+        短生命周期线程（每个请求一个线程、线程池任务）不会各自占用一个连接。
+        """
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._readers_lock:
+                if len(self._readers) < self.reader_pool_size:
+                    conn = self._open_reader()
+                    self._readers.append(conn)
+            if conn is None:
+                conn = self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put(conn)
+    
+    @contextmanager
+    def _write_lock(self):
+        """获取写锁并记录等待时间"""
+        start = time.perf_counter()
+        contended = not self.lock.acquire(blocking=False)
+        if contended:
+            self.lock.acquire()
+        waited = time.perf_counter() - start
+        try:
+            self._lock_acquisitions += 1
+            if contended:
+                self._lock_contended += 1
+            self._lock_wait_total += waited
+            self._lock_wait_max = max(self._lock_wait_max, waited)
+            yield
+        finally:
+            self.lock.release()
+    
+    def lock_stats(self) -> Dict[str, Any]:
+        """
+        获取写锁等待统计
+        
+        Returns:
+            包含获取次数、争用次数、总/平均/最大等待时间（毫秒）、只读连接数
+            以及写线程已提交的批次数与写操作数的字典
+        """
+        with self.lock:
+            acquisitions = self._lock_acquisitions
+            return {
+                'acquisitions': acquisitions,
+                'contended': self._lock_contended,
+                'wait_total_ms': round(self._lock_wait_total * 1000, 3),
+                'wait_avg_ms': round(self._lock_wait_total * 1000 / acquisitions, 3) if acquisitions else 0.0,
+                'wait_max_ms': round(self._lock_wait_max * 1000, 3),
+                'readers': len(self._readers),
+                'batches': self._batches,
+                'batched_writes': self._batched_writes
+            }
+    
+    def _start_writer(self):
+        """启动写线程"""
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer_thread.start()
+    
+    def _stop_writer(self):
+        """停止写线程（先写完队列中已有的操作）"""
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        self._writer_thread = None
+    
+    def submit_write(self, fn: Callable[[sqlite3.Cursor], Any], wait: bool = False) -> Future:
+        """
+        提交写操作到写线程
+        
+        Args:
+            fn: 写函数，接收写连接的游标；抛出异常时只回滚该操作本身
+            wait: 调用方是否会同步等待结果（为 True 时不再攒批，尽快提交）
+        
+        Returns:
+            Future，写入提交后结果为 True，失败为 False
+        """
+        future = Future()
+        if self._writer_thread is None:
+            future.set_result(False)
+            return future
+        self._write_queue.put((fn, future, wait))
+        return future
+    
+    @staticmethod
+    def write_succeeded(future: Future) -> bool:
+        """
+        判断 submit_write/save_message 等返回的 Future 是否已成功提交（用于提交后通知的回调）
+        
+        Args:
+            future: 已完成的写操作 Future
+        
+        Returns:
+            写操作成功提交返回 True；失败、被回滚或抛出异常返回 False
+        """
+        return future.exception() is None and bool(future.result())
+    
+    def _writer_loop(self):
+        """写线程主循环：按批次大小或延迟上限攒批，单事务提交"""
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                return
+            
+            batch = [job]
+            urgent = job[2]
+            deadline = time.monotonic() + config.DB_WRITE_MAX_LATENCY
+            stop = False
+            while len(batch) < config.DB_WRITE_BATCH_SIZE:
+                # 有调用方同步等待时只合并已在队列中的操作
+                remaining = 0 if urgent else deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        job = self._write_queue.get(timeout=remaining)
+                    else:
+                        job = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+                urgent = urgent or job[2]
+            
+            self._apply_batch(batch)
+            if stop:
+                return
+    
+    def _apply_batch(self, batch):
+        """在一个事务内执行一批写操作，每个操作使用独立的保存点"""
+        results = []
+        with self._write_lock():
+            try:
+                self.cursor.execute('BEGIN')
+                for fn, _, _ in batch:
+                    self.cursor.execute('SAVEPOINT write_job')
+                    try:
+                        fn(self.cursor)
+                        self.cursor.execute('RELEASE write_job')
+                        results.append(True)
+                    except Exception as e:
+                        logger.error(f"执行 SQL 失败: {e}")
+                        self.cursor.execute('ROLLBACK TO write_job')
+                        self.cursor.execute('RELEASE write_job')
+                        results.append(False)
+                self.cursor.execute('COMMIT')
+                self._batches += 1
+                self._batched_writes += len(batch)
+            except Exception as e:
+                logger.error(f"批量提交写操作失败: {e}")
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                results = [False] * len(batch)
+        
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+    
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接（含所有只读连接）"""
+        self._stop_writer()
+        with self._readers_lock:
+            readers = self._readers
+            self._readers = []
+            self._idle_readers = queue.LifoQueue()
+        for reader in readers:
+            try:
+                reader.close()
+            except Exception:
+                pass
+        
         if self.conn:
             try:
                 self.conn.close()
@@ -52,14 +377,50 @@ class DatabaseManager:
                 logger.info("数据库连接已关闭")
             except Exception as e:
                 logger.error(f"关闭数据库失败: {e}")
+        
+        if self.mode == 'memory':
+            # 内存模式的数据库文件不跨进程保留
+            self._remove_files()
+
+    def snapshot(self, path) -> bool:
+        """
+        通过 SQLite 在线备份 API 将当前数据库快照到磁盘文件
+        
+        Args:
+            path: 快照文件路径（已存在则覆盖）
+        
+        Returns:
+            是否成功
+        """
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            dest = sqlite3.connect(str(path))
+            try:
+                # 持有写锁，保证快照不包含写到一半的批次
+                with self._write_lock():
+                    self.conn.backup(dest)
+            finally:
+                dest.close()
+            logger.info(f"数据库快照已保存: {path}")
+            return True
+        except Exception as e:
+            logger.error(f"数据库快照失败: {e}")
+            return False
 
     def destroy(self):
         """彻底销毁数据库（阅后即焚）"""
         self.close()
+        if self.mode != 'memory':
+            # memory 模式已在 close 中删除
+            self._remove_files()
+    
+    def _remove_files(self):
+        """删除数据库文件（WAL 模式下还需删除 -wal / -shm 附属文件）"""
         try:
-            if os.path.exists(self.db_path):
-                os.remove(self.db_path)
-                logger.info(f"数据库文件已物理删除: {self.db_path}")
+            for path in (str(self.db_path), f"{self.db_path}-wal", f"{self.db_path}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.info(f"数据库文件已物理删除: {self.db_path}")
         except Exception as e:
             logger.error(f"删除数据库文件失败: {e}")
     
@@ -98,6 +459,7 @@ class DatabaseManager:
                     is_read INTEGER DEFAULT 0,
                     status TEXT DEFAULT 'sent',
                     created_at INTEGER,
+                    conversation_id TEXT,
                     FOREIGN KEY (from_user_id) REFERENCES users(user_id),
                     FOREIGN KEY (to_user_id) REFERENCES users(user_id)
                 )
@@ -167,6 +529,20 @@ class DatabaseManager:
                 )
             ''')
             
+            # 会话状态表（未读计数与最后一条消息由触发器在写入消息时增量维护）
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS conversation_state (
+                    conversation_id TEXT PRIMARY KEY,
+                    unread_count INTEGER DEFAULT 0,
+                    updated_at INTEGER,
+                    kind TEXT,
+                    peer_id TEXT,
+                    last_msg_id TEXT,
+                    last_timestamp INTEGER,
+                    snippet TEXT
+                )
+            ''')
+            
             # 创建索引
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)')
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_from_user ON messages(from_user_id)')
@@ -176,6 +552,83 @@ class DatabaseManager:
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_members_group ON group_members(group_id)')
             self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members(user_id)')
             
+            self._migrate()
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_conversation '
+                                'ON messages(conversation_id, timestamp, msg_id)')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversation_state_recent '
+                                'ON conversation_state(last_timestamp, last_msg_id)')
+            
+            # 入站未读消息写入时增量维护未读计数
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_messages_unread
+                AFTER INSERT ON messages
+                WHEN NEW.is_read = 0 AND EXISTS (
+                    SELECT 1 FROM settings WHERE key = '{LOCAL_USER_KEY}' AND value != NEW.from_user_id
+                )
+                BEGIN
+                    INSERT INTO conversation_state (conversation_id, unread_count, updated_at)
+                    VALUES (NEW.conversation_id, 1, NEW.timestamp)
+                    ON CONFLICT(conversation_id) DO UPDATE SET
+                        unread_count = unread_count + 1,
+                        updated_at = excluded.updated_at;
+                END
+            """)
+            
+            # 删除未读消息（保留策略清理）时同步扣减未读计数
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_messages_unread_delete
+                AFTER DELETE ON messages
+                WHEN OLD.is_read = 0 AND EXISTS (
+                    SELECT 1 FROM settings WHERE key = '{LOCAL_USER_KEY}' AND value != OLD.from_user_id
+                )
+                BEGIN
+                    UPDATE conversation_state SET unread_count = MAX(unread_count - 1, 0)
+                    WHERE conversation_id = OLD.conversation_id;
+                END
+            """)
+            
+            # 每条新消息写入时更新会话的最后一条消息（补写较早的历史消息不覆盖）
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_messages_conversation
+                AFTER INSERT ON messages
+                BEGIN
+                    INSERT INTO conversation_state
+                        (conversation_id, kind, peer_id, last_msg_id, last_timestamp, snippet, updated_at)
+                    VALUES (NEW.conversation_id, {_conversation_columns('NEW')}, NEW.timestamp)
+                    ON CONFLICT(conversation_id) DO UPDATE SET
+                        kind = excluded.kind,
+                        peer_id = excluded.peer_id,
+                        last_msg_id = excluded.last_msg_id,
+                        last_timestamp = excluded.last_timestamp,
+                        snippet = excluded.snippet
+                    WHERE last_timestamp IS NULL
+                        OR (excluded.last_timestamp, excluded.last_msg_id) > (last_timestamp, last_msg_id);
+                END
+            """)
+            
+            # 删除的恰好是最后一条消息（保留策略清理）时改为剩余消息中最新的一条
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_messages_conversation_delete
+                AFTER DELETE ON messages
+                WHEN OLD.msg_id = (
+                    SELECT last_msg_id FROM conversation_state WHERE conversation_id = OLD.conversation_id
+                )
+                BEGIN
+                    UPDATE conversation_state SET (last_msg_id, last_timestamp, snippet) = (
+                        SELECT m.msg_id, m.timestamp,
+                               CASE WHEN m.is_group = 1 THEN m.from_username || ': ' ELSE '' END
+                                   || substr(m.content, 1, {SNIPPET_LENGTH})
+                        FROM messages m
+                        WHERE m.conversation_id = OLD.conversation_id
+                        ORDER BY m.timestamp DESC, m.msg_id DESC
+                        LIMIT 1
+                    )
+                    WHERE conversation_id = OLD.conversation_id;
+                END
+            """)
+            
+            self._init_fts()
+            
             self.conn.commit()
             logger.info("数据库表初始化完成")
             
@@ -183,29 +636,117 @@ class DatabaseManager:
             logger.error(f"初始化数据库表失败: {e}")
             raise
     
-    def execute(self, sql: str, params: tuple = None) -> bool:
+    def _init_fts(self):
+        """
+        初始化消息全文索引（FTS5 外部内容表，由触发器与 messages 保持同步）
+        
+        优先使用 trigram 分词（支持中文任意子串检索），不可用时退回 unicode61；
+        SQLite 未编译 FTS5 时不建索引，search_messages 退回 LIKE 扫描。
         """
-        执行 SQL 语句
+        exists = self.cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        if exists:
+            self.fts_tokenizer = 'trigram' if 'trigram' in exists['sql'] else 'unicode61'
+            return
+        
+        for tokenizer in ('trigram', 'unicode61'):
+            try:
+                self.cursor.execute(f"""
+                    CREATE VIRTUAL TABLE messages_fts USING fts5(
+                        content, content='messages', content_rowid='rowid', tokenize='{tokenizer}'
+                    )
+                """)
+                self.fts_tokenizer = tokenizer
+                break
+            except sqlite3.OperationalError:
+                continue
+        else:
+            logger.warning("当前 SQLite 不支持 FTS5，消息搜索将使用 LIKE 扫描")
+            return
+        
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, content) VALUES (NEW.rowid, NEW.content);
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', OLD.rowid, OLD.content);
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', OLD.rowid, OLD.content);
+                INSERT INTO messages_fts (rowid, content) VALUES (NEW.rowid, NEW.content);
+            END
+        ''')
+        # 为已有消息建立索引（旧数据库升级）
+        self.cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        logger.info(f"消息全文索引已建立（{self.fts_tokenizer} 分词）")
+    
+    def _migrate(self):
+        """按 PRAGMA user_version 升级旧版本数据库结构"""
+        version = self.cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        if version < 1:
+            # v1: 消息增加 conversation_id 列并为已有消息回填
+            columns = {row['name'] for row in self.cursor.execute('PRAGMA table_info(messages)')}
+            if 'conversation_id' not in columns:
+                self.cursor.execute('ALTER TABLE messages ADD COLUMN conversation_id TEXT')
+            self.cursor.execute('''
+                UPDATE messages SET conversation_id = CASE
+                    WHEN is_group = 1 THEN 'g:' || group_id
+                    ELSE 'u:' || MIN(from_user_id, to_user_id) || ':' || MAX(from_user_id, to_user_id)
+                END
+                WHERE conversation_id IS NULL
+            ''')
+            logger.info("数据库已升级到 v1（会话 ID）")
+        
+        if version < 2:
+            # v2: 新增 conversation_state 表（在 init_tables 中创建），按已有消息回填未读计数
+            local_user_id = self.cursor.execute(
+                'SELECT value FROM settings WHERE key = ?', (LOCAL_USER_KEY,)
+            ).fetchone()
+            if local_user_id:
+                self._rebuild_unread_counts(self.cursor, local_user_id['value'])
+            logger.info("数据库已升级到 v2（未读计数）")
+        
+        if version < 3:
+            # v3: 旧库切换为增量 vacuum 需整体 VACUUM 一次
+            if self.cursor.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                self.cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                self.cursor.execute('VACUUM')
+            logger.info("数据库已升级到 v3（增量 vacuum）")
+        
+        if version < 4:
+            # v4: conversation_state 增加最后一条消息等会话列表字段，按已有消息回填
+            columns = {row['name'] for row in self.cursor.execute('PRAGMA table_info(conversation_state)')}
+            for name, column_type in (('kind', 'TEXT'), ('peer_id', 'TEXT'), ('last_msg_id', 'TEXT'),
+                                      ('last_timestamp', 'INTEGER'), ('snippet', 'TEXT')):
+                if name not in columns:
+                    self.cursor.execute(f'ALTER TABLE conversation_state ADD COLUMN {name} {column_type}')
+            self._rebuild_last_messages(self.cursor)
+            logger.info("数据库已升级到 v4（最近会话）")
+        
+        self.cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    def execute(self, sql: str, params: tuple = None, wait: bool = True) -> Union[bool, Future]:
+        """
+        执行 SQL 语句（由写线程在批量事务中执行）
         
         Args:
             sql: SQL 语句
             params: 参数元组
+            wait: 是否等待提交完成；为 False 时立即返回 Future（即发即忘）
         
         Returns:
-            是否成功
+            wait 为 True 时返回是否成功，否则返回 Future
         """
-        with self.lock:
-            try:
-                if params:
-                    self.cursor.execute(sql, params)
-                else:
-                    self.cursor.execute(sql)
-                self.conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"执行 SQL 失败: {e}")
-                self.conn.rollback()
-                return False
+        future = self.submit_write(lambda cursor: cursor.execute(sql, params or ()), wait=wait)
+        return future.result() if wait else future
     
     def query(self, sql: str, params: tuple = None) -> List[Dict[str, Any]]:
         """
@@ -218,19 +759,37 @@ class DatabaseManager:
         Returns:
             查询结果列表
         """
-        with self.lock:
-            try:
-                if params:
-                    self.cursor.execute(sql, params)
-                else:
-                    self.cursor.execute(sql)
-                
-                rows = self.cursor.fetchall()
-                return [dict(row) for row in rows]
-                
-            except Exception as e:
-                logger.error(f"查询数据失败: {e}")
-                return []
+        try:
+            with self._reader() as conn:
+                rows = conn.execute(sql, params or ()).fetchall()
+            return [dict(row) for row in rows]
+            
+        except Exception as e:
+            logger.error(f"查询数据失败: {e}")
+            return []
+    
+    def query_models(self, model, sql: str, params: tuple = None) -> list:
+        """
+        查询并直接解码为模型对象（元组行 + 预编译构造函数，不经过中间字典）
+        
+        Args:
+            model: 数据模型类（Message/User/Group）
+            sql: SQL 语句
+            params: 参数元组
+        
+        Returns:
+            模型对象列表
+        """
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                cursor.execute(sql, params or ())
+                return decode_rows(model, cursor)
+            
+        except Exception as e:
+            logger.error(f"查询数据失败: {e}")
+            return []
     
     def query_one(self, sql: str, params: tuple = None) -> Optional[Dict[str, Any]]:
         """
@@ -243,74 +802,374 @@ class DatabaseManager:
         Returns:
             查询结果字典，不存在返回 None
         """
-        with self.lock:
-            try:
-                if params:
-                    self.cursor.execute(sql, params)
-                else:
-                    self.cursor.execute(sql)
-                
-                row = self.cursor.fetchone()
-                return dict(row) if row else None
-                
-            except Exception as e:
-                logger.error(f"查询数据失败: {e}")
-                return None
+        try:
+            with self._reader() as conn:
+                cursor = conn.execute(sql, params or ())
+                row = cursor.fetchone()
+                cursor.close()  # 结束语句，归还的连接不再持有读事务
+            return dict(row) if row else None
+            
+        except Exception as e:
+            logger.error(f"查询数据失败: {e}")
+            return None
 
-    def save_message(self, message):
-        """保存消息到数据库"""
-        sql = '''
-            INSERT OR IGNORE INTO messages (
-                msg_id, type, from_user_id, from_username,
-                to_user_id, to_username, content, timestamp,
-                is_group, group_id, is_read, status, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        '''
+    @staticmethod
+    def _message_params(m, now: int) -> tuple:
+        """Message 对象转为 SQL_INSERT_MESSAGE 的参数"""
+        return (
+            m.msg_id, m.type, m.from_user_id, m.from_username,
+            m.to_user_id, m.to_username, m.content, m.timestamp,
+            1 if m.is_group else 0, m.group_id, 1 if m.is_read else 0,
+            m.status, now, m.conversation_id
+        )
+
+    def save_message(self, message, wait: bool = True):
+        """
+        保存消息到数据库
+        
+        Args:
+            message: Message 对象
+            wait: 是否等待提交完成；入站消息可传 False 交由写线程攒批
+        
+        Returns:
+            wait 为 True 时返回是否成功，否则返回 Future
+        """
+        return self.execute(SQL_INSERT_MESSAGE, self._message_params(message, int(time.time())), wait=wait)
+
+    def save_messages(self, messages, wait: bool = True):
+        """
+        批量保存消息（单事务 executemany）
+        
+        Args:
+            messages: Message 对象的可迭代对象，可为生成器（在写线程中逐条消费，不整体物化）
+            wait: 是否等待提交完成
+        
+        Returns:
+            wait 为 True 时返回是否成功，否则返回 Future
+        """
+        now = int(time.time())
+        params = (self._message_params(m, now) for m in messages)
+        future = self.submit_write(lambda cursor: cursor.executemany(SQL_INSERT_MESSAGE, params), wait=wait)
+        return future.result() if wait else future
+
+    def upsert_users(self, users, wait: bool = True):
+        """
+        批量新增或更新用户（单事务 executemany，保留首次写入的 created_at）
+        
+        Args:
+            users: User 对象的可迭代对象，可为生成器
+            wait: 是否等待提交完成
+        
+        Returns:
+            wait 为 True 时返回是否成功，否则返回 Future
+        """
+        now = int(time.time())
         params = (
-            message.msg_id, message.type, message.from_user_id, message.from_username,
-            message.to_user_id, message.to_username, message.content, message.timestamp,
-            1 if message.is_group else 0, message.group_id, 1 if message.is_read else 0,
-            message.status, int(time.time())
+            (u.user_id, u.username, u.hostname, u.ip_address, u.tcp_port, u.status, now, now, now)
+            for u in users
         )
-        return self.execute(sql, params)
+        future = self.submit_write(lambda cursor: cursor.executemany(SQL_UPSERT_USER, params), wait=wait)
+        return future.result() if wait else future
 
     def get_messages(self, user1_id, user2_id, limit=50):
-        """获取两个用户之间的聊天历史"""
+        """获取两个用户之间最近的聊天历史（从旧到新）"""
+        from src.core.models import private_conversation_id
+        return self.get_messages_before(private_conversation_id(user1_id, user2_id), None, limit)
+
+    def get_messages_before(self, conversation_id, cursor=None, page_size=50):
+        """
+        按游标向前（更早）翻页获取会话消息
+        
+        Args:
+            conversation_id: 会话 ID（见 Message.conversation_id）
+            cursor: 游标 (timestamp, msg_id)，通常取当前最早一条消息的 Message.cursor；
+                    为 None 时从最新消息开始
+            page_size: 每页条数
+        
+        Returns:
+            游标之前的最多 page_size 条消息（从旧到新）
+        """
         from src.core.models import Message
-        sql = '''
-            SELECT * FROM messages 
-            WHERE (from_user_id = ? AND to_user_id = ?) 
-               OR (from_user_id = ? AND to_user_id = ?)
-            ORDER BY timestamp DESC
-            LIMIT ?
-        '''
-        params = (user1_id, user2_id, user2_id, user1_id, limit)
-        rows = self.query(sql, params)
+        if cursor is None:
+            messages = self.query_models(Message, SQL_CONVERSATION_LATEST, (conversation_id, page_size))
+        else:
+            timestamp, msg_id = cursor
+            messages = self.query_models(Message, SQL_CONVERSATION_BEFORE,
+                                         (conversation_id, timestamp, msg_id, page_size))
         
-        # 转换回 Message 对象列表，并按时间正序排列（QML 通常从旧到新显示）
-        messages = [Message.from_dict(row) for row in rows]
+        # 查询为倒序，翻转为 QML 使用的从旧到新
         messages.reverse()
         return messages
 
-    def get_unread_count(self, from_user_id, to_user_id):
-        """获取来自特定用户的未读消息数量"""
+    def get_messages_after(self, conversation_id, cursor=None, page_size=50):
+        """
+        按游标向后（更新）翻页获取会话消息
+        
+        Args:
+            conversation_id: 会话 ID（见 Message.conversation_id）
+            cursor: 游标 (timestamp, msg_id)，通常取当前最新一条消息的 Message.cursor；
+                    为 None 时从最早消息开始
+            page_size: 每页条数
+        
+        Returns:
+            游标之后的最多 page_size 条消息（从旧到新）
+        """
+        from src.core.models import Message
+        if cursor is None:
+            return self.query_models(Message, SQL_CONVERSATION_EARLIEST, (conversation_id, page_size))
+        timestamp, msg_id = cursor
+        return self.query_models(Message, SQL_CONVERSATION_AFTER, (conversation_id, timestamp, msg_id, page_size))
+
+    @staticmethod
+    def _rebuild_unread_counts(cursor: sqlite3.Cursor, local_user_id: str):
+        """按消息表重新统计全部会话的未读计数"""
+        cursor.execute('UPDATE conversation_state SET unread_count = 0')
+        cursor.execute('''
+            INSERT INTO conversation_state (conversation_id, unread_count, updated_at)
+            SELECT conversation_id, COUNT(*), MAX(timestamp) FROM messages
+            WHERE is_read = 0 AND from_user_id != ?
+            GROUP BY conversation_id
+            ON CONFLICT(conversation_id) DO UPDATE SET
+                unread_count = excluded.unread_count,
+                updated_at = excluded.updated_at
+        ''', (local_user_id,))
+
+    @staticmethod
+    def _rebuild_last_messages(cursor: sqlite3.Cursor):
+        """按消息表重新计算全部会话的最后一条消息（每个会话一次索引查找）"""
+        cursor.execute(f'''
+            INSERT INTO conversation_state
+                (conversation_id, kind, peer_id, last_msg_id, last_timestamp, snippet, updated_at)
+            SELECT m.conversation_id, {_conversation_columns('m')}, m.timestamp
+            FROM (SELECT DISTINCT conversation_id FROM messages) c
+            JOIN messages m ON m.rowid = (
+                SELECT rowid FROM messages
+                WHERE conversation_id = c.conversation_id
+                ORDER BY timestamp DESC, msg_id DESC
+                LIMIT 1
+            )
+            WHERE 1
+            ON CONFLICT(conversation_id) DO UPDATE SET
+                kind = excluded.kind,
+                peer_id = excluded.peer_id,
+                last_msg_id = excluded.last_msg_id,
+                last_timestamp = excluded.last_timestamp,
+                snippet = excluded.snippet
+        ''')
+
+    def set_local_user_id(self, user_id):
+        """
+        记录本机用户 ID（未读计数只统计他人发来的消息），ID 变化时重建未读计数与会话对端
+        
+        Args:
+            user_id: 本机用户 ID
+        
+        Returns:
+            是否成功
+        """
+        if self.get_setting(LOCAL_USER_KEY) == user_id:
+            return True
+
+        def write(cursor):
+            cursor.execute(
+                'INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)',
+                (LOCAL_USER_KEY, user_id, int(time.time()))
+            )
+            self._rebuild_unread_counts(cursor, user_id)
+            self._rebuild_last_messages(cursor)
+
+        return self.submit_write(write, wait=True).result()
+
+    def search_messages(self, query, conversation_id=None, limit=20, cursor=None,
+                        highlight=('<b>', '</b>')):
+        """
+        全文搜索消息
+        
+        Args:
+            query: 搜索词，多个词以空白分隔（需全部命中）
+            conversation_id: 只在该会话内搜索，None 表示全部会话
+            limit: 最多返回条数
+            cursor: 上一页最后一条结果的 SearchHit.cursor，None 表示第一页
+            highlight: 片段中命中内容的前后标记
+        
+        Returns:
+            SearchHit 列表（按相关度排序；LIKE 退化检索时按时间倒序）
+        """
+        from src.core.models import Message, SearchHit
+        terms = query.split()
+        if not terms:
+            return []
+
+        # trigram 分词要求每个词至少 3 个字符，过短的词退回 LIKE
+        use_fts = self.fts_tokenizer is not None and (
+            self.fts_tokenizer != 'trigram' or all(len(t) >= 3 for t in terms)
+        )
+        if not use_fts:
+            return self._search_messages_like(terms, conversation_id, limit, cursor, highlight)
+
+        match = ' '.join('"' + t.replace('"', '""') + '"' for t in terms)
         sql = '''
-            SELECT COUNT(*) as count FROM messages 
-            WHERE from_user_id = ? AND to_user_id = ? AND is_read = 0
+            SELECT m.*, f.rowid AS fts_rowid, f.rank AS fts_rank,
+                   snippet(messages_fts, 0, ?, ?, '…', 16) AS fts_snippet
+            FROM messages_fts f
+            JOIN messages m ON m.rowid = f.rowid
+            WHERE messages_fts MATCH ?
         '''
-        params = (from_user_id, to_user_id)
-        result = self.query_one(sql, params)
-        return result['count'] if result else 0
+        params = [highlight[0], highlight[1], match]
+        if conversation_id:
+            sql += ' AND m.conversation_id = ?'
+            params.append(conversation_id)
+        if cursor:
+            sql += ' AND (f.rank, f.rowid) > (?, ?)'
+            params.extend(cursor)
+        sql += ' ORDER BY f.rank, f.rowid LIMIT ?'
+        params.append(limit)
+
+        return [
+            SearchHit(
+                message=Message.from_dict(row),
+                snippet=row['fts_snippet'],
+                rank=row['fts_rank'],
+                cursor=(row['fts_rank'], row['fts_rowid'])
+            )
+            for row in self.query(sql, tuple(params))
+        ]
+
+    def _search_messages_like(self, terms, conversation_id, limit, cursor, highlight):
+        """不使用全文索引的 LIKE 检索（按时间倒序）"""
+        from src.core.models import Message, SearchHit
+        conditions = []
+        params = []
+        for term in terms:
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("content LIKE ? ESCAPE '\\'")
+            params.append(f'%{escaped}%')
+        if conversation_id:
+            conditions.append('conversation_id = ?')
+            params.append(conversation_id)
+        if cursor:
+            conditions.append('(timestamp, msg_id) < (?, ?)')
+            params.extend(cursor)
+        sql = (f"SELECT * FROM messages WHERE {' AND '.join(conditions)} "
+               "ORDER BY timestamp DESC, msg_id DESC LIMIT ?")
+        params.append(limit)
+
+        hits = []
+        for row in self.query(sql, tuple(params)):
+            message = Message.from_dict(row)
+            content = message.content or ''
+            pos = content.lower().find(terms[0].lower())
+            if pos < 0:
+                snippet = content[:32]
+            else:
+                end = pos + len(terms[0])
+                snippet = ('…' if pos > 16 else '') + content[max(0, pos - 16):pos] + \
+                    highlight[0] + content[pos:end] + highlight[1] + content[end:end + 16]
+            hits.append(SearchHit(message=message, snippet=snippet, cursor=message.cursor))
+        return hits
+
+    def get_unread_count(self, from_user_id, to_user_id):
+        """获取来自特定用户的未读消息数量"""
+        from src.core.models import private_conversation_id
+        sql = 'SELECT unread_count FROM conversation_state WHERE conversation_id = ?'
+        result = self.query_one(sql, (private_conversation_id(from_user_id, to_user_id),))
+        return result['unread_count'] if result else 0
+
+    def get_unread_counts(self, user_ids, local_user_id):
+        """
+        一次查询获取与多个用户私聊的未读计数
+        
+        Args:
+            user_ids: 对方用户 ID 的可迭代对象
+            local_user_id: 本机用户 ID
+        
+        Returns:
+            {用户 ID: 未读数}，没有会话状态的用户计为 0
+        """
+        from src.core.models import private_conversation_id
+        by_conversation = {private_conversation_id(uid, local_user_id): uid for uid in user_ids}
+        counts = dict.fromkeys(by_conversation.values(), 0)
+        if not by_conversation:
+            return counts
+        
+        placeholders = ', '.join('?' * len(by_conversation))
+        sql = f'SELECT conversation_id, unread_count FROM conversation_state WHERE conversation_id IN ({placeholders})'
+        for row in self.query(sql, tuple(by_conversation)):
+            counts[by_conversation[row['conversation_id']]] = row['unread_count']
+        return counts
+
+    def mark_as_read(self, from_user_id, to_user_id, wait=True):
+        """
+        将来自特定用户的所有未读消息标记为已读，并清零该会话的未读计数
+        
+        Args:
+            from_user_id: 对方用户 ID
+            to_user_id: 本机用户 ID
+            wait: 是否等待提交完成（UI 线程调用时传 False，避免等待写锁）
+        
+        Returns:
+            wait 为 True 时返回是否成功，否则返回 Future
+        """
+        from src.core.models import private_conversation_id
+        conversation_id = private_conversation_id(from_user_id, to_user_id)
+
+        def write(cursor):
+            cursor.execute('''
+                UPDATE messages
+                SET is_read = 1
+                WHERE conversation_id = ? AND from_user_id = ? AND is_read = 0
+            ''', (conversation_id, from_user_id))
+            cursor.execute(
+                'UPDATE conversation_state SET unread_count = 0 WHERE conversation_id = ?',
+                (conversation_id,)
+            )
+
+        future = self.submit_write(write, wait=wait)
+        return future.result() if wait else future
+
+    def mark_conversation_as_read(self, conversation_id, wait=True):
+        """
+        将整个会话（通常为群聊）的未读消息标记为已读，并清零未读计数
+        
+        Args:
+            conversation_id: 会话 ID（见 Message.conversation_id）
+            wait: 是否等待提交完成
+        
+        Returns:
+            wait 为 True 时返回是否成功，否则返回 Future
+        """
+        def write(cursor):
+            cursor.execute(
+                'UPDATE messages SET is_read = 1 WHERE conversation_id = ? AND is_read = 0',
+                (conversation_id,)
+            )
+            cursor.execute(
+                'UPDATE conversation_state SET unread_count = 0 WHERE conversation_id = ?',
+                (conversation_id,)
+            )
 
-    def mark_as_read(self, from_user_id, to_user_id):
-        """将来自特定用户的所有未读消息标记为已读"""
+        future = self.submit_write(write, wait=wait)
+        return future.result() if wait else future
+
+    def get_users_with_unread(self, local_user_id):
+        """
+        一次查询获取除自己外的全部用户及与其私聊的未读计数
+        
+        Args:
+            local_user_id: 本机用户 ID
+        
+        Returns:
+            用户字典列表（在线优先、按昵称排序），每项含 unread_count 字段
+        """
         sql = '''
-            UPDATE messages 
-            SET is_read = 1 
-            WHERE from_user_id = ? AND to_user_id = ? AND is_read = 0
+            SELECT u.*, COALESCE(cs.unread_count, 0) AS unread_count
+            FROM users u
+            LEFT JOIN conversation_state cs
+                ON cs.conversation_id = 'u:' || MIN(u.user_id, ?) || ':' || MAX(u.user_id, ?)
+            WHERE u.user_id != ?
+            ORDER BY u.status DESC, u.username ASC
         '''
-        params = (from_user_id, to_user_id)
-        return self.execute(sql, params)
+        return self.query(sql, (local_user_id, local_user_id, local_user_id))
 
     def save_group(self, group):
         """保存群组到数据库"""
@@ -333,30 +1192,136 @@ class DatabaseManager:
         """获取群组信息"""
         from src.core.models import Group
         sql = 'SELECT * FROM groups WHERE group_id = ?'
-        result = self.query_one(sql, (group_id,))
-        return Group.from_dict(result) if result else None
+        groups = self.query_models(Group, sql, (group_id,))
+        return groups[0] if groups else None
 
     def get_all_groups(self):
         """获取当前用户加入的所有群组"""
         from src.core.models import Group
         sql = 'SELECT * FROM groups ORDER BY updated_at DESC'
-        rows = self.query(sql)
-        return [Group.from_dict(row) for row in rows]
+        return self.query_models(Group, sql)
+
+    def get_group_summaries(self):
+        """
+        一次查询获取全部群组及其未读计数与最后一条消息
+        
+        最后一条消息通过 idx_messages_conversation 逐群定位（每群一次索引查找），
+        未读计数来自 conversation_state。
+        
+        Returns:
+            群组字典列表，每项含 group_id/group_name/member_count/updated_at/unread_count/
+            last_from_username/last_content/last_timestamp（无消息时后三项为 None）
+        """
+        sql = '''
+            SELECT g.group_id, g.group_name, g.updated_at,
+                   COALESCE(json_array_length(g.member_ids), 0) AS member_count,
+                   COALESCE(cs.unread_count, 0) AS unread_count,
+                   m.from_username AS last_from_username,
+                   m.content AS last_content,
+                   m.timestamp AS last_timestamp
+            FROM groups g
+            LEFT JOIN conversation_state cs ON cs.conversation_id = 'g:' || g.group_id
+            LEFT JOIN messages m ON m.rowid = (
+                SELECT rowid FROM messages
+                WHERE conversation_id = 'g:' || g.group_id
+                ORDER BY timestamp DESC, msg_id DESC
+                LIMIT 1
+            )
+        '''
+        return self.query(sql)
+
+    def get_recent_conversations(self, limit: int = 50, conversation_ids=None):
+        """
+        一次查询获取最近会话列表（私聊与群聊合并，按最后一条消息时间倒序）
+        
+        列表完全来自 conversation_state，由 idx_conversation_state_recent 倒序扫描前 limit 行，
+        标题按对端主键各一次查找，不读取消息表。
+        
+        Args:
+            limit: 最多返回的会话数
+            conversation_ids: 只查询这些会话（界面增量刷新用），为 None 时查询最近的会话
+        
+        Returns:
+            会话字典列表，每项含 conversation_id/kind/peer_id/title/snippet/last_msg_id/
+            last_timestamp/unread_count
+        """
+        sql = '''
+            SELECT cs.conversation_id, cs.kind, cs.peer_id, cs.snippet,
+                   cs.last_msg_id, cs.last_timestamp, cs.unread_count,
+                   COALESCE(g.group_name, u.username, cs.peer_id) AS title
+            FROM conversation_state cs
+            LEFT JOIN groups g ON cs.kind = 'group' AND g.group_id = cs.peer_id
+            LEFT JOIN users u ON cs.kind = 'user' AND u.user_id = cs.peer_id
+            WHERE cs.last_timestamp IS NOT NULL {where}
+            ORDER BY cs.last_timestamp DESC, cs.last_msg_id DESC
+            LIMIT ?
+        '''
+        if conversation_ids is None:
+            return self.query(sql.format(where=''), (limit,))
+        conversation_ids = list(conversation_ids)
+        if not conversation_ids:
+            return []
+        placeholders = ', '.join('?' * len(conversation_ids))
+        return self.query(sql.format(where=f'AND cs.conversation_id IN ({placeholders})'),
+                          (*conversation_ids, len(conversation_ids)))
+
+    def get_last_message_cursor(self, conversation_id) -> Optional[tuple]:
+        """
+        获取会话最后一条消息的分页游标（conversation_state 主键查找，不读取消息表）
+        
+        Args:
+            conversation_id: 会话 ID
+        
+        Returns:
+            (timestamp, msg_id)，会话没有消息时返回 None
+        """
+        row = self.query_one(
+            'SELECT last_timestamp, last_msg_id FROM conversation_state WHERE conversation_id = ?',
+            (conversation_id,)
+        )
+        if not row or row['last_msg_id'] is None:
+            return None
+        return (row['last_timestamp'], row['last_msg_id'])
 
     def add_group_member(self, group_id, user_id, role='member'):
         """添加群组成员"""
+        return self.add_group_members(group_id, [user_id], role=role)
+
+    def add_group_members(self, group_id, members, role='member', wait: bool = True):
+        """
+        批量添加群组成员（单事务 executemany，已存在的成员忽略）
+        
+        Args:
+            group_id: 群组 ID
+            members: 成员 ID 或 (成员 ID, 角色) 的可迭代对象，可为生成器
+            role: 未单独指定角色时使用的默认角色
+            wait: 是否等待提交完成
+        
+        Returns:
+            wait 为 True 时返回是否成功，否则返回 Future
+        """
         sql = '''
             INSERT OR IGNORE INTO group_members (group_id, user_id, role, joined_at)
             VALUES (?, ?, ?, ?)
         '''
-        params = (group_id, user_id, role, int(time.time()))
-        return self.execute(sql, params)
+        now = int(time.time())
+        params = (
+            (group_id, member, role, now) if isinstance(member, str) else (group_id, member[0], member[1], now)
+            for member in members
+        )
+        future = self.submit_write(lambda cursor: cursor.executemany(sql, params), wait=wait)
+        return future.result() if wait else future
 
     def remove_group_member(self, group_id, user_id):
         """移除群组成员"""
         sql = 'DELETE FROM group_members WHERE group_id = ? AND user_id = ?'
         return self.execute(sql, (group_id, user_id))
 
+    def get_group_member_ids(self, group_id):
+        """获取群组成员 ID 列表（不依赖 users 表）"""
+        sql = 'SELECT user_id FROM group_members WHERE group_id = ?'
+        return [row['user_id'] for row in self.query(sql, (group_id,))]
+
     def get_group_members(self, group_id):
         """获取群组成员列表"""
         sql = '''
@@ -364,20 +1329,23 @@ class DatabaseManager:
             INNER JOIN group_members gm ON u.user_id = gm.user_id
             WHERE gm.group_id = ?
         '''
-        rows = self.query(sql, (group_id,))
         from src.core.models import User
-        return [User.from_dict(row) for row in rows]
+        return self.query_models(User, sql, (group_id,))
 
     def get_group_messages(self, group_id, limit=50):
-        """获取群组消息历史"""
-        from src.core.models import Message
+        """获取群组最近的消息历史（从旧到新）"""
+        from src.core.models import group_conversation_id
+        return self.get_messages_before(group_conversation_id(group_id), None, limit)
+
+    def get_setting(self, key, default=None):
+        """读取设置项"""
+        result = self.query_one('SELECT value FROM settings WHERE key = ?', (key,))
+        return result['value'] if result else default
+
+    def set_setting(self, key, value):
+        """写入设置项"""
         sql = '''
-            SELECT * FROM messages 
-            WHERE group_id = ? AND is_group = 1
-            ORDER BY timestamp DESC
-            LIMIT ?
+            INSERT OR REPLACE INTO settings (key, value, updated_at)
+            VALUES (?, ?, ?)
         '''
-        rows = self.query(sql, (group_id, limit))
-        messages = [Message.from_dict(row) for row in rows]
-        messages.reverse()
-        return messages
+        return self.execute(sql, (key, value, int(time.time())))
@@ -0,0 +1,173 @@
+"""
+消息保留策略 - 后台按会话条数与消息年龄清理历史消息
+"""
+import threading
+import time
+from typing import Dict, Optional
+from src.config import config
+from src.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class RetentionJob:
+    """
+    消息保留任务
+
+    周期性地将每个会话裁剪到最多 max_count 条、删除早于 max_age 的消息。
+    删除按 batch_size 分批提交到写线程，单批只短暂持有写锁，
+    不会阻塞入站消息写入；每轮结束后执行增量 vacuum 归还空闲页。
+    """
+
+    def __init__(self, db_manager, max_count: int = None, max_age: int = None,
+                 batch_size: int = None, interval: float = None):
+        """
+        初始化保留任务
+
+        Args:
+            db_manager: 数据库管理器
+            max_count: 每个会话保留的最多消息数，默认 config.MESSAGE_HISTORY_LIMIT（0 表示不限）
+            max_age: 消息最长保留秒数，默认 config.MESSAGE_MAX_AGE（0 表示不限）
+            batch_size: 每批删除的最多行数，默认 config.RETENTION_BATCH_SIZE
+            interval: 执行间隔（秒），默认 config.RETENTION_INTERVAL
+        """
+        self.db_manager = db_manager
+        self.max_count = config.MESSAGE_HISTORY_LIMIT if max_count is None else max_count
+        self.max_age = config.MESSAGE_MAX_AGE if max_age is None else max_age
+        self.batch_size = batch_size or config.RETENTION_BATCH_SIZE
+        self.interval = interval or config.RETENTION_INTERVAL
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 累计统计
+        self.runs = 0
+        self.rows_deleted = 0
+        self.pages_freed = 0
+
+    def start(self):
+        """启动后台线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.max_count and not self.max_age:
+            logger.info("未配置消息保留上限，保留任务不启动")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+        self._thread.start()
+        logger.info(f"消息保留任务已启动: 每会话 {self.max_count} 条, 最长 {self.max_age} 秒")
+
+    def stop(self):
+        """停止后台线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"消息保留任务执行失败: {e}")
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        执行一轮清理
+
+        Returns:
+            本轮删除的行数与归还的页数
+        """
+        deleted = 0
+        if self.max_age:
+            deleted += self._trim_by_age(int(time.time()) - self.max_age)
+        if self.max_count:
+            deleted += self._trim_by_count()
+
+        pages = self._incremental_vacuum() if deleted else 0
+
+        self.runs += 1
+        self.rows_deleted += deleted
+        self.pages_freed += pages
+        if deleted:
+            logger.info(f"消息保留任务: 删除 {deleted} 条消息, 归还 {pages} 个空闲页")
+        return {'deleted': deleted, 'pages_freed': pages}
+
+    def stats(self) -> Dict[str, int]:
+        """返回累计统计"""
+        return {
+            'runs': self.runs,
+            'rows_deleted': self.rows_deleted,
+            'pages_freed': self.pages_freed
+        }
+
+    def _delete_batches(self, sql: str, params: tuple) -> int:
+        """反复执行带 LIMIT 的删除，直到不足一批"""
+        total = 0
+        while not self._stop_event.is_set():
+            counter = []
+            ok = self.db_manager.submit_write(
+                lambda cursor: counter.append(cursor.execute(sql, params + (self.batch_size,)).rowcount),
+                wait=True
+            ).result()
+            if not ok:
+                break
+            total += counter[0]
+            if counter[0] < self.batch_size:
+                break
+        return total
+
+    def _trim_by_age(self, before_timestamp: int) -> int:
+        """删除早于指定时间的消息"""
+        sql = '''
+            DELETE FROM messages WHERE rowid IN (
+                SELECT rowid FROM messages WHERE timestamp < ? LIMIT ?
+            )
+        '''
+        return self._delete_batches(sql, (before_timestamp,))
+
+    def _trim_by_count(self) -> int:
+        """将超出条数上限的会话裁剪到上限"""
+        over_limit = self.db_manager.query('''
+            SELECT conversation_id FROM messages
+            GROUP BY conversation_id
+            HAVING COUNT(*) > ?
+        ''', (self.max_count,))
+
+        deleted = 0
+        for row in over_limit:
+            conversation_id = row['conversation_id']
+            # 第 max_count 条（从新到旧）之前的消息均可删除
+            boundary = self.db_manager.query_one('''
+                SELECT timestamp, msg_id FROM messages
+                WHERE conversation_id = ?
+                ORDER BY timestamp DESC, msg_id DESC
+                LIMIT 1 OFFSET ?
+            ''', (conversation_id, self.max_count - 1))
+            if not boundary:
+                continue
+
+            sql = '''
+                DELETE FROM messages WHERE rowid IN (
+                    SELECT rowid FROM messages
+                    WHERE conversation_id = ? AND (timestamp, msg_id) < (?, ?)
+                    ORDER BY timestamp, msg_id
+                    LIMIT ?
+                )
+            '''
+            deleted += self._delete_batches(sql, (conversation_id, boundary['timestamp'], boundary['msg_id']))
+        return deleted
+
+    def _incremental_vacuum(self) -> int:
+        """归还空闲页，返回归还的页数"""
+        pages = []
+
+        def vacuum(cursor):
+            before = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+            cursor.execute('PRAGMA incremental_vacuum').fetchall()
+            pages.append(before - cursor.execute('PRAGMA freelist_count').fetchone()[0])
+
+        if self.db_manager.submit_write(vacuum, wait=True).result():
+            return pages[0]
+        return 0
@@ -0,0 +1,89 @@
+"""
+查询结果解码 - 将元组行直接构造为数据模型对象
+
+按 (模型类, 列名) 预编译构造函数：列与字段的对应关系、布尔转换等
+只在第一次遇到某种结果列组合时计算一次，之后每行只做一次位置取值与构造。
+"""
+import dataclasses
+import json
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, Type
+
+
+def _json_list(value):
+    """JSON 字符串转列表（解析失败返回空列表）"""
+    if not isinstance(value, str):
+        return value if value is not None else []
+    try:
+        return json.loads(value)
+    except ValueError:
+        return []
+
+
+# 字段类型 -> 列值转换函数（SQLite 以整数存储布尔值）
+_CONVERTERS = {
+    bool: 'bool',
+    list: '_json_list',
+}
+
+_cache: Dict[Tuple[type, Tuple[str, ...]], Callable] = {}
+_cache_lock = threading.Lock()
+
+
+def _compile(model: Type, columns: Tuple[str, ...]) -> Callable:
+    """生成形如 lambda row: Model(a=row[0], b=bool(row[3]), ...) 的构造函数"""
+    index = {name: i for i, name in enumerate(columns)}
+    args = []
+    for f in dataclasses.fields(model):
+        if not f.init or f.name not in index:
+            continue
+        value = f"row[{index[f.name]}]"
+        converter = _CONVERTERS.get(f.type)
+        if converter:
+            value = f"{converter}({value})"
+        args.append(f"{f.name}={value}")
+
+    source = f"def decode(row):\n    return _model({', '.join(args)})\n"
+    namespace = {'_model': model, '_json_list': _json_list}
+    exec(source, namespace)
+    return namespace['decode']
+
+
+def get_decoder(model: Type, columns: Sequence[str]) -> Callable:
+    """
+    获取（或编译）模型的行解码函数
+
+    Args:
+        model: dataclass 模型类（Message/User/Group 等）
+        columns: 结果列名（cursor.description 中的顺序）
+
+    Returns:
+        接收元组行、返回模型对象的函数；结果中不存在的字段使用模型默认值
+    """
+    key = (model, tuple(columns))
+    decoder = _cache.get(key)
+    if decoder is None:
+        with _cache_lock:
+            decoder = _cache.get(key)
+            if decoder is None:
+                decoder = _compile(model, key[1])
+                _cache[key] = decoder
+    return decoder
+
+
+def decode_rows(model: Type, cursor) -> List:
+    """
+    将游标的全部结果解码为模型对象列表（一次遍历）
+
+    Args:
+        model: dataclass 模型类
+        cursor: 已执行查询、行工厂为元组的 sqlite3 游标
+
+    Returns:
+        模型对象列表
+    """
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+    decode = get_decoder(model, [d[0] for d in cursor.description])
+    return [decode(row) for row in rows]
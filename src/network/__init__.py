@@ -3,5 +3,6 @@
 from .broadcast import BroadcastService
 from .message import MessageService
 from .file_transfer import FileTransferService
+from .fanout import FanoutSender, FanoutReport
 
-__all__ = ['BroadcastService', 'MessageService', 'FileTransferService']
+__all__ = ['BroadcastService', 'MessageService', 'FileTransferService', 'FanoutSender', 'FanoutReport']
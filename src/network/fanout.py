@@ -0,0 +1,171 @@
+"""
+TCP 单播扇出 - 组播不可用时向群成员逐一投递
+"""
+import select
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from src.config import config
+from src.utils.logger import get_logger
+from src.utils.network_utils import pack_json
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FanoutReport:
+    """单条消息的扇出结果"""
+    msg_id: str
+    delivered: List[str] = field(default_factory=list)  # 成功写入的成员 ID
+    failed: List[str] = field(default_factory=list)  # 投递失败的成员 ID
+    member_ms: Dict[str, float] = field(default_factory=dict)  # 成员 ID -> 自扇出开始到写入完成的耗时
+    total_ms: float = 0.0  # 到达全部成员的总耗时
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return {
+            'msg_id': self.msg_id,
+            'delivered': self.delivered,
+            'failed': self.failed,
+            'member_ms': self.member_ms,
+            'total_ms': self.total_ms
+        }
+
+
+class FanoutSender:
+    """
+    单播扇出发送器
+
+    负载只编码一次，由有界线程池并行写入复用的长连接；
+    连接失效时丢弃并重连一次。send 提交后立即返回，不等待任何成员写入完成。
+    """
+
+    def __init__(self, max_workers: int = None):
+        """
+        初始化扇出发送器
+
+        Args:
+            max_workers: 最大并发写入数，默认 config.GROUP_FANOUT_CONCURRENCY
+        """
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.GROUP_FANOUT_CONCURRENCY,
+            thread_name_prefix="fanout"
+        )
+        # (ip, port) -> (socket, 写锁)
+        self._pool: Dict[Tuple[str, int], Tuple[socket.socket, threading.Lock]] = {}
+        self._pool_lock = threading.Lock()
+
+    def send(self, msg_id: str, payload: dict, targets: List[Tuple[str, str, int]]) -> Future:
+        """
+        并行发送到全部目标（不阻塞调用方）
+
+        Args:
+            msg_id: 消息 ID（用于报告）
+            payload: 消息负载
+            targets: (user_id, ip, port) 列表
+
+        Returns:
+            Future，全部目标写入完成或失败后结果为 FanoutReport
+        """
+        frame = pack_json(payload)
+        report = FanoutReport(msg_id=msg_id)
+        done = Future()
+        start = time.perf_counter()
+        if not targets:
+            done.set_result(report)
+            return done
+
+        lock = threading.Lock()
+        remaining = [len(targets)]
+
+        def collect(user_id, future):
+            # 在写入线程中汇总，最后一个目标完成时结束报告
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                logger.error(f"单播扇出异常: {e}")
+                elapsed = None
+            with lock:
+                if elapsed is None:
+                    report.failed.append(user_id)
+                else:
+                    report.delivered.append(user_id)
+                    report.member_ms[user_id] = round(elapsed, 2)
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            report.total_ms = round((time.perf_counter() - start) * 1000, 2)
+            done.set_result(report)
+
+        for user_id, ip, port in targets:
+            future = self.executor.submit(self._deliver, (ip, port), frame, start)
+            future.add_done_callback(lambda f, uid=user_id: collect(uid, f))
+        return done
+
+    def _deliver(self, addr: Tuple[str, int], frame: bytes, start: float) -> Optional[float]:
+        """写入一个目标，返回自扇出开始的耗时（毫秒），失败返回 None"""
+        for attempt in range(2):
+            try:
+                sock, lock = self._get_connection(addr)
+                with lock:
+                    sock.sendall(frame)
+                return (time.perf_counter() - start) * 1000
+            except OSError as e:
+                self._drop_connection(addr)
+                if attempt:
+                    logger.error(f"单播扇出失败 {addr[0]}:{addr[1]}: {e}")
+        return None
+
+    def _get_connection(self, addr: Tuple[str, int]) -> Tuple[socket.socket, threading.Lock]:
+        """获取（或建立）到目标的长连接"""
+        with self._pool_lock:
+            entry = self._pool.get(addr)
+        if entry and self._is_alive(entry[0]):
+            return entry
+        if entry:
+            self._drop_connection(addr)
+
+        sock = socket.create_connection(addr, timeout=config.TCP_REQUEST_TIMEOUT)
+        entry = (sock, threading.Lock())
+        with self._pool_lock:
+            existing = self._pool.get(addr)
+            if existing:
+                sock.close()
+                return existing
+            self._pool[addr] = entry
+        return entry
+
+    @staticmethod
+    def _is_alive(sock: socket.socket) -> bool:
+        """对端从不在扇出连接上回写，可读即意味着连接已被关闭"""
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return not readable or sock.recv(1, socket.MSG_PEEK) != b''
+        except OSError:
+            return False
+
+    def _drop_connection(self, addr: Tuple[str, int]):
+        """丢弃失效连接"""
+        with self._pool_lock:
+            entry = self._pool.pop(addr, None)
+        if entry:
+            try:
+                entry[0].close()
+            except OSError:
+                pass
+
+    def close(self):
+        """关闭所有连接与线程池"""
+        with self._pool_lock:
+            entries = list(self._pool.values())
+            self._pool.clear()
+        for sock, _ in entries:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self.executor.shutdown(wait=False)
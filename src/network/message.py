@@ -17,19 +17,48 @@ logger = get_logger(__name__)
 class MessageService:
     """TCP 消息服务类 (基于 selectors 实现多路复用)"""
     
-    def __init__(self, on_message_received: Optional[Callable] = None):
+    def __init__(self, on_message_received: Optional[Callable] = None, seen_cache=None):
         """
         初始化消息服务
         
         Args:
             on_message_received: 接收到消息时的回调函数
+            seen_cache: 共享的已见消息 ID 缓存（SeenIdCache），用于丢弃重复消息
         """
         self.on_message_received = on_message_received
+        self.seen_cache = seen_cache
         self.server_socket = None
         self.running = False
         self.server_thread = None
         self.selector = selectors.DefaultSelector()
         self._client_buffers: Dict[socket.socket, bytearray] = {}
+        # 请求类消息处理器：msg_type -> handler(request, sock)，处理器独占该连接
+        self._request_handlers: Dict[str, Callable] = {}
+        # 按类型路由的普通消息处理器：msg_type -> handler(message)
+        self._message_handlers: Dict[str, Callable] = {}
+    
+    def register_message_handler(self, msg_type: str, handler: Callable):
+        """
+        注册按类型路由的消息处理器（不经过 on_message_received）
+        
+        Args:
+            msg_type: 消息类型（payload['type']）
+            handler: 处理函数 handler(message: dict)
+        """
+        self._message_handlers[msg_type] = handler
+    
+    def register_request_handler(self, msg_type: str, handler: Callable):
+        """
+        注册请求/响应类消息处理器
+        
+        收到该类型消息后，连接会从 selector 中摘除并交给独立线程，
+        由处理器在阻塞模式下直接通过该 socket 回写响应（如分页流式传输）。
+        
+        Args:
+            msg_type: 消息类型（payload['type']）
+            handler: 处理函数 handler(request: dict, sock: socket.socket)
+        """
+        self._request_handlers[msg_type] = handler
         
     def start(self):
         """启动消息服务"""
@@ -118,10 +147,44 @@ class MessageService:
         else:
             # 处理解析出的消息
             for msg in messages:
+                handler = self._request_handlers.get(msg.get('type'))
+                if handler:
+                    self._dispatch_request(client_socket, msg, handler)
+                    return
+                msg_id = msg.get('msg_id')
+                if self.seen_cache and msg_id and self.seen_cache.is_duplicate(msg_id):
+                    continue
+                handler = self._message_handlers.get(msg.get('type'))
+                if handler:
+                    handler(msg)
+                    continue
                 if self.on_message_received:
                     self.on_message_received(msg)
                     logger.info(f"消息接收成功: {msg.get('msg_id', 'unknown')}")
 
+    def _dispatch_request(self, client_socket, request: dict, handler: Callable):
+        """将连接移交给请求处理线程"""
+        try:
+            self.selector.unregister(client_socket)
+        except Exception:
+            pass
+        self._client_buffers.pop(client_socket, None)
+        client_socket.setblocking(True)
+        client_socket.settimeout(config.TCP_REQUEST_TIMEOUT)
+
+        def run():
+            try:
+                handler(request, client_socket)
+            except Exception as e:
+                logger.error(f"处理请求失败 ({request.get('type')}): {e}")
+            finally:
+                try:
+                    client_socket.close()
+                except Exception:
+                    pass
+
+        threading.Thread(target=run, daemon=True).start()
+
     def _close_client(self, client_socket):
         """关闭客户端连接并清理资源"""
         try:
@@ -2,16 +2,23 @@
 QML 后端桥接类 (Controller)
 实现 MVC 架构中的控制层，通过子控制器分发业务
 """
-from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, pyqtProperty
-from src.core.models import Message
+from PyQt5.QtCore import QObject, QThreadPool, pyqtSignal, pyqtSlot, pyqtProperty
+from src.config import config
+from src.core.models import Message, group_conversation_id, private_conversation_id
 from src.core.user_manager import UserManager
 from src.core.message_manager import MessageManager
 from src.core.group_manager import GroupManager
+from src.core.history_sync import HistorySyncService
 from src.network.broadcast import BroadcastService
 from src.network.message import MessageService
 from src.database.db_manager import DatabaseManager
+from src.database.retention import RetentionJob
+from src.ui.coalescer import ChangeCoalescer
+from src.ui.history_cache import HistoryCache
+from src.ui.watchdog import EventLoopWatchdog
 from src.ui.models import MessageListModel
-from src.ui.controllers import UserController, ChatController, GroupController
+from src.ui.controllers import UserController, ChatController, GroupController, ConversationController
+from src.utils.dedup import SeenIdCache
 from src.utils.logger import get_logger
 import traceback
 
@@ -22,11 +29,13 @@ class QmlBackend(QObject):
 
     # 声明所有供 QML 使用的信号 (保持接口兼容)
     userListChanged = pyqtSignal()
+    currentChatUserChanged = pyqtSignal()
     chatHistoryChanged = pyqtSignal(list)
     newMessageReceived = pyqtSignal(dict)
     newMessageSent = pyqtSignal(dict)
     currentUserChanged = pyqtSignal()
     groupListChanged = pyqtSignal()
+    currentChatGroupChanged = pyqtSignal()
     groupMessageReceived = pyqtSignal(dict)
     
     # 内部跨线程信号 (保持私有以确保 UI 安全更新)
@@ -42,9 +51,15 @@ class QmlBackend(QObject):
         self.user_manager = UserManager(db_manager=self.db_manager)
         self.message_manager = MessageManager()
         self.user_manager.initialize_current_user()
+        self.retention_job = RetentionJob(self.db_manager)
         
-        # 2. 初始化 QML 模型（注入 db_manager）
-        self._message_model = MessageListModel(db_manager=self.db_manager, parent=self)
+        # 2. 初始化 QML 模型（注入 db_manager，历史在线程池中加载）
+        # 最可能打开的会话的最新一页消息在后台预取，切换会话时直接从内存显示
+        self.history_cache = HistoryCache(self.db_manager, thread_pool=QThreadPool.globalInstance())
+        self._message_model = MessageListModel(
+            db_manager=self.db_manager, parent=self, thread_pool=QThreadPool.globalInstance(),
+            history_cache=self.history_cache
+        )
         self._message_model.set_current_user_id(self.user_manager.current_user.user_id)
 
         # 3. 初始化网络底层服务
@@ -52,33 +67,61 @@ class QmlBackend(QObject):
             on_user_discovered=self._on_user_discovered_raw,
             on_group_invite=self._on_group_invite_raw
         )
-        self.message_service = MessageService(on_message_received=self._on_message_received_raw)
+        self.seen_cache = SeenIdCache()
+        self.message_service = MessageService(
+            on_message_received=self._on_message_received_raw,
+            seen_cache=self.seen_cache
+        )
+        self.history_sync = HistorySyncService(self.db_manager, self.user_manager)
+        self.message_service.register_request_handler(
+            HistorySyncService.REQUEST_TYPE, self.history_sync.handle_request
+        )
         self.group_manager = GroupManager(
             db_manager=self.db_manager,
             on_group_message_received=self._on_group_message_raw,
-            on_broadcast_needed=self.broadcast_service.send_custom_broadcast
+            on_broadcast_needed=self.broadcast_service.send_custom_broadcast,
+            on_group_joined=self.history_sync.sync_group_async,
+            on_group_updated=self._on_group_updated_raw,
+            user_manager=self.user_manager,
+            seen_cache=self.seen_cache
+        )
+        self.message_service.register_request_handler(
+            GroupManager.MEMBERSHIP_SYNC_TYPE, self.group_manager.handle_membership_request
+        )
+        self.message_service.register_message_handler(
+            'GROUP_MESSAGE', self.group_manager.handle_unicast_message
         )
 
-        # 4. 初始化业务控制器 (拆分核心逻辑)
-        self.user_ctrl = UserController(self.user_manager, self.db_manager)
-        self.group_ctrl = GroupController(self.group_manager, self.user_manager)
+        # 4. 初始化业务控制器 (拆分核心逻辑，共用一个变更合并器按周期刷新模型)
+        self.coalescer = ChangeCoalescer(parent=self)
+        # 监测界面线程卡顿（数据库锁等待、同步发送、模型重置等），卡顿时记录调用栈
+        self.watchdog = EventLoopWatchdog(parent=self)
+        self.user_ctrl = UserController(self.user_manager, self.db_manager, self.coalescer)
+        self.user_ctrl.load_users()
+        self.group_ctrl = GroupController(self.group_manager, self.user_manager, self.coalescer)
+        self.group_ctrl.load_groups()
+        self.conversation_ctrl = ConversationController(self.db_manager, self.coalescer, self.history_cache)
+        self.conversation_ctrl.load_conversations()
         self.chat_ctrl = ChatController(
             self._message_model, self.db_manager, 
             self.user_manager, self.message_service, self.group_manager,
-            self.message_manager
+            self.message_manager, self.coalescer
         )
 
         # 5. 绑定控制器信号到主信号 (供 QML 监听)
         self.user_ctrl.userListChanged.connect(self.userListChanged)
+        self.user_ctrl.currentChatUserChanged.connect(self.currentChatUserChanged)
         self.user_ctrl.currentUserChanged.connect(self.currentUserChanged)
         self.group_ctrl.groupListChanged.connect(self.groupListChanged)
+        self.group_ctrl.currentChatGroupChanged.connect(self.currentChatGroupChanged)
         self.chat_ctrl.newMessageReceived.connect(self.newMessageReceived)
         self.chat_ctrl.newMessageSent.connect(self.newMessageSent)
         self.chat_ctrl.groupMessageReceived.connect(self.groupMessageReceived)
 
         # 6. 绑定内部信号处理 (确保主线程执行业务)
-        self._internalMessageSignal.connect(self.chat_ctrl.process_received_message)
-        self._internalGroupMessageSignal.connect(self.chat_ctrl.process_group_message)
+        self._internalMessageSignal.connect(self._on_private_message)
+        self._internalGroupMessageSignal.connect(self._on_group_message)
+        self.chat_ctrl.newMessageSent.connect(self._on_message_sent)
         self._internalGroupInviteSignal.connect(self.group_ctrl.process_group_invite)
 
         # 7. 启动常驻服务
@@ -86,10 +129,13 @@ class QmlBackend(QObject):
 
     def _start_services(self):
         try:
+            self.watchdog.start()
             self.broadcast_service.set_current_user(self.user_manager.current_user)
             self.broadcast_service.start()
             self.message_service.start()
+            self.group_manager.set_current_user(self.user_manager.current_user)
             self.group_manager.start()
+            self.retention_job.start()
             logger.info("系统各模块子服务已启动")
         except Exception as e:
             logger.error(f"子服务启动失败: {e}\n{traceback.format_exc()}")
@@ -99,6 +145,9 @@ class QmlBackend(QObject):
     @pyqtProperty(QObject, constant=True)
     def messageModel(self): return self._message_model
 
+    @pyqtProperty(QObject, constant=True)
+    def userModel(self): return self.user_ctrl.user_model
+
     @pyqtProperty(str, notify=currentUserChanged)
     def currentUserId(self): return self.user_manager.current_user.user_id
 
@@ -108,16 +157,31 @@ class QmlBackend(QObject):
     @pyqtProperty(str, notify=currentUserChanged)
     def currentUserIp(self): return self.user_manager.current_user.ip_address
 
-    @pyqtProperty(list, notify=userListChanged)
-    def onlineUsers(self): return self.user_ctrl.get_online_users_data()
+    @pyqtProperty(str, notify=currentChatUserChanged)
+    def currentChatUserName(self):
+        row = self.user_ctrl.user_model.get(self.chat_ctrl._current_chat_user_id)
+        return row['username'] if row else ""
 
-    @pyqtProperty(str, notify=userListChanged)
+    @pyqtProperty(str, notify=currentChatUserChanged)
     def currentChatUserStatus(self):
         user = self.user_manager.get_user(self.chat_ctrl._current_chat_user_id)
         return user.status if user else "offline"
 
-    @pyqtProperty(list, notify=groupListChanged)
-    def groupList(self): return self.group_ctrl.get_group_list_data()
+    @pyqtProperty(QObject, constant=True)
+    def groupModel(self): return self.group_ctrl.group_model
+
+    @pyqtProperty(str, notify=currentChatGroupChanged)
+    def currentChatGroupName(self):
+        row = self.group_ctrl.group_model.get(self.chat_ctrl._current_chat_group_id)
+        return row['group_name'] if row else ""
+
+    @pyqtProperty(int, notify=currentChatGroupChanged)
+    def currentChatGroupMemberCount(self):
+        row = self.group_ctrl.group_model.get(self.chat_ctrl._current_chat_group_id)
+        return row['member_count'] if row else 0
+
+    @pyqtProperty(QObject, constant=True)
+    def conversationModel(self): return self.conversation_ctrl.conversation_model
 
     # --- 槽函数接口 (转发到控制器) ---
 
@@ -127,11 +191,14 @@ class QmlBackend(QObject):
         self.chat_ctrl.set_active_session('user', user_id=user_id)
         self.user_ctrl.set_current_chat_user_id(user_id)
         self.group_ctrl.set_current_chat_group_id(None)
+        self.conversation_ctrl.set_current_conversation(
+            private_conversation_id(self.user_manager.current_user.user_id, user_id)
+        )
         
-        # 标记消息已读并刷新模型
-        self.db_manager.mark_as_read(user_id, self.user_manager.current_user.user_id)
+        # 异步标记已读并直接清零该行的未读计数，历史在后台加载
+        self.db_manager.mark_as_read(user_id, self.user_manager.current_user.user_id, wait=False)
+        self.user_ctrl.user_model.set_unread(user_id, 0)
         self._message_model.set_active_session('user', user_id=user_id)
-        self.userListChanged.emit()
 
     @pyqtSlot(str)
     def selectGroup(self, group_id):
@@ -139,10 +206,10 @@ class QmlBackend(QObject):
         self.chat_ctrl.set_active_session('group', group_id=group_id)
         self.group_ctrl.set_current_chat_group_id(group_id)
         self.user_ctrl.set_current_chat_user_id(None)
+        self.conversation_ctrl.set_current_conversation(group_conversation_id(group_id))
         
-        # 刷新模型以显示群聊消息
+        # 后台加载群聊历史
         self._message_model.set_active_session('group', group_id=group_id)
-        self.groupListChanged.emit()
 
     @pyqtSlot(str, list)
     def createGroup(self, group_name, member_user_ids):
@@ -153,14 +220,37 @@ class QmlBackend(QObject):
     def sendMessage(self, content):
         self.chat_ctrl.send_message(content)
 
+    @pyqtSlot(str, result=list)
+    def searchMessages(self, query):
+        """全文搜索聊天记录（返回按相关度排序的命中列表，含 snippet 与 conversation_id）"""
+        return [hit.to_dict() for hit in self.db_manager.search_messages(query, limit=50)]
+
+    @pyqtSlot(result='QVariant')
+    def eventLoopStats(self):
+        """界面线程事件循环延迟直方图与最近的卡顿记录（含调用栈）"""
+        return self.watchdog.stats()
+
     @pyqtSlot()
     def stop(self):
         """统一停止所有服务"""
         try:
+            self.watchdog.stop()
             self.broadcast_service.send_offline()
             self.broadcast_service.stop()
             self.message_service.stop()
             self.group_manager.stop()
+            self.retention_job.stop()
+            QThreadPool.globalInstance().waitForDone(2000)  # 等待进行中的历史加载
+            logger.info(f"消息保留统计: {self.retention_job.stats()}")
+            logger.info(f"入站去重统计: {self.seen_cache.stats()}")
+            logger.info(f"界面变更合并统计: {self.coalescer.stats()}")
+            logger.info(f"历史预取缓存统计: {self.history_cache.stats()}")
+            stats = self.watchdog.stats()
+            logger.info(f"事件循环统计: 卡顿 {stats['stalls']} 次，累计 {stats['total_stall_ms']}ms，"
+                        f"最长 {stats['max_stall_ms']}ms，延迟分布 {stats['histogram']}")
+            logger.info(f"数据库写锁统计: {self.db_manager.lock_stats()}")
+            if config.DB_SNAPSHOT_PATH:
+                self.db_manager.snapshot(config.DB_SNAPSHOT_PATH)
             self.db_manager.destroy()
         except Exception as e:
             logger.error(f"系统关闭清理失败: {e}")
@@ -170,19 +260,51 @@ class QmlBackend(QObject):
     def _on_message_received_raw(self, message_data: dict):
         """接收私聊消息（网络线程回调）"""
         message = Message.from_dict(message_data)
-        # 先保存到数据库
-        self.db_manager.save_message(message)
-        # 触发用户列表刷新（更新未读计数）
-        self.userListChanged.emit()
-        # 再触发UI更新信号
-        self._internalMessageSignal.emit(message)
+        # 交由写线程攒批保存，提交成功后再通知 UI（消息窗口与未读计数均以数据库为准）；
+        # 保存失败时撤销去重记录，重传的同一消息仍可被接收
+        def on_saved(future):
+            if self.db_manager.write_succeeded(future):
+                self._internalMessageSignal.emit(message)
+            else:
+                logger.error(f"私聊消息保存失败，未通知界面: {message.msg_id}")
+                if message.msg_id:
+                    self.seen_cache.forget(message.msg_id)
+        
+        self.db_manager.save_message(message, wait=False).add_done_callback(on_saved)
+
+    def _on_private_message(self, message: Message):
+        """私聊消息到达 UI 线程：更新消息窗口与发送者的未读计数"""
+        self.history_cache.record(message)
+        self.chat_ctrl.process_received_message(message)
+        self.user_ctrl.refresh_unread(message.from_user_id)
+        self.conversation_ctrl.touch(message.conversation_id)
+
+    def _on_group_message(self, message: Message):
+        """群聊消息到达 UI 线程：更新消息窗口与群组行的预览/未读"""
+        self.history_cache.record(message)
+        self.chat_ctrl.process_group_message(message)
+        self.group_ctrl.record_message(message)
+        self.conversation_ctrl.touch(message.conversation_id)
+
+    def _on_message_sent(self, message_data: dict):
+        message = Message.from_dict(message_data)
+        self.history_cache.record(message)
+        if message.is_group:
+            self.group_ctrl.record_message(message, is_mine=True)
+        self.conversation_ctrl.touch(message.conversation_id)
 
     def _on_group_message_raw(self, message: Message):
         if message.from_user_id != self.user_manager.current_user.user_id:
             self._internalGroupMessageSignal.emit(message)
 
+    def _on_group_updated_raw(self, group):
+        self.group_ctrl.groupListChanged.emit()
+        self.conversation_ctrl.touch(group_conversation_id(group.group_id))  # 群名变化时刷新标题
+
     def _on_user_discovered_raw(self, user_data: dict, addr: tuple):
         self.user_ctrl.handle_user_discovered(user_data)
+        if user_data.get('type') == 'HEARTBEAT':
+            self.history_sync.on_peer_online(user_data.get('user_id', ''))
 
     def _on_group_invite_raw(self, invite_data: dict):
         self._internalGroupInviteSignal.emit(invite_data)
@@ -0,0 +1,119 @@
+"""
+UI 变更通知合并器 - 将任意线程产生的脏键合并后按固定节奏批量刷新到模型
+"""
+import threading
+from typing import Any, Callable, Dict, Optional
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from src.config import config
+from src.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class ChangeCoalescer(QObject):
+    """
+    变更通知合并器
+
+    各线程通过 mark(kind, key, value) 登记变化；同一类型同一键在一个周期内只保留一份
+    （默认后者覆盖前者，可注册 merge 函数合并）。第一次登记后启动单次定时器，
+    到期时在 UI 线程按注册顺序把每种类型的全部变化一次交给处理函数。
+    两次刷新至少间隔 interval_ms，消息风暴下 UI 刷新频率有上限而数据不丢失。
+    """
+
+    # 跨线程唤醒信号（只在一个周期的第一次登记时发射）
+    _kick = pyqtSignal()
+
+    def __init__(self, interval_ms: int = None, parent=None):
+        """
+        初始化合并器（须在 UI 线程创建）
+
+        Args:
+            interval_ms: 刷新间隔（毫秒），默认 config.UI_NOTIFY_INTERVAL_MS
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.interval_ms = interval_ms or config.UI_NOTIFY_INTERVAL_MS
+
+        self._handlers: Dict[str, Callable[[Dict[Any, Any]], None]] = {}
+        self._merges: Dict[str, Callable[[Any, Any], Any]] = {}
+        self._dirty: Dict[str, Dict[Any, Any]] = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._kick.connect(self._schedule)
+
+        # 统计
+        self.marks = 0
+        self.flushes = 0
+        self.max_batch = 0
+
+    def register(self, kind: str, handler: Callable[[Dict[Any, Any]], None],
+                 merge: Optional[Callable[[Any, Any], Any]] = None):
+        """
+        注册一种变化的处理函数
+
+        Args:
+            kind: 变化类型
+            handler: 刷新时调用，参数为 {键: 值}（按首次登记顺序）
+            merge: 同一键重复登记时的合并函数 merge(旧值, 新值)，默认取新值
+        """
+        self._handlers[kind] = handler
+        if merge:
+            self._merges[kind] = merge
+
+    def mark(self, kind: str, key, value=None):
+        """
+        登记一次变化（线程安全）
+
+        Args:
+            kind: 变化类型（须已注册）
+            key: 变化的键（用户 ID、群组 ID 等）
+            value: 附带的数据
+        """
+        with self._lock:
+            self.marks += 1
+            pending = self._dirty.setdefault(kind, {})
+            merge = self._merges.get(kind)
+            if merge and key in pending:
+                pending[key] = merge(pending[key], value)
+            else:
+                pending[key] = value
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._kick.emit()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start(self.interval_ms)
+
+    def flush(self):
+        """立即把积累的变化交给处理函数（UI 线程调用）"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            self._scheduled = False
+        if not dirty:
+            return
+
+        self.flushes += 1
+        for kind, handler in self._handlers.items():
+            changes = dirty.get(kind)
+            if not changes:
+                continue
+            self.max_batch = max(self.max_batch, len(changes))
+            try:
+                handler(changes)
+            except Exception as e:
+                logger.error(f"刷新界面变更失败 ({kind}): {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """返回累计统计"""
+        return {
+            'marks': self.marks,
+            'flushes': self.flushes,
+            'max_batch': self.max_batch
+        }
@@ -1,5 +1,6 @@
 from .user_controller import UserController
 from .chat_controller import ChatController
 from .group_controller import GroupController
+from .conversation_controller import ConversationController
 
-__all__ = ['UserController', 'ChatController', 'GroupController']
+__all__ = ['UserController', 'ChatController', 'GroupController', 'ConversationController']
@@ -1,5 +1,6 @@
 from PyQt5.QtCore import QObject, pyqtSignal
 from src.core.models import Message
+from src.ui.coalescer import ChangeCoalescer
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -12,7 +13,8 @@ class ChatController(QObject):
     
     # 内部跨线程信号由主 Backend 转发至此处处理，或在此处定义
     
-    def __init__(self, message_model, db_manager, user_manager, message_service, group_manager, message_manager):
+    def __init__(self, message_model, db_manager, user_manager, message_service, group_manager, message_manager,
+                 coalescer: ChangeCoalescer = None):
         super().__init__()
         self._message_model = message_model
         self.db_manager = db_manager
@@ -25,6 +27,11 @@ class ChatController(QObject):
         self._current_chat_group_id = None
         self._current_chat_type = 'user'
 
+        # 当前会话的新消息与已读标记按周期合并：一批消息一次插入，每个发送者一次已读写入
+        self.coalescer = coalescer or ChangeCoalescer(parent=self)
+        self.coalescer.register('read', self._apply_read)
+        self.coalescer.register('messages', self._apply_messages)
+
     def set_active_session(self, chat_type, user_id=None, group_id=None):
         self._current_chat_type = chat_type
         self._current_chat_user_id = user_id
@@ -37,10 +44,9 @@ class ChatController(QObject):
             sender_id = str(message.from_user_id)
             
             if sender_id == current_id:
-                self.db_manager.mark_as_read(message.from_user_id, self.user_manager.current_user.user_id)
                 message.is_read = True
-                # 刷新模型，从数据库重新加载
-                self._message_model.refresh()
+                self.coalescer.mark('read', message.from_user_id)
+                self.coalescer.mark('messages', message.msg_id, message)
                 self.newMessageReceived.emit(message.to_dict())
             return True
         except Exception as e:
@@ -51,31 +57,37 @@ class ChatController(QObject):
         """处理群聊消息 (UI 安全线程)"""
         try:
             if self._current_chat_type == 'group' and message.group_id == self._current_chat_group_id:
-                # 刷新模型，从数据库重新加载
-                self._message_model.refresh()
+                self.coalescer.mark('messages', message.msg_id, message)
                 self.groupMessageReceived.emit(message.to_dict())
             return True
         except Exception as e:
             logger.error(f"ChatController 处理群聊失败: {e}")
             return False
 
+    def _apply_read(self, changes: dict):
+        for user_id in changes:
+            self.db_manager.mark_as_read(user_id, self.user_manager.current_user.user_id, wait=False)
+
+    def _apply_messages(self, changes: dict):
+        # 只追加仍属于当前会话的消息（合并期间可能已切换会话）
+        self._message_model.append_messages(changes.values())
+
     def send_message(self, content):
         """发送消息统一入口"""
         if not content.strip(): return
+        # 先落地尚未刷新的入站消息，保证自己的消息排在其后
+        self.coalescer.flush()
         
         if self._current_chat_type == 'group' and self._current_chat_group_id:
-            success = self.group_manager.send_group_message(
+            message = self.group_manager.send_group_message(
                 group_id=self._current_chat_group_id,
                 from_user_id=self.user_manager.current_user.user_id,
                 from_username=self.user_manager.current_user.username,
                 content=content
             )
-            if success:
-                # 刷新模型，从数据库重新加载最新消息
-                self._message_model.refresh()
-                msgs = self.db_manager.get_group_messages(self._current_chat_group_id, limit=1)
-                if msgs:
-                    self.newMessageSent.emit(msgs[-1].to_dict())
+            if message:
+                self._message_model.append_messages([message])
+                self.newMessageSent.emit(message.to_dict())
         
         elif self._current_chat_type == 'user' and self._current_chat_user_id:
             target_user = self.user_manager.get_user(self._current_chat_user_id)
@@ -90,10 +102,12 @@ class ChatController(QObject):
                     to_username=target_user.username,
                     content=content
                 )
-                self.message_service.send_message(target_user.ip_address, target_user.tcp_port, msg.to_dict())
+                # 先以“发送中”状态显示，发送完成后只更新该行的状态
+                self._message_model.append_messages([msg])
+                sent = self.message_service.send_message(target_user.ip_address, target_user.tcp_port, msg.to_dict())
+                msg.status = 'sent' if sent else 'failed'
                 self.db_manager.save_message(msg)
-                # 刷新模型，从数据库重新加载
-                self._message_model.refresh()
+                self._message_model.update_message(msg.msg_id, status=msg.status)
                 self.newMessageSent.emit(msg.to_dict())
             except Exception as e:
                 logger.error(f"发送私聊失败: {e}")
@@ -0,0 +1,55 @@
+from PyQt5.QtCore import QObject
+from src.config import config
+from src.ui.coalescer import ChangeCoalescer
+from src.ui.history_cache import rank_conversations
+from src.ui.models import ConversationListModel
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ConversationController(QObject):
+    """最近会话列表控制器"""
+
+    def __init__(self, db_manager, coalescer: ChangeCoalescer = None, history_cache=None):
+        super().__init__()
+        self.db_manager = db_manager
+        self.history_cache = history_cache  # 按会话列表排名在后台预取历史（HistoryCache）
+        self._current_conversation_id = None
+        self.conversation_model = ConversationListModel(self)
+
+        # 有新消息的会话按周期合并，每个周期一次查询取回这些会话的最新状态
+        self.coalescer = coalescer or ChangeCoalescer(parent=self)
+        self.coalescer.register('conversations', self._apply_conversations)
+
+    def load_conversations(self):
+        """从 conversation_state 一次索引读取加载最近会话（启动时调用一次）"""
+        self.conversation_model.reset_conversations(
+            self.db_manager.get_recent_conversations(config.RECENT_CONVERSATIONS_LIMIT)
+        )
+        self._prefetch()
+
+    def touch(self, conversation_id):
+        """登记某个会话有新消息（任意线程，须在消息提交之后调用）"""
+        self.coalescer.mark('conversations', conversation_id)
+
+    def _apply_conversations(self, changes: dict):
+        rows = self.db_manager.get_recent_conversations(conversation_ids=changes)
+        for row in rows:
+            # 当前会话的消息随到随读，已读标记可能尚未提交
+            if row['conversation_id'] == self._current_conversation_id:
+                row['unread_count'] = 0
+        self.conversation_model.update_conversations(rows)
+        self._prefetch()
+
+    def _prefetch(self):
+        """后台预取最可能被打开的会话的最新一页消息"""
+        if self.history_cache is None:
+            return
+        rows = [self.conversation_model.get(key) for key in self.conversation_model.keys()]
+        self.history_cache.warm(rank_conversations(rows, config.HISTORY_PREFETCH_TOP_K))
+
+    def set_current_conversation(self, conversation_id):
+        """设置当前会话并清零其未读计数"""
+        self._current_conversation_id = conversation_id
+        self.conversation_model.set_current(conversation_id)
+        self.conversation_model.set_unread(conversation_id, 0)
@@ -1,5 +1,7 @@
 from PyQt5.QtCore import QObject, pyqtSignal
-from src.core.models import Group
+from src.core.models import Group, group_conversation_id
+from src.ui.coalescer import ChangeCoalescer
+from src.ui.models import GroupListModel
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -7,28 +9,67 @@ logger = get_logger(__name__)
 class GroupController(QObject):
     """群组管理业务控制器"""
     groupListChanged = pyqtSignal()
+    currentChatGroupChanged = pyqtSignal()  # 当前群聊切换，或其群名/成员数变化
 
-    def __init__(self, group_manager, user_manager):
+    def __init__(self, group_manager, user_manager, coalescer: ChangeCoalescer = None):
         super().__init__()
         self.group_manager = group_manager
         self.user_manager = user_manager
         self._current_chat_group_id = None
+        self.group_model = GroupListModel(self)
+
+        # 群消息带来的预览/未读变化按群合并，每个周期每个群只更新一次
+        self.coalescer = coalescer or ChangeCoalescer(parent=self)
+        self.coalescer.register('group_activity', self._apply_activity, merge=self._merge_activity)
+        # 群组增减/改名/成员变化时对齐模型（网络线程发射时以队列方式回到 UI 线程）
+        self.groupListChanged.connect(self._sync_model)
+
+    def load_groups(self):
+        """从数据库一次查询加载群组列表模型（启动时调用一次）"""
+        self.group_model.reset_groups(self.group_manager.db_manager.get_group_summaries())
+
+    def _sync_model(self):
+        before = self._current_group_header()
+        self.group_model.sync_groups(self.group_manager.get_all_groups())
+        if self._current_group_header() != before:
+            self.currentChatGroupChanged.emit()
+
+    def _current_group_header(self):
+        row = self.group_model.get(self._current_chat_group_id)
+        return (row['group_name'], row['member_count']) if row else None
 
     def set_current_chat_group_id(self, group_id):
         self._current_chat_group_id = group_id
-        self.groupListChanged.emit()
+        self.group_model.set_current(group_id)
+        if group_id:
+            # 打开群聊即视为已读
+            self.group_manager.db_manager.mark_conversation_as_read(group_conversation_id(group_id), wait=False)
+            self.group_model.set_unread(group_id, 0)
+        self.currentChatGroupChanged.emit()
+
+    def record_message(self, message, is_mine: bool = False):
+        """
+        新群消息到达或发出后更新对应群组行（UI 线程）
+
+        Args:
+            message: 群消息
+            is_mine: 是否为自己发送的消息
+        """
+        is_open = message.group_id == self._current_chat_group_id
+        if is_open and not is_mine:
+            self.group_manager.db_manager.mark_conversation_as_read(group_conversation_id(message.group_id), wait=False)
+        self.coalescer.mark('group_activity', message.group_id, (message, 0 if is_mine or is_open else 1))
+
+    @staticmethod
+    def _merge_activity(previous, current):
+        """合并同一群组的两次活动：保留较新的消息，累加未读数"""
+        message = max(previous[0], current[0], key=lambda m: m.cursor)
+        return message, previous[1] + current[1]
 
-    def get_group_list_data(self):
-        """格式化群组列表数据"""
-        groups = []
-        for group in self.group_manager.get_all_groups():
-            groups.append({
-                'group_id': group.group_id,
-                'group_name': group.group_name,
-                'member_count': len(group.member_ids),
-                'is_current': group.group_id == self._current_chat_group_id
-            })
-        return groups
+    def _apply_activity(self, changes: dict):
+        for group_id, (message, unread) in changes.items():
+            # 合并期间打开了该群则不再计入未读
+            self.group_model.record_message(message, unread=0 if group_id == self._current_chat_group_id else unread)
 
     def create_group(self, group_name, member_user_ids):
         """执行创建群组操作"""
@@ -1,5 +1,7 @@
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtProperty
 from src.core.models import User
+from src.ui.coalescer import ChangeCoalescer
+from src.ui.models import UserListModel
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -8,50 +10,50 @@ class UserController(QObject):
     """用户业务控制器"""
     userListChanged = pyqtSignal()
     currentUserChanged = pyqtSignal()
+    currentChatUserChanged = pyqtSignal()  # 当前聊天对象切换，或其昵称/在线状态变化
 
-    def __init__(self, user_manager, db_manager):
+    def __init__(self, user_manager, db_manager, coalescer: ChangeCoalescer = None):
         super().__init__()
         self.user_manager = user_manager
         self.db_manager = db_manager
         self._current_chat_user_id = None
+        self.user_model = UserListModel(self)
+
+        # 网络线程的上线/下线与未读变化经合并器按周期批量更新模型
+        self.coalescer = coalescer or ChangeCoalescer(parent=self)
+        self.coalescer.register('presence', self._apply_presence)
+        self.coalescer.register('unread', self._apply_unread)
+
+    def load_users(self):
+        """从数据库加载用户列表模型（启动时调用一次）"""
+        self.user_model.reset_users(self.db_manager.get_users_with_unread(self.current_user.user_id))
 
     def set_current_chat_user_id(self, user_id):
         self._current_chat_user_id = user_id
-        self.userListChanged.emit()
+        self.user_model.set_current(user_id)
+        self.currentChatUserChanged.emit()
+
+    def refresh_unread(self, user_id):
+        """登记某个用户的未读计数需要刷新（任意线程，下一周期批量查询）"""
+        self.coalescer.mark('unread', user_id)
+
+    def _apply_unread(self, changes: dict):
+        """一次查询刷新本周期内有新消息的用户的未读计数"""
+        counts = self.db_manager.get_unread_counts(changes, self.current_user.user_id)
+        for user_id, count in counts.items():
+            # 正在聊天的用户消息随到随读，已读标记可能尚未提交
+            self.user_model.set_unread(user_id, 0 if user_id == self._current_chat_user_id else count)
 
     @property
     def current_user(self):
         return self.user_manager.current_user
 
-    def get_online_users_data(self):
-        """供 QML 使用的用户列表数据格式化（排除自己）"""
-        users = []
-        current_me_id = self.current_user.user_id
-        all_users = sorted(self.user_manager.get_all_users(),
-                           key=lambda u: u.status != "online")
-
-        for user in all_users:
-            # 过滤掉自己
-            if user.user_id == current_me_id:
-                continue
-            
-            unread = self.db_manager.get_unread_count(user.user_id, current_me_id)
-            users.append({
-                'user_id': user.user_id,
-                'username': user.username,
-                'ip': user.ip_address,
-                'is_current': user.user_id == self._current_chat_user_id,
-                'unread_count': unread,
-                'status': user.status
-            })
-        return users
-
     def handle_user_discovered(self, user_data: dict):
         """处理发现用户的回调"""
         user_id = user_data.get('user_id', '')
         if user_data.get('type') == 'BYE':
             if self.user_manager.set_user_offline(user_id):
-                self.userListChanged.emit()
+                self.coalescer.mark('presence', user_id, user_data)
             return
 
         user = User(
@@ -62,4 +64,37 @@ class UserController(QObject):
             tcp_port=user_data.get('tcp_port', 10000)
         )
         if self.user_manager.add_user(user):
+            self.coalescer.mark('presence', user_id, user_data)
+
+    def _apply_presence(self, changes: dict):
+        """
+        按本周期内每个用户最后一次发现/下线通知更新用户模型（UI 线程）
+
+        内容不变的心跳不触发任何通知；只有新用户加入或上下线时才发出一次 userListChanged，
+        当前聊天对象的行有变化时发出 currentChatUserChanged。
+        """
+        new_ids = [user_id for user_id in changes if not self.user_model.contains(user_id)]
+        unread = self.db_manager.get_unread_counts(new_ids, self.current_user.user_id) if new_ids else {}
+
+        membership_changed = False
+        current_changed = False
+        for user_id, user_data in changes.items():
+            if user_data.get('type') == 'BYE':
+                if self.user_model.contains(user_id):
+                    changed = self.user_model.upsert_user(user_id, status='offline')
+                    membership_changed |= changed
+                    current_changed |= changed and user_id == self._current_chat_user_id
+                continue
+
+            previous = self.user_model.get(user_id)
+            fields = {'username': user_data.get('username', ''), 'ip': user_data.get('ip', ''), 'status': 'online'}
+            if previous is None:
+                fields['unread_count'] = unread.get(user_id, 0)
+            changed = self.user_model.upsert_user(user_id, **fields)
+            membership_changed |= previous is None or previous['status'] != 'online'
+            current_changed |= changed and user_id == self._current_chat_user_id
+
+        if membership_changed:
             self.userListChanged.emit()
+        if current_changed:
+            self.currentChatUserChanged.emit()
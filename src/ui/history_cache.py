@@ -0,0 +1,265 @@
+"""
+会话历史预取缓存 - 在后台为最可能打开的会话预先加载最新一页消息，切换会话时直接从内存显示
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from PyQt5.QtCore import QRunnable
+from src.config import config
+from src.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# 每条消息除字符串字段外的固定开销估算（对象、属性字典与数值字段）
+_MESSAGE_OVERHEAD = 400
+_TEXT_FIELDS = ('msg_id', 'type', 'from_user_id', 'from_username', 'to_user_id', 'to_username',
+                'content', 'group_id', 'status')
+
+
+def _message_size(message) -> int:
+    """估算一条已解码消息占用的内存字节数"""
+    return _MESSAGE_OVERHEAD + sum(sys.getsizeof(getattr(message, name) or '') for name in _TEXT_FIELDS)
+
+
+def rank_conversations(rows, top_k: int) -> List[str]:
+    """
+    选出最可能被打开的会话：有未读的在前，其次按最后一条消息时间倒序
+
+    Args:
+        rows: 含 conversation_id/unread_count/last_timestamp 的会话字典
+        top_k: 最多返回的会话数
+
+    Returns:
+        会话 ID 列表
+    """
+    ranked = sorted(rows, key=lambda row: (row['unread_count'] <= 0, -(row['last_timestamp'] or 0)))
+    return [row['conversation_id'] for row in ranked[:top_k]]
+
+
+class _PrefetchTask(QRunnable):
+    """在线程池中执行预取"""
+
+    def __init__(self, cache: "HistoryCache"):
+        super().__init__()
+        self.cache = cache
+
+    def run(self):
+        self.cache._run_prefetch()
+
+
+class HistoryCache:
+    """
+    会话最新一页消息的 LRU 缓存（按估算字节数限制总量）
+
+    每个条目是某会话最新的至多 window_size 条消息（从旧到新）。缓存在内存中记录
+    每个会话已知的最后一条消息游标（来自 record、put 与后台查询，只前进不后退），
+    get 只与该游标核对，不访问数据库，可在 UI 线程调用。
+    绕过 record 写入的消息（例如历史同步补写）由 validate 在工作线程中与
+    conversation_state 核对发现，调用方据此重新加载。
+    新消息提交后通过 record 追加到已缓存的窗口；warm 在线程池中预取指定会话。
+    线程安全。
+    """
+
+    def __init__(self, db_manager, max_bytes: int = None, window_size: int = None, thread_pool=None):
+        """
+        初始化缓存
+
+        Args:
+            db_manager: 数据库管理器
+            max_bytes: 内存上限（估算字节数），默认 config.HISTORY_CACHE_MAX_BYTES
+            window_size: 每个会话缓存的消息数，默认 config.MESSAGE_WINDOW_SIZE
+            thread_pool: 预取使用的线程池，None 时在调用线程同步预取
+        """
+        self.db_manager = db_manager
+        self.max_bytes = max_bytes or config.HISTORY_CACHE_MAX_BYTES
+        self.window_size = window_size or config.MESSAGE_WINDOW_SIZE
+        self.thread_pool = thread_pool
+
+        # 会话 ID -> (消息列表, 估算字节数)，按最近使用排序
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._last_cursors: Dict[str, tuple] = {}  # 会话 ID -> 已知最后一条消息的 (timestamp, msg_id)
+        self._lock = threading.Lock()
+        self._warm_ids: Optional[List[str]] = None  # 等待预取的会话（只保留最新一次请求）
+        self._warming = False
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+
+    def get(self, conversation_id) -> Optional[list]:
+        """
+        读取会话的最新一页消息（只读内存，不查询数据库）
+
+        Args:
+            conversation_id: 会话 ID
+
+        Returns:
+            消息列表（从旧到新，副本），未命中返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None and not self._is_current(conversation_id, entry[0]):
+                self._drop(conversation_id)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, conversation_id, messages):
+        """
+        缓存会话的最新一页消息
+
+        Args:
+            conversation_id: 会话 ID
+            messages: 最新的消息（从旧到新），超出 window_size 时只保留最新的部分
+        """
+        messages = list(messages)[-self.window_size:]
+        with self._lock:
+            if messages:
+                self._observe(conversation_id, messages[-1].cursor)
+            self._store(conversation_id, messages)
+
+    def record(self, message):
+        """
+        新消息提交后追加到已缓存的会话窗口（未缓存的会话忽略）
+
+        Args:
+            message: 已写入数据库的消息
+        """
+        conversation_id = message.conversation_id
+        with self._lock:
+            self._observe(conversation_id, message.cursor)
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return
+            messages = entry[0]
+            if messages and messages[-1].cursor >= message.cursor:
+                return  # 已在窗口中或早于窗口末尾，交由读取时的核对处理
+            self._store(conversation_id, (messages + [message])[-self.window_size:])
+
+    def validate(self, conversation_id, last_cursor) -> bool:
+        """
+        与数据库核对某会话已显示的最新一页是否仍是最新（查询数据库，须在工作线程调用）
+
+        Args:
+            conversation_id: 会话 ID
+            last_cursor: 已显示页最后一条消息的游标，空页为 None
+
+        Returns:
+            仍是最新返回 True；否则丢弃该会话的缓存条目并返回 False
+        """
+        db_cursor = self.db_manager.get_last_message_cursor(conversation_id)
+        with self._lock:
+            if db_cursor is not None:
+                self._observe(conversation_id, db_cursor)
+            if self._last_cursors.get(conversation_id) == last_cursor:
+                return True
+            if conversation_id in self._entries:
+                self._drop(conversation_id)
+            return False
+
+    def invalidate(self, conversation_id=None):
+        """丢弃一个会话的缓存（含已知的最后一条消息游标），conversation_id 为 None 时清空全部"""
+        with self._lock:
+            if conversation_id is None:
+                self._entries.clear()
+                self._last_cursors.clear()
+                self._bytes = 0
+            else:
+                self._last_cursors.pop(conversation_id, None)
+                if conversation_id in self._entries:
+                    self._drop(conversation_id)
+
+    def warm(self, conversation_ids):
+        """
+        预取若干会话的最新一页消息（已缓存且与数据库一致的跳过）
+
+        Args:
+            conversation_ids: 会话 ID 列表，按优先级排序
+        """
+        with self._lock:
+            self._warm_ids = list(conversation_ids)
+            if self._warming:
+                return  # 进行中的预取结束后处理最新一次请求
+            self._warming = True
+        if self.thread_pool is None:
+            self._run_prefetch()
+        else:
+            self.thread_pool.start(_PrefetchTask(self))
+
+    def _run_prefetch(self):
+        while True:
+            with self._lock:
+                conversation_ids, self._warm_ids = self._warm_ids, None
+                if conversation_ids is None:
+                    self._warming = False
+                    return
+            for conversation_id in conversation_ids:
+                try:
+                    self._prefetch_one(conversation_id)
+                except Exception as e:
+                    logger.error(f"预取会话历史失败 ({conversation_id}): {e}")
+
+    def _prefetch_one(self, conversation_id):
+        db_cursor = self.db_manager.get_last_message_cursor(conversation_id)
+        with self._lock:
+            if db_cursor is not None:
+                self._observe(conversation_id, db_cursor)
+            entry = self._entries.get(conversation_id)
+            if entry is not None and self._is_current(conversation_id, entry[0]):
+                return
+        messages = self.db_manager.get_messages_before(conversation_id, None, self.window_size)
+        with self._lock:
+            self.prefetched += 1
+            if messages:
+                self._observe(conversation_id, messages[-1].cursor)
+            self._store(conversation_id, messages)
+
+    # --- 以下方法须持有 _lock ---
+
+    def _observe(self, conversation_id, cursor):
+        """记录会话最后一条消息的游标（只前进，过期的观察结果忽略）"""
+        known = self._last_cursors.get(conversation_id)
+        if known is None or cursor > known:
+            self._last_cursors[conversation_id] = cursor
+
+    def _is_current(self, conversation_id, messages) -> bool:
+        return (messages[-1].cursor if messages else None) == self._last_cursors.get(conversation_id)
+
+    def _store(self, conversation_id, messages):
+        if conversation_id in self._entries:
+            self._drop(conversation_id)
+        size = sum(_message_size(m) for m in messages)
+        if size > self.max_bytes:
+            return
+        self._entries[conversation_id] = (messages, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, conversation_id):
+        _, size = self._entries.pop(conversation_id)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, float]:
+        """返回缓存统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'evictions': self.evictions,
+                'prefetched': self.prefetched
+            }
@@ -3,5 +3,8 @@ UI 层数据模型
 用于 QML 与 Python 之间的数据绑定
 """
 from .message_list_model import MessageListModel
+from .user_list_model import UserListModel
+from .group_list_model import GroupListModel
+from .conversation_list_model import ConversationListModel
 
-__all__ = ['MessageListModel']
+__all__ = ['MessageListModel', 'UserListModel', 'GroupListModel', 'ConversationListModel']
@@ -0,0 +1,93 @@
+"""最近会话列表数据模型
+私聊与群聊合并的会话列表，数据来自 conversation_state，按会话 ID 增量更新
+"""
+from PyQt5.QtCore import Qt
+from src.ui.models.keyed_list_model import KeyedListModel
+
+
+class ConversationListModel(KeyedListModel):
+    """
+    最近会话模型（按最后一条消息时间倒序）
+
+    每行对应 get_recent_conversations 返回的一个会话；新消息只重新读取并更新该会话所在行
+    （排序位置变化时移动到顶部），不重建整个列表。
+    """
+
+    ConversationIdRole = Qt.UserRole + 1
+    KindRole = Qt.UserRole + 2
+    PeerIdRole = Qt.UserRole + 3
+    TitleRole = Qt.UserRole + 4
+    SnippetRole = Qt.UserRole + 5
+    LastTimestampRole = Qt.UserRole + 6
+    UnreadCountRole = Qt.UserRole + 7
+    IsCurrentRole = Qt.UserRole + 8
+
+    KEY = 'conversation_id'
+    _FIELD_ROLES = {
+        'conversation_id': ConversationIdRole,
+        'kind': KindRole,
+        'peer_id': PeerIdRole,
+        'title': TitleRole,
+        'snippet': SnippetRole,
+        'last_timestamp': LastTimestampRole,
+        'unread_count': UnreadCountRole,
+        'is_current': IsCurrentRole,
+    }
+    DEFAULTS = {'kind': 'user', 'peer_id': '', 'title': '', 'snippet': '', 'last_timestamp': 0,
+                'unread_count': 0, 'is_current': False}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._current_conversation_id = None
+
+    def _sort_key(self, row):
+        return (-row['last_timestamp'], row['conversation_id'])
+
+    def _fields(self, row):
+        return {
+            'kind': row['kind'],
+            'peer_id': row['peer_id'] or '',
+            'title': row['title'] or '',
+            'snippet': ' '.join((row['snippet'] or '').split()),
+            'last_timestamp': row['last_timestamp'] or 0,
+            'unread_count': row['unread_count'] or 0,
+        }
+
+    def reset_conversations(self, rows):
+        """
+        整体替换会话列表（启动时加载）
+
+        Args:
+            rows: get_recent_conversations 返回的会话字典列表
+        """
+        self.reset_rows(dict(self._fields(row), conversation_id=row['conversation_id'],
+                             is_current=row['conversation_id'] == self._current_conversation_id)
+                        for row in rows)
+
+    def update_conversations(self, rows):
+        """
+        按数据库中的最新状态插入或更新若干会话
+
+        Args:
+            rows: get_recent_conversations 返回的会话字典列表
+        """
+        for row in rows:
+            fields = self._fields(row)
+            if not self.contains(row['conversation_id']):
+                fields['is_current'] = row['conversation_id'] == self._current_conversation_id
+            self.upsert(row['conversation_id'], **fields)
+
+    def set_unread(self, conversation_id, count: int) -> bool:
+        """更新会话的未读计数"""
+        if not self.contains(conversation_id):
+            return False
+        return self.upsert(conversation_id, unread_count=count)
+
+    def set_current(self, conversation_id):
+        """设置当前会话（只通知新旧两行）"""
+        previous, self._current_conversation_id = self._current_conversation_id, conversation_id
+        if previous == conversation_id:
+            return
+        for cid, value in ((previous, False), (conversation_id, True)):
+            if self.contains(cid):
+                self.upsert(cid, is_current=value)
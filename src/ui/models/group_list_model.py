@@ -0,0 +1,127 @@
+"""群组列表数据模型
+用于 QML 联系人列表中的群组部分，按群组 ID 增量更新
+"""
+from PyQt5.QtCore import Qt
+from src.ui.models.keyed_list_model import KeyedListModel
+
+# 最后一条消息预览的最大字符数
+PREVIEW_LENGTH = 40
+
+
+class GroupListModel(KeyedListModel):
+    """
+    群组列表模型（按最近活动时间倒序）
+
+    每行包含成员数、未读计数与最后一条消息预览；一条新群消息只更新该群所在行
+    （排序位置变化时先移动到顶部），不重建整个列表。
+    """
+
+    GroupIdRole = Qt.UserRole + 1
+    GroupNameRole = Qt.UserRole + 2
+    MemberCountRole = Qt.UserRole + 3
+    IsCurrentRole = Qt.UserRole + 4
+    UnreadCountRole = Qt.UserRole + 5
+    LastMessageRole = Qt.UserRole + 6
+    LastTimestampRole = Qt.UserRole + 7
+
+    KEY = 'group_id'
+    _FIELD_ROLES = {
+        'group_id': GroupIdRole,
+        'group_name': GroupNameRole,
+        'member_count': MemberCountRole,
+        'is_current': IsCurrentRole,
+        'unread_count': UnreadCountRole,
+        'last_message': LastMessageRole,
+        'last_timestamp': LastTimestampRole,
+    }
+    DEFAULTS = {'group_name': '', 'member_count': 0, 'is_current': False, 'unread_count': 0,
+                'last_message': '', 'last_timestamp': 0, 'updated_at': 0}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._current_group_id = None
+
+    def _sort_key(self, row):
+        # 最近有消息（或最近创建/更新）的群组在前
+        return (-(row['last_timestamp'] or row['updated_at'] or 0), row['group_name'], row['group_id'])
+
+    @staticmethod
+    def _preview(from_username, content):
+        text = f"{from_username}: {content}" if from_username else (content or '')
+        text = ' '.join(text.split())
+        return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1] + '…'
+
+    def reset_groups(self, rows):
+        """
+        整体替换群组列表（启动时加载）
+
+        Args:
+            rows: get_group_summaries 返回的群组字典列表
+        """
+        self.reset_rows({
+            'group_id': row['group_id'],
+            'group_name': row['group_name'],
+            'member_count': row['member_count'],
+            'updated_at': row['updated_at'] or 0,
+            'unread_count': row['unread_count'],
+            'last_message': self._preview(row['last_from_username'], row['last_content'])
+            if row['last_timestamp'] is not None else '',
+            'last_timestamp': row['last_timestamp'] or 0,
+            'is_current': row['group_id'] == self._current_group_id,
+        } for row in rows)
+
+    def sync_groups(self, groups):
+        """
+        按当前加入的群组对齐列表（群组加入/退出、改名、成员变化）
+
+        Args:
+            groups: Group 对象列表
+        """
+        present = set()
+        for group in groups:
+            present.add(group.group_id)
+            fields = {'group_name': group.group_name, 'member_count': len(group.member_ids)}
+            if not self.contains(group.group_id):
+                fields.update(updated_at=group.updated_at, is_current=group.group_id == self._current_group_id)
+            self.upsert(group.group_id, **fields)
+        for group_id in self.keys():
+            if group_id not in present:
+                self.remove(group_id)
+
+    def record_message(self, message, unread: int = 0) -> bool:
+        """
+        记录群消息：更新预览与时间，并累加未读计数
+
+        Args:
+            message: 群消息（Message），多条合并时传最新的一条
+            unread: 计入未读的消息条数
+
+        Returns:
+            群组是否在列表中
+        """
+        row = self.get(message.group_id)
+        if row is None:
+            return False
+        fields = {}
+        if message.timestamp >= row['last_timestamp']:
+            fields['last_message'] = self._preview(message.from_username, message.content)
+            fields['last_timestamp'] = message.timestamp
+        if unread:
+            fields['unread_count'] = row['unread_count'] + unread
+        self.upsert(message.group_id, **fields)
+        return True
+
+    def set_unread(self, group_id, count: int) -> bool:
+        """更新群组的未读计数"""
+        if not self.contains(group_id):
+            return False
+        return self.upsert(group_id, unread_count=count)
+
+    def set_current(self, group_id):
+        """设置当前群聊（只通知新旧两行）"""
+        previous, self._current_group_id = self._current_group_id, group_id
+        if previous == group_id:
+            return
+        for gid, value in ((previous, False), (group_id, True)):
+            if self.contains(gid):
+                self.upsert(gid, is_current=value)
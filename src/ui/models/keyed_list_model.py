@@ -0,0 +1,135 @@
+"""按主键增量更新的有序列表模型基类
+"""
+from bisect import bisect_left
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QVariant
+
+
+class KeyedListModel(QAbstractListModel):
+    """
+    有序、按主键索引的列表模型
+
+    每行是一个字典，维护 主键 -> 行号 的索引并按 _sort_key 保持有序；
+    插入、删除、排序位置变化和字段变化分别只对受影响的行发出
+    rowsInserted/rowsRemoved/rowsMoved/dataChanged，值未变化的更新不发出通知。
+
+    子类需定义 KEY（主键字段）、_FIELD_ROLES（字段 -> 角色）、DEFAULTS（新行默认值）
+    并实现 _sort_key。
+    """
+
+    KEY = ''
+    _FIELD_ROLES = {}
+    DEFAULTS = {}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._role_fields = {role: name for name, role in self._FIELD_ROLES.items()}
+        self._rows = []  # 行字典列表（按 _sort_key 有序）
+        self._row_of = {}  # 主键 -> 行号
+
+    def _sort_key(self, row):
+        raise NotImplementedError
+
+    def _reindex(self, start=0):
+        for i in range(start, len(self._rows)):
+            self._row_of[self._rows[i][self.KEY]] = i
+
+    def _sorted_position(self, row):
+        return bisect_left([self._sort_key(r) for r in self._rows], self._sort_key(row))
+
+    def reset_rows(self, rows):
+        """整体替换全部行（启动时加载）"""
+        self.beginResetModel()
+        self._rows = sorted((dict(self.DEFAULTS, **row) for row in rows), key=self._sort_key)
+        self._row_of = {}
+        self._reindex()
+        self.endResetModel()
+
+    def contains(self, key) -> bool:
+        return key in self._row_of
+
+    def keys(self):
+        return list(self._row_of)
+
+    def get(self, key):
+        """返回行字典副本，不存在返回 None"""
+        row = self._row_of.get(key)
+        return dict(self._rows[row]) if row is not None else None
+
+    def upsert(self, key, **fields) -> bool:
+        """
+        插入或更新一行
+
+        Args:
+            key: 主键
+            **fields: 需要更新的字段
+
+        Returns:
+            是否有变化（插入或任一字段值改变）
+        """
+        row = self._row_of.get(key)
+        if row is None:
+            data = dict(self.DEFAULTS, **fields)
+            data[self.KEY] = key
+            position = self._sorted_position(data)
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, data)
+            self._reindex(position)
+            self.endInsertRows()
+            return True
+
+        data = self._rows[row]
+        changed = [name for name, value in fields.items() if data.get(name) != value]
+        if not changed:
+            return False
+
+        old_key = self._sort_key(data)
+        data.update(fields)
+        if self._sort_key(data) != old_key:
+            self._move_to_sorted_position(row)
+            row = self._row_of[key]
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [self._FIELD_ROLES[name] for name in changed if name in self._FIELD_ROLES])
+        return True
+
+    def _move_to_sorted_position(self, row):
+        """排序键变化后把该行移动到有序位置"""
+        data = self._rows.pop(row)
+        position = self._sorted_position(data)
+        self._rows.insert(row, data)
+        if position == row:
+            return
+
+        # beginMoveRows 的目标行号以移动前的列表计算
+        destination = position + 1 if position > row else position
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        self._rows.insert(position, self._rows.pop(row))
+        self._reindex(min(row, position))
+        self.endMoveRows()
+
+    def remove(self, key) -> bool:
+        """移除一行，返回是否存在"""
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self._reindex(row)
+        self.endRemoveRows()
+        return True
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return QVariant()
+        name = self._role_fields.get(role)
+        if name is None:
+            return QVariant()
+        return self._rows[index.row()].get(name)
+
+    def roleNames(self):
+        return {role: name.encode() for name, role in self._FIELD_ROLES.items()}
@@ -1,15 +1,54 @@
-"""消息列表数据模型（基于数据库查询）
+"""消息列表数据模型（基于内存窗口）
 用于 QML ListView 高效渲染消息列表
 """
-from PyQt5.QtCore import QAbstractListModel, Qt, QVariant
+from PyQt5.QtCore import (
+    QAbstractListModel, QModelIndex, QObject, QRunnable, Qt, QVariant, pyqtProperty, pyqtSignal, pyqtSlot
+)
+from src.config import config
+from src.core.models import group_conversation_id, private_conversation_id
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class _LoaderSignals(QObject):
+    """加载结果信号（对象属于 UI 线程，工作线程发射时以队列方式投递）"""
+    loaded = pyqtSignal(int, str, object)  # generation, kind, messages
+
+
+class _HistoryLoader(QRunnable):
+    """在线程池中执行一次分页查询"""
+
+    def __init__(self, query, generation: int, kind: str, signals: _LoaderSignals):
+        super().__init__()
+        self.query = query
+        self.generation = generation
+        self.kind = kind
+        self.signals = signals
+
+    def run(self):
+        self.signals.loaded.emit(self.generation, self.kind, self.query())
+
+
 class MessageListModel(QAbstractListModel):
-    """消息列表模型，直接从数据库查询数据"""
-    
+    """
+    消息列表模型
+
+    切换会话时从数据库加载一次当前会话最近的一页消息，每条消息压缩为一个元组行；
+    rowCount/data 直接从窗口取值，不再查询数据库。新消息通过 append_messages
+    以行插入通知视图，状态变化通过 update_message 以 dataChanged 通知，
+    视图无需重建已有的委托。
+
+    向上滚动时按 (timestamp, msg_id) 游标分页加载更早的消息并插入到顶部；
+    窗口最多保留 max_rows 行，超出时淘汰离视口最远一端的行，
+    之后再滚动回去时按游标重新加载。
+
+    传入 thread_pool 时查询在线程池中执行，结果经队列信号回到 UI 线程；
+    每次切换会话递增代号，属于已离开会话的结果直接丢弃。
+    传入 history_cache 时切换会话先查缓存，命中则同步显示，不访问数据库；
+    随后在线程池中与数据库核对，缓存已过期时换上重新加载的最新一页。
+    """
+
     # 定义 Roles（数据角色）
     ContentRole = Qt.UserRole + 1
     FromUserIdRole = Qt.UserRole + 2
@@ -17,15 +56,63 @@ class MessageListModel(QAbstractListModel):
     TimestampRole = Qt.UserRole + 4
     IsMineRole = Qt.UserRole + 5
     TypeRole = Qt.UserRole + 6
+    StatusRole = Qt.UserRole + 7
+    IsReadRole = Qt.UserRole + 8
+
+    # 窗口行元组中各角色对应的位置
+    _ROLE_COLUMNS = {
+        ContentRole: 0,
+        FromUserIdRole: 1,
+        FromUsernameRole: 2,
+        TimestampRole: 3,
+        IsMineRole: 4,
+        TypeRole: 5,
+        StatusRole: 6,
+        IsReadRole: 7,
+    }
+
+    # update_message 可更新的字段 -> 角色
+    _UPDATABLE_ROLES = {
+        'status': StatusRole,
+        'is_read': IsReadRole,
+    }
+
+    # 窗口边界变化（是否还有更早/更新的消息未加载）
+    windowChanged = pyqtSignal()
+    loadingChanged = pyqtSignal()
 
-    def __init__(self, db_manager=None, parent=None):
+    def __init__(self, db_manager=None, parent=None, window_size: int = None, max_rows: int = None,
+                 thread_pool=None, history_cache=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.thread_pool = thread_pool  # None 时在调用线程同步加载
+        self.history_cache = history_cache  # 最新一页消息的预取缓存（HistoryCache）
+        self.window_size = window_size or config.MESSAGE_WINDOW_SIZE
+        self.max_rows = max(max_rows or config.MESSAGE_WINDOW_MAX_ROWS, self.window_size)
         self._current_user_id = ""
         self._current_chat_user_id = None  # 当前聊天对象 ID（私聊）
         self._current_chat_group_id = None  # 当前群聊 ID
         self._chat_type = 'user'  # 'user' 或 'group'
 
+        # 当前会话的消息窗口（从旧到新），_ids 与 _rows 一一对应
+        self._rows = []
+        self._ids = []
+        # msg_id -> 绝对序号，行号 = 序号 - _base；顶部插入/淘汰只需移动 _base
+        self._seq_of = {}
+        self._base = 0
+        self._has_older = False  # 窗口之前还有更早的消息
+        self._has_newer = False  # 窗口之后还有更新的消息（底部行被淘汰过）
+        self._older_requested = False
+
+        # 异步加载状态
+        self._generation = 0  # 会话代号，切换会话/刷新时递增
+        self._pending = set()  # 进行中的加载类型：reset/older/newer/validate
+        self._loading = False
+        self._deferred = []  # 首屏加载期间到达的新消息，加载完成后追加
+        self.stale_results = 0  # 被丢弃的过期结果数
+        self._signals = _LoaderSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+
     def set_current_user_id(self, user_id):
         """设置当前用户 ID，用于判断消息是否为我的"""
         self._current_user_id = user_id
@@ -38,72 +125,332 @@ class MessageListModel(QAbstractListModel):
         self.refresh()
 
     def refresh(self):
-        """刷新数据（从数据库重新加载）"""
+        """刷新数据（从数据库重新加载最新一页消息）"""
+        self._generation += 1
+        self._pending.clear()
+        self._deferred = []
+        self._older_requested = False
+        cached = self._cached_page()
+        if cached is not None:
+            self._reset_rows(cached)
+            self._set_loading(False)
+            self._validate_cached(cached[-1].cursor if cached else None)
+            return
+        if self.thread_pool is not None:
+            # 先清空旧会话的内容，结果到达后再填充
+            self._reset_rows([])
+        self._request('reset')
+
+    def _reset_rows(self, messages):
         self.beginResetModel()
+        self._rows, self._ids, self._seq_of, self._base = [], [], {}, 0
+        self._push_back(messages)
+        self._has_older = len(messages) >= self.window_size
+        self._has_newer = False
         self.endResetModel()
+        self.windowChanged.emit()
 
-    def rowCount(self, parent=None):
-        """返回消息数量（从数据库查询）"""
-        if not self.db_manager:
-            return 0
-        
+    def _request(self, kind: str, cursor=None):
+        """发起一次分页加载（reset: 最新一页 / older: 更早一页 / newer: 更新一页）"""
+        conversation_id = self._conversation_id()
+        before = kind != 'newer'
+        if self.thread_pool is None:
+            self._apply_page(kind, self._query_page(conversation_id, before, cursor))
+            return
+        if kind in self._pending:
+            return
+
+        self._pending.add(kind)
+        self._set_loading(True)
+        self.thread_pool.start(_HistoryLoader(
+            lambda: self._query_page(conversation_id, before, cursor),
+            self._generation, kind, self._signals
+        ))
+
+    def _validate_cached(self, last_cursor):
+        """
+        在线程池中核对从缓存显示的最新一页（validate: 缓存仍有效时结果为 None，否则为重新加载的一页）
+
+        核对期间到达的新消息先暂存，结果回到 UI 线程后再追加，不显示加载状态。
+        """
+        conversation_id = self._conversation_id()
+
+        def query():
+            if self.history_cache.validate(conversation_id, last_cursor):
+                return None
+            return self._query_page(conversation_id, True)
+
+        if self.thread_pool is None:
+            messages = query()
+            if messages is not None:
+                self._apply_page('reset', messages)
+            return
+        self._pending.add('validate')
+        self.thread_pool.start(_HistoryLoader(query, self._generation, 'validate', self._signals))
+
+    def _on_loaded(self, generation: int, kind: str, messages):
+        """加载结果回到 UI 线程"""
+        if generation != self._generation:
+            self.stale_results += 1
+            return
+        self._pending.discard(kind)
+        if kind == 'validate':
+            if messages is not None:
+                self._apply_page('reset', messages)
+        else:
+            self._apply_page(kind, messages)
+        if kind in ('reset', 'validate') and self._deferred:
+            deferred, self._deferred = self._deferred, []
+            self.append_messages(deferred)
+        self._set_loading(bool(self._pending - {'validate'}))
+
+    def _cached_page(self):
+        conversation_id = self._conversation_id()
+        if self.history_cache is None or not conversation_id:
+            return None
+        return self.history_cache.get(conversation_id)
+
+    def _apply_page(self, kind: str, messages):
+        if kind == 'reset':
+            self._reset_rows(messages)
+            if self.history_cache is not None and self._conversation_id():
+                self.history_cache.put(self._conversation_id(), messages)
+        elif kind == 'older':
+            self._prepend_page(messages)
+        else:
+            self._append_page(messages)
+
+    def _set_loading(self, loading: bool):
+        if loading != self._loading:
+            self._loading = loading
+            self.loadingChanged.emit()
+
+    @pyqtProperty(bool, notify=loadingChanged)
+    def loading(self):
+        """是否有进行中的历史加载"""
+        return self._loading
+
+    def _conversation_id(self):
+        """当前会话 ID，无活跃会话时返回 None"""
+        if self._chat_type == 'group' and self._current_chat_group_id:
+            return group_conversation_id(self._current_chat_group_id)
+        if self._chat_type == 'user' and self._current_chat_user_id:
+            return private_conversation_id(self._current_user_id, self._current_chat_user_id)
+        return None
+
+    def _query_page(self, conversation_id, before: bool, cursor=None):
+        """按游标查询一页消息（从旧到新），失败或无会话时返回空列表"""
+        if not self.db_manager or not conversation_id:
+            return []
         try:
-            if self._chat_type == 'group' and self._current_chat_group_id:
-                messages = self.db_manager.get_group_messages(self._current_chat_group_id)
-                return len(messages)
-            elif self._chat_type == 'user' and self._current_chat_user_id:
-                messages = self.db_manager.get_messages(
-                    self._current_user_id, 
-                    self._current_chat_user_id
-                )
-                return len(messages)
-            return 0
+            if before:
+                return self.db_manager.get_messages_before(conversation_id, cursor, self.window_size)
+            return self.db_manager.get_messages_after(conversation_id, cursor, self.window_size)
         except Exception as e:
-            logger.error(f"查询消息数量失败: {e}")
+            logger.error(f"加载消息窗口失败: {e}")
+            return []
+
+    def _cursor_at(self, row):
+        return (self._rows[row][self._ROLE_COLUMNS[self.TimestampRole]], self._ids[row])
+
+    # --- 窗口增删（调用方负责 begin/end 通知） ---
+
+    def _push_back(self, messages):
+        seq = self._base + len(self._rows)
+        for msg in messages:
+            self._rows.append(self._to_row(msg))
+            self._ids.append(msg.msg_id)
+            self._seq_of[msg.msg_id] = seq
+            seq += 1
+
+    def _push_front(self, messages):
+        self._base -= len(messages)
+        for offset, msg in enumerate(messages):
+            self._seq_of[msg.msg_id] = self._base + offset
+        self._rows[:0] = [self._to_row(msg) for msg in messages]
+        self._ids[:0] = [msg.msg_id for msg in messages]
+
+    def _evict(self, from_top: bool):
+        """窗口超出 max_rows 时淘汰一端的行"""
+        excess = len(self._rows) - self.max_rows
+        if excess <= 0:
+            return
+
+        if from_top:
+            self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+            evicted = self._ids[:excess]
+            del self._rows[:excess], self._ids[:excess]
+            self._base += excess
+            self._has_older = True
+        else:
+            first = len(self._rows) - excess
+            self.beginRemoveRows(QModelIndex(), first, len(self._rows) - 1)
+            evicted = self._ids[first:]
+            del self._rows[first:], self._ids[first:]
+            self._has_newer = True
+        for msg_id in evicted:
+            del self._seq_of[msg_id]
+        self.endRemoveRows()
+
+    # --- 增量更新 ---
+
+    def append_messages(self, messages) -> int:
+        """
+        在窗口末尾追加新消息（只通知新增的行）
+
+        Args:
+            messages: 新消息（从旧到新），不属于当前会话或已在窗口中的消息会被跳过
+
+        Returns:
+            实际追加的行数；窗口底部行已被淘汰时不追加（滚动回底部时从数据库加载）
+        """
+        conversation_id = self._conversation_id()
+        messages = [msg for msg in messages if msg.conversation_id == conversation_id]
+        if 'reset' in self._pending or 'validate' in self._pending:
+            self._deferred.extend(messages)
+            return 0
+        if self._has_newer:
+            return 0
+
+        new = []
+        seen = set()
+        for msg in messages:
+            if msg.msg_id not in self._seq_of and msg.msg_id not in seen:
+                seen.add(msg.msg_id)
+                new.append(msg)
+        if not new:
+            return 0
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        self._push_back(new)
+        self.endInsertRows()
+        self._evict(from_top=True)
+        return len(new)
+
+    def update_message(self, msg_id: str, **changes) -> bool:
+        """
+        更新窗口中某条消息的状态（发送状态、已读）
+
+        Args:
+            msg_id: 消息 ID
+            **changes: status=... / is_read=...
+
+        Returns:
+            消息是否在窗口中
+        """
+        seq = self._seq_of.get(msg_id)
+        if seq is None:
+            return False
+        row = seq - self._base
+
+        values = list(self._rows[row])
+        roles = []
+        for name, value in changes.items():
+            role = self._UPDATABLE_ROLES[name]
+            values[self._ROLE_COLUMNS[role]] = value
+            roles.append(role)
+        self._rows[row] = tuple(values)
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, roles)
+        return True
+
+    # --- 分页加载 ---
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """
+        是否可以加载更早的消息
+
+        视图会在列表末尾（最新消息处）自动询问 canFetchMore，而历史需要向上加载，
+        因此只在 QML 滚动到顶部调用 fetchOlder 后返回 True。
+        """
+        return (not parent.isValid() and self._has_older and self._older_requested
+                and 'older' not in self._pending)
+
+    def fetchMore(self, parent=QModelIndex()):
+        """加载更早的一页消息并插入到顶部"""
+        if parent.isValid() or not self._rows:
+            return
+        self._older_requested = False
+        self._request('older', self._cursor_at(0))
+
+    def _prepend_page(self, messages):
+        if not self._rows:
+            return
+        self._has_older = len(messages) >= self.window_size
+        if messages:
+            self.beginInsertRows(QModelIndex(), 0, len(messages) - 1)
+            self._push_front(messages)
+            self.endInsertRows()
+            self._evict(from_top=False)
+        self.windowChanged.emit()
+
+    @pyqtSlot()
+    def fetchOlder(self):
+        """QML 滚动到顶部时调用：加载更早的一页消息"""
+        self._older_requested = True
+        if self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+        else:
+            self._older_requested = False
+
+    @pyqtSlot()
+    def fetchNewer(self):
+        """QML 滚动到底部时调用：重新加载被淘汰的更新消息"""
+        if not self._has_newer or not self._rows:
+            return
+        self._request('newer', self._cursor_at(len(self._rows) - 1))
+
+    def _append_page(self, messages):
+        if not self._rows:
+            return
+        self._has_newer = len(messages) >= self.window_size
+        if messages:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(messages) - 1)
+            self._push_back(messages)
+            self.endInsertRows()
+            self._evict(from_top=True)
+        self.windowChanged.emit()
+
+    @pyqtProperty(bool, notify=windowChanged)
+    def hasOlder(self):
+        return self._has_older
+
+    @pyqtProperty(bool, notify=windowChanged)
+    def hasNewer(self):
+        return self._has_newer
+
+    def _to_row(self, msg):
+        """消息对象 -> 窗口行（顺序与 _ROLE_COLUMNS 一致）"""
+        return (
+            msg.content,
+            msg.from_user_id,
+            msg.from_username,
+            msg.timestamp,
+            str(msg.from_user_id) == str(self._current_user_id),
+            msg.type,
+            msg.status,
+            msg.is_read,
+        )
+
+    def rowCount(self, parent=QModelIndex()):
+        """返回窗口中的消息数量"""
+        if parent.isValid():
             return 0
+        return len(self._rows)
 
     def data(self, index, role):
-        """根据索引和角色返回数据（从数据库查询）"""
-        if not index.isValid() or not self.db_manager:
+        """根据索引和角色返回窗口中的数据"""
+        if not index.isValid():
             return QVariant()
-        
-        try:
-            # 从数据库获取消息列表
-            if self._chat_type == 'group' and self._current_chat_group_id:
-                messages = self.db_manager.get_group_messages(self._current_chat_group_id)
-            elif self._chat_type == 'user' and self._current_chat_user_id:
-                messages = self.db_manager.get_messages(
-                    self._current_user_id,
-                    self._current_chat_user_id
-                )
-            else:
-                return QVariant()
-            
-            # 检查索引范围
-            if index.row() >= len(messages):
-                return QVariant()
-            
-            msg = messages[index.row()]
-            
-            # 根据 role 返回对应数据
-            if role == self.ContentRole:
-                return msg.content
-            elif role == self.FromUserIdRole:
-                return msg.from_user_id
-            elif role == self.FromUsernameRole:
-                return msg.from_username
-            elif role == self.TimestampRole:
-                return msg.timestamp
-            elif role == self.IsMineRole:
-                return str(msg.from_user_id) == str(self._current_user_id)
-            elif role == self.TypeRole:
-                return msg.type
-                
-        except Exception as e:
-            logger.error(f"获取消息数据失败: {e}")
+
+        column = self._ROLE_COLUMNS.get(role)
+        row = index.row()
+        if column is None or row >= len(self._rows):
             return QVariant()
-            
-        return QVariant()
+        return self._rows[row][column]
 
     def roleNames(self):
         """映射 Role 名到 QML 变量名"""
@@ -113,5 +460,7 @@ class MessageListModel(QAbstractListModel):
             self.FromUsernameRole: b"from_username",
             self.TimestampRole: b"timestamp",
             self.IsMineRole: b"is_mine",
-            self.TypeRole: b"msg_type"
+            self.TypeRole: b"msg_type",
+            self.StatusRole: b"status",
+            self.IsReadRole: b"is_read"
         }
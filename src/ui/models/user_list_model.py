@@ -0,0 +1,90 @@
+"""用户列表数据模型
+用于 QML 联系人列表，按用户 ID 增量更新
+"""
+from PyQt5.QtCore import Qt
+from src.ui.models.keyed_list_model import KeyedListModel
+
+
+class UserListModel(KeyedListModel):
+    """
+    用户列表模型（排除自己，在线用户优先、按昵称排序）
+
+    上线/下线、昵称、未读计数与选中状态的变化只通知受影响的行，
+    内容没有变化的心跳不发出任何通知。
+    """
+
+    UserIdRole = Qt.UserRole + 1
+    UsernameRole = Qt.UserRole + 2
+    IpRole = Qt.UserRole + 3
+    StatusRole = Qt.UserRole + 4
+    UnreadCountRole = Qt.UserRole + 5
+    IsCurrentRole = Qt.UserRole + 6
+
+    KEY = 'user_id'
+    # 行字典的键 -> 角色
+    _FIELD_ROLES = {
+        'user_id': UserIdRole,
+        'username': UsernameRole,
+        'ip': IpRole,
+        'status': StatusRole,
+        'unread_count': UnreadCountRole,
+        'is_current': IsCurrentRole,
+    }
+    DEFAULTS = {'username': '', 'ip': '', 'status': 'online', 'unread_count': 0, 'is_current': False}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._current_user_id = None  # 当前聊天对象
+
+    def _sort_key(self, row):
+        return (row['status'] != "online", row['username'], row['user_id'])
+
+    def reset_users(self, rows):
+        """
+        整体替换用户列表（启动时加载）
+
+        Args:
+            rows: get_users_with_unread 返回的用户字典列表
+        """
+        self.reset_rows({
+            'user_id': row['user_id'],
+            'username': row['username'],
+            'ip': row['ip_address'],
+            'status': row['status'],
+            'unread_count': row['unread_count'],
+            'is_current': row['user_id'] == self._current_user_id,
+        } for row in rows)
+
+    def upsert_user(self, user_id, **fields) -> bool:
+        """
+        插入或更新一个用户
+
+        Args:
+            user_id: 用户 ID
+            **fields: username/ip/status/unread_count 中需要更新的字段
+
+        Returns:
+            是否有变化（插入或任一字段值改变）
+        """
+        if not self.contains(user_id):
+            fields.setdefault('is_current', user_id == self._current_user_id)
+        return self.upsert(user_id, **fields)
+
+    def remove_user(self, user_id) -> bool:
+        """移除一个用户，返回是否存在"""
+        return self.remove(user_id)
+
+    def set_unread(self, user_id, count: int) -> bool:
+        """更新用户的未读计数"""
+        if not self.contains(user_id):
+            return False
+        return self.upsert(user_id, unread_count=count)
+
+    def set_current(self, user_id):
+        """设置当前聊天对象（只通知新旧两行）"""
+        previous, self._current_user_id = self._current_user_id, user_id
+        if previous == user_id:
+            return
+        for uid, value in ((previous, False), (user_id, True)):
+            if self.contains(uid):
+                self.upsert(uid, is_current=value)
@@ -9,7 +9,7 @@ Rectangle {
 
     // 定义属性供外部绑定和交互
     property var messageModel    // 消息列表的数据模型（通常来自 Python 后端）
-    property var onlineUsers: [] // 在线用户列表数组
+    property string currentChatUserName: "" // 当前聊天对象的昵称
     property string currentChatUserStatus: "offline" // 当前聊天对象的在线状态
     property var fontAwesomeFamily: "" // 图标字体的名称
     property var onSendMessage: function(text) {} // 发送消息的回调函数
@@ -55,10 +55,7 @@ Rectangle {
                             if (isGroupChat) {
                                 return groupName || "Group Chat"
                             }
-                            // 查找当前正在聊天的用户
-                            for (var i = 0; i < onlineUsers.length; i++)
-                                if (onlineUsers[i].is_current) return onlineUsers[i].username;
-                            return "Select a contact";
+                            return currentChatUserName || "Select a contact";
                         }
                         font.pixelSize: Theme.fontSizeLarge // 使用大号字体
                         font.bold: true                     // 加粗
@@ -168,12 +165,29 @@ Rectangle {
             leftMargin: Theme.spacingXLarge   // 列表左边距
             rightMargin: Theme.spacingXLarge  // 列表右边距
 
-            // 当消息数量改变（发送或接收新消息）时，自动滚动到最下方
-            onCountChanged: {
-                Qt.callLater(function() {
-                    chatList.forceLayout()
-                    chatList.positionViewAtEnd()
-                })
+            // 切换会话或在末尾追加新消息时，自动滚动到最下方；顶部插入更早的消息时保持当前位置
+            Connections {
+                target: messageModel
+                function onModelReset() { chatAreaRoot.scrollToBottom() }
+                function onRowsInserted(parent, first, last) {
+                    if (first > 0 && !messageModel.hasNewer) chatAreaRoot.scrollToBottom()
+                }
+            }
+
+            // 滚动到顶部时加载更早的消息，滚动到底部时重新加载被淘汰的新消息
+            onAtYBeginningChanged: {
+                if (atYBeginning && count > 0 && messageModel.hasOlder) messageModel.fetchOlder()
+            }
+            onAtYEndChanged: {
+                if (atYEnd && messageModel.hasNewer) messageModel.fetchNewer()
+            }
+
+            // 历史加载中显示的进度指示
+            BusyIndicator {
+                parent: chatList
+                anchors.centerIn: parent
+                running: messageModel ? messageModel.loading : false
+                visible: running
             }
 
             // delegate 渲染每一条消息的样式
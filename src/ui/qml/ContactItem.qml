@@ -0,0 +1,131 @@
+import QtQuick 2.15              // 基础组件
+import QtQuick.Controls 2.15     // 按钮、列表等标准控件
+import QtQuick.Layouts 1.15      // 自动布局
+
+// 联系人列表项：群组与私聊用户共用的渲染样式（点击事件由使用方处理）
+ItemDelegate {
+    property string itemType: "user"    // 'group' 或 'user'
+    property string itemId: ""          // 群组 ID 或用户 ID
+    property string name: ""            // 显示名称
+    property string userStatus: ""      // 私聊用户在线状态
+    property int unreadCount: 0         // 未读消息数
+    property int memberCount: 0         // 群组成员数
+    property string preview: ""         // 最后一条消息预览（群组列表与最近会话列表使用）
+    property bool isCurrent: false      // 是否为当前会话
+
+    height: Theme.userItemHeight
+    hoverEnabled: true
+
+    // 每一项的背景样式
+    background: Rectangle {
+        // 如果是当前选中的会话，背景变白；悬停时变浅灰
+        color: isCurrent ? Theme.bgWhite : (parent.hovered ? "#f5f5f5" : Theme.bgTransparent)
+        anchors.fill: parent
+        anchors.margins: Theme.spacingSmall // 留出一点边距
+        radius: Theme.radiusXLarge
+        // 选中项显示特定边框色
+        border.color: isCurrent ? Theme.borderActive : Theme.bgTransparent
+        Behavior on color { ColorAnimation { duration: 150 } }
+    }
+
+    // 每一项的具体内容布局
+    contentItem: RowLayout {
+        spacing: 12
+
+        // 左侧头像区域
+        Rectangle {
+            width: Theme.avatarLarge
+            height: Theme.avatarLarge
+            radius: Theme.radiusLarge
+            // 群组用主色调背景，普通用户用浅色背景
+            color: itemType === 'group' ? Theme.primary : Theme.bgAvatar
+            opacity: itemType === 'group' ? 0.8 : 1.0
+
+            Text {
+                anchors.centerIn: parent
+                text: name.charAt(0) // 显示首字母
+                font.bold: true
+                color: itemType === 'group' ? Theme.textWhite : Theme.textPrimary
+                font.pixelSize: itemType === 'group' ? Theme.fontSizeLarge : Theme.fontSizeNormal
+            }
+
+            // 头像右下角的状态小指示器
+            Rectangle {
+                width: Theme.iconSizeSmall
+                height: Theme.iconSizeSmall
+                radius: Theme.radiusSmall
+                color: {
+                    if (itemType === 'group') {
+                        return "#10b981"  // 群组始终显示绿色指示
+                    }
+                    // 私聊根据 online/offline 切换颜色
+                    return userStatus === "online" ? Theme.online : Theme.offline
+                }
+                border.color: Theme.textWhite
+                border.width: Theme.borderWidthMedium
+                anchors.right: parent.right
+                anchors.bottom: parent.bottom
+
+                Text {
+                    anchors.centerIn: parent
+                    text: itemType === 'group' ? "👥" : ""  // 群组显示群组小图标
+                    font.pixelSize: 8
+                    visible: itemType === 'group'
+                }
+            }
+        }
+
+        // 中间名称和二级信息（状态或成员数）
+        ColumnLayout {
+            Layout.fillWidth: true
+            spacing: 2
+
+            Label {
+                text: name
+                font.bold: true
+                font.pixelSize: Theme.fontSizeNormal
+                // 离线时名称变浅灰（最近会话列表不显示在线状态，userStatus 为空）
+                color: {
+                    if (itemType === 'group' || userStatus === "") {
+                        return Theme.textPrimary
+                    }
+                    return userStatus === "online" ? Theme.textPrimary : Theme.textSecondary
+                }
+            }
+
+            Label {
+                // 有消息预览时显示预览；否则群聊显示成员数，私聊显示在线状态描述
+                text: {
+                    if (preview !== "") {
+                        return preview
+                    }
+                    if (itemType === 'group') {
+                        return memberCount + " members"
+                    }
+                    return userStatus === "online" ? "Active now" : "Offline"
+                }
+                font.pixelSize: Theme.fontSizeMedium
+                color: Theme.textSecondary
+                elide: Text.ElideRight
+                Layout.fillWidth: true
+            }
+        }
+
+        // 右侧未读消息红色气泡（有未读消息时显示）
+        Rectangle {
+            visible: unreadCount > 0
+            width: Theme.iconSizeLarge
+            height: Theme.iconSizeLarge
+            radius: Theme.radiusMedium
+            color: Theme.unreadBadge
+
+            Label {
+                anchors.centerIn: parent
+                text: unreadCount
+                color: Theme.textWhite
+                font.pixelSize: Theme.fontSizeSmall
+                font.bold: true
+            }
+        }
+    }
+}
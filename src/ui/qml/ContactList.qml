@@ -11,8 +11,10 @@ Rectangle {
     border.color: Theme.borderLight     // 边框颜色
 
     // 定义外部可绑定的属性
-    property var onlineUsers: []        // 私聊用户数据列表
-    property var groupList: []           // 群组数据列表
+    property var userModel: null        // 私聊用户列表模型
+    property var groupModel: null        // 群组列表模型（按最近活动排序）
+    property var conversationModel: null // 最近会话模型（私聊与群聊合并，按最后一条消息时间倒序）
+    property bool showRecent: true      // 当前显示最近会话（false 时显示全部群组与联系人）
     property var onUserSelected: function(userId) {}   // 选中用户时的回调
     property var onGroupSelected: function(groupId) {} // 选中群组时的回调
     property var onCreateGroup: function() {}           // 点击创建群组按钮的回调
@@ -103,166 +105,99 @@ Rectangle {
             }
         }
 
-        // 核心组件：统一聊天列表（群组和私聊混合排列）
+        // 列表切换：最近会话 / 全部联系人
+        RowLayout {
+            Layout.fillWidth: true
+            Layout.leftMargin: Theme.spacingLarge
+            Layout.rightMargin: Theme.spacingLarge
+            Layout.bottomMargin: Theme.spacingSmall
+            spacing: Theme.spacingMedium
+            visible: conversationModel !== null
+
+            Repeater {
+                model: [{ label: "Recent", recent: true }, { label: "All", recent: false }]
+                delegate: Label {
+                    text: modelData.label
+                    font.pixelSize: Theme.fontSizeNormal
+                    font.bold: showRecent === modelData.recent
+                    color: showRecent === modelData.recent ? Theme.primary : Theme.textSecondary
+
+                    MouseArea {
+                        anchors.fill: parent
+                        cursorShape: Qt.PointingHandCursor
+                        onClicked: showRecent = modelData.recent
+                    }
+                }
+            }
+        }
+
+        // 最近会话列表：有消息的私聊与群聊按最后一条消息时间倒序排列
         ListView {
-            id: chatListView
+            id: recentListView
             Layout.fillWidth: true
             Layout.fillHeight: true
-            clip: true                  // 裁剪超出边界的内容
+            visible: conversationModel !== null && showRecent
+            clip: true
             spacing: Theme.spacingSmall
 
-            // 动态模型：将群组列表和在线用户列表合并为一个数组
-            model: {
-                var combinedList = []
-                
-                // 1. 将群组数据处理并加入列表
-                for (var i = 0; i < groupList.length; i++) {
-                    combinedList.push({
-                        type: 'group',
-                        id: groupList[i].group_id,
-                        name: groupList[i].group_name,
-                        member_count: groupList[i].member_count,
-                        is_current: groupList[i].is_current
-                    })
-                }
-                
-                // 2. 将私聊用户数据处理并加入列表
-                for (var j = 0; j < onlineUsers.length; j++) {
-                    combinedList.push({
-                        type: 'user',
-                        id: onlineUsers[j].user_id,
-                        name: onlineUsers[j].username,
-                        status: onlineUsers[j].status,
-                        unread_count: onlineUsers[j].unread_count,
-                        is_current: onlineUsers[j].is_current
-                    })
-                }
-                
-                return combinedList
+            // 新消息只更新对应会话行（必要时移到顶部），不重建列表
+            model: conversationModel
+
+            delegate: ContactItem {
+                width: recentListView.width
+                itemType: model.kind
+                itemId: model.peer_id
+                name: model.title !== "" ? model.title : model.peer_id
+                unreadCount: model.unread_count
+                preview: model.snippet
+                isCurrent: model.is_current
+                onClicked: itemType === 'group' ? onGroupSelected(itemId) : onUserSelected(itemId)
             }
+        }
 
-            // 定义每一项的渲染方式
-            delegate: ItemDelegate {
-                width: chatListView.width
-                height: Theme.userItemHeight
-                hoverEnabled: true
+        // 核心组件：统一聊天列表（群组在前，私聊用户在后）
+        ListView {
+            id: chatListView
+            Layout.fillWidth: true
+            Layout.fillHeight: true
+            visible: !recentListView.visible
+            clip: true                  // 裁剪超出边界的内容
+            spacing: Theme.spacingSmall
 
-                // 每一项的背景样式
-                background: Rectangle {
-                    // 如果是当前选中的会话，背景变白；悬停时变浅灰
-                    color: modelData.is_current ? Theme.bgWhite : (parent.hovered ? "#f5f5f5" : Theme.bgTransparent)
-                    anchors.fill: parent
-                    anchors.margins: Theme.spacingSmall // 留出一点边距
-                    radius: Theme.radiusXLarge
-                    // 选中项显示特定边框色
-                    border.color: modelData.is_current ? Theme.borderActive : Theme.bgTransparent
-                    Behavior on color { ColorAnimation { duration: 150 } }
-                }
+            // 私聊用户来自按用户 ID 增量更新的模型，上下线/未读变化只刷新对应行
+            model: userModel
 
-                // 点击逻辑：判断是群聊还是私聊，调用对应回调
-                onClicked: {
-                    if (modelData.type === 'group') {
-                        onGroupSelected(modelData.id)
-                    } else {
-                        onUserSelected(modelData.id)
+            // 群组列表显示在用户列表之前
+            header: Column {
+                width: chatListView.width
+                spacing: Theme.spacingSmall
+                bottomPadding: Theme.spacingSmall
+
+                Repeater {
+                    model: groupModel
+                    delegate: ContactItem {
+                        width: chatListView.width
+                        itemType: 'group'
+                        itemId: model.group_id
+                        name: model.group_name
+                        memberCount: model.member_count
+                        unreadCount: model.unread_count
+                        preview: model.last_message
+                        isCurrent: model.is_current
+                        onClicked: onGroupSelected(itemId)
                     }
                 }
+            }
 
-                // 每一项的具体内容布局
-                contentItem: RowLayout {
-                    spacing: 12
-
-                    // 左侧头像区域
-                    Rectangle {
-                        width: Theme.avatarLarge
-                        height: Theme.avatarLarge
-                        radius: Theme.radiusLarge
-                        // 群组用主色调背景，普通用户用浅色背景
-                        color: modelData.type === 'group' ? Theme.primary : Theme.bgAvatar
-                        opacity: modelData.type === 'group' ? 0.8 : 1.0
-
-                        Text {
-                            anchors.centerIn: parent
-                            text: modelData.name.charAt(0) // 显示首字母
-                            font.bold: true
-                            color: modelData.type === 'group' ? Theme.textWhite : Theme.textPrimary
-                            font.pixelSize: modelData.type === 'group' ? Theme.fontSizeLarge : Theme.fontSizeNormal
-                        }
-
-                        // 头像右下角的状态小指示器
-                        Rectangle {
-                            width: Theme.iconSizeSmall
-                            height: Theme.iconSizeSmall
-                            radius: Theme.radiusSmall
-                            color: {
-                                if (modelData.type === 'group') {
-                                    return "#10b981"  // 群组始终显示绿色指示
-                                }
-                                // 私聊根据 online/offline 切换颜色
-                                return modelData.status === "online" ? Theme.online : Theme.offline
-                            }
-                            border.color: Theme.textWhite
-                            border.width: Theme.borderWidthMedium
-                            anchors.right: parent.right
-                            anchors.bottom: parent.bottom
-
-                            Text {
-                                anchors.centerIn: parent
-                                text: modelData.type === 'group' ? "👥" : ""  // 群组显示群组小图标
-                                font.pixelSize: 8
-                                visible: modelData.type === 'group'
-                            }
-                        }
-                    }
-
-                    // 中间名称和二级信息（状态或成员数）
-                    ColumnLayout {
-                        Layout.fillWidth: true
-                        spacing: 2
-
-                        Label {
-                            text: modelData.name
-                            font.bold: true
-                            font.pixelSize: Theme.fontSizeNormal
-                            // 离线时名称变浅灰
-                            color: {
-                                if (modelData.type === 'group') {
-                                    return Theme.textPrimary
-                                }
-                                return modelData.status === "online" ? Theme.textPrimary : Theme.textSecondary
-                            }
-                        }
-
-                        Label {
-                            // 群聊显示成员数，私聊显示在线状态描述
-                            text: {
-                                if (modelData.type === 'group') {
-                                    return modelData.member_count + " members"
-                                }
-                                return modelData.status === "online" ? "Active now" : "Offline"
-                            }
-                            font.pixelSize: Theme.fontSizeMedium
-                            color: Theme.textSecondary
-                        }
-                    }
-
-                    // 右侧未读消息红色气泡（仅针对有未读消息的私聊显示）
-                    Rectangle {
-                        visible: modelData.type === 'user' && modelData.unread_count > 0
-                        width: Theme.iconSizeLarge
-                        height: Theme.iconSizeLarge
-                        radius: Theme.radiusMedium
-                        color: Theme.unreadBadge
-
-                        Label {
-                            anchors.centerIn: parent
-                            text: modelData.unread_count
-                            color: Theme.textWhite
-                            font.pixelSize: Theme.fontSizeSmall
-                            font.bold: true
-                        }
-                    }
-                }
+            delegate: ContactItem {
+                width: chatListView.width
+                itemType: 'user'
+                itemId: model.user_id
+                name: model.username
+                userStatus: model.status
+                unreadCount: model.unread_count
+                isCurrent: model.is_current
+                onClicked: onUserSelected(itemId)
             }
         }
     }
@@ -14,12 +14,12 @@ Dialog {
     padding: 0                   // 移除内边距，方便自定义布局
     closePolicy: Popup.CloseOnEscape // 按下 Esc 键关闭
 
-    property var onlineUsers: []  // 待选用户列表（从后端传入）
+    property var userModel       // 待选用户列表模型（后端 userModel）
     property var onCreateGroup: function (groupName, memberIds) {
     } // 创建按钮点击回调
     property string searchText: "" // 搜索框文本
     property int selectedUserCount: 0 // 已选中的用户计数，用于实时刷新 UI
-    property var selectedIds: ({}) // 使用对象作为 Map 来存储选中的 ID
+    property var selectedIds: ({}) // 使用对象作为 Map 存储选中的 ID -> 昵称
 
     // 模态背景：在对话框弹出时，将底层界面变白并模糊处理
     Overlay.modal: Rectangle {
@@ -301,11 +301,11 @@ Dialog {
                     spacing: 20
 
                     Repeater {
-                        model: onlineUsers // 遍历在线用户
+                        model: userModel // 遍历用户模型
                         Rectangle {
                             id: card
                             // 每一个卡片项的逻辑
-                            property bool isSelected: !!(modelData && selectedIds[modelData.user_id])
+                            property bool isSelected: !!selectedIds[model.user_id]
 
                             width: (scrollView.availableWidth - 80) / 5 // 一行显示 5 个
                             height: 140
@@ -372,7 +372,7 @@ Dialog {
 
                                     Text {
                                         anchors.centerIn: parent
-                                        text: modelData.username.charAt(0).toUpperCase()
+                                        text: model.username.charAt(0).toUpperCase()
                                         font.pixelSize: 22
                                         font.bold: true
                                         color: Theme.textPrimary
@@ -399,7 +399,7 @@ Dialog {
 
                                     Label {
                                         Layout.alignment: Qt.AlignHCenter
-                                        text: modelData.username
+                                        text: model.username
                                         font.pixelSize: 12
                                         font.bold: true
                                         color: Theme.textPrimary
@@ -409,14 +409,14 @@ Dialog {
 
                                     Label {
                                         Layout.alignment: Qt.AlignHCenter
-                                        text: modelData.status === "online" ? "Online" : "Offline"
+                                        text: model.status === "online" ? "Online" : "Offline"
                                         font.pixelSize: 9
                                         font.weight: Font.Medium
                                         color: {
                                             if (isSelected) {
                                                 return Theme.primary
                                             }
-                                            return modelData.status === "online" ? "#10b981" : "#94a3b8"
+                                            return model.status === "online" ? "#10b981" : "#94a3b8"
                                         }
                                     }
                                 }
@@ -449,18 +449,18 @@ Dialog {
                                 }
 
                                 onClicked: {
-                                    if (modelData && modelData.user_id) {
-                                        var id = modelData.user_id
+                                    if (model.user_id) {
+                                        var id = model.user_id
                                         // 切换选中状态
                                         if (selectedIds[id]) {
                                             delete selectedIds[id]
                                         } else {
-                                            selectedIds[id] = true
+                                            selectedIds[id] = model.username || id
                                         }
                                         // 重新赋值触发属性绑定刷新
                                         selectedIds = selectedIds
                                         selectedUserCount = Object.keys(selectedIds).length
-                                        console.log("Card clicked: " + modelData.username + ", Selected: " + !!selectedIds[id] + ", Total: " + selectedUserCount)
+                                        console.log("Card clicked: " + model.username + ", Selected: " + !!selectedIds[id] + ", Total: " + selectedUserCount)
                                     }
                                 }
                             }
@@ -707,10 +707,8 @@ Dialog {
 
     function getSelectedUsers() {
         var selected = []
-        for (var i = 0; i < onlineUsers.length; i++) {
-            if (selectedIds[onlineUsers[i].user_id]) {
-                selected.push(onlineUsers[i])
-            }
+        for (var id in selectedIds) {
+            selected.push({ user_id: id, username: selectedIds[id] })
         }
         return selected
     }
@@ -133,8 +133,9 @@ ApplicationWindow {
                 Layout.fillHeight: true
                 Layout.preferredWidth: Theme.contactListWidth
                 Layout.maximumWidth: Theme.contactListWidth
-                onlineUsers: backend.onlineUsers
-                groupList: backend.groupList
+                userModel: backend.userModel
+                groupModel: backend.groupModel
+                conversationModel: backend.conversationModel
                 // 选中联系人时的逻辑
                 onUserSelected: function(userId) {
                     backend.selectUser(userId)
@@ -143,7 +144,7 @@ ApplicationWindow {
                 // 选中群组时的逻辑
                 onGroupSelected: function(groupId) {
                     backend.selectGroup(groupId)
-                    updateChatAreaForGroup(groupId) // 更新聊天区状态
+                    updateChatAreaForGroup() // 更新聊天区状态
                 }
                 // 点击创建群组按钮
                 onCreateGroup: function() {
@@ -157,8 +158,10 @@ ApplicationWindow {
                 Layout.fillWidth: true    // 自动占据所有剩余空间
                 Layout.fillHeight: true
                 messageModel: backend.messageModel
-                onlineUsers: backend.onlineUsers
+                currentChatUserName: backend.currentChatUserName
                 currentChatUserStatus: backend.currentChatUserStatus
+                groupName: backend.currentChatGroupName
+                groupMemberCount: backend.currentChatGroupMemberCount
                 fontAwesomeFamily: fontAwesome.name
                 // 发送消息的回调
                 onSendMessage: function(text) {
@@ -171,30 +174,20 @@ ApplicationWindow {
     // 模态对话框：创建群组
     CreateGroupDialog {
         id: createGroupDialog
-        onlineUsers: backend.onlineUsers
+        userModel: backend.userModel
         onCreateGroup: function(groupName, memberIds) {
             backend.createGroup(groupName, memberIds)
         }
     }
 
-    // 辅助函数：切换到私聊模式，重置群组相关属性
+    // 辅助函数：切换到私聊模式
     function updateChatAreaForUser() {
         chatArea.isGroupChat = false
-        chatArea.groupName = ""
-        chatArea.groupMemberCount = 0
     }
 
-    // 辅助函数：切换到群聊模式，设置群组名称和成员数
-    function updateChatAreaForGroup(groupId) {
+    // 辅助函数：切换到群聊模式（群名与成员数绑定到后端的当前群聊属性）
+    function updateChatAreaForGroup() {
         chatArea.isGroupChat = true
-        var groups = backend.groupList
-        for (var i = 0; i < groups.length; i++) {
-            if (groups[i].group_id === groupId) {
-                chatArea.groupName = groups[i].group_name
-                chatArea.groupMemberCount = groups[i].member_count
-                break
-            }
-        }
     }
 
     // 当窗口关闭时，通知后端执行清理工作（如销毁临时数据库）
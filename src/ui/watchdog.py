@@ -0,0 +1,133 @@
+"""
+事件循环卡顿监测 - 以高频心跳定时器测量 UI 线程的事件循环延迟，卡顿时由监测线程抓取主线程调用栈
+"""
+import bisect
+import json
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+from PyQt5.QtCore import QObject, Qt, QTimer
+from src.config import config
+from src.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class EventLoopWatchdog(QObject):
+    """
+    事件循环卡顿监测器
+
+    UI 线程的 QTimer 每 interval_ms 发出一次心跳，心跳实际间隔超出 interval_ms 的部分
+    即为事件循环延迟，计入直方图。监测线程定期检查距上次心跳的时长，超过阈值时通过
+    sys._current_frames 抓取 UI 线程此刻的 Python 调用栈（每次卡顿只抓一次）；
+    UI 线程恢复后的第一次心跳结束该次卡顿，以 JSON 结构记录时长与调用栈。
+    """
+
+    def __init__(self, interval_ms: int = None, threshold_ms: int = None, parent=None):
+        """
+        初始化监测器（须在 UI 线程创建）
+
+        Args:
+            interval_ms: 心跳间隔（毫秒），默认 config.UI_WATCHDOG_INTERVAL_MS
+            threshold_ms: 卡顿阈值（毫秒），默认 config.UI_STALL_THRESHOLD_MS
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.interval_ms = interval_ms or config.UI_WATCHDOG_INTERVAL_MS
+        self.threshold_ms = threshold_ms or config.UI_STALL_THRESHOLD_MS
+        self.buckets_ms = tuple(config.UI_LATENCY_BUCKETS_MS)
+
+        self._lock = threading.Lock()
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = 0.0
+        self._stall_stack: Optional[List[str]] = None  # 当前卡顿期间抓取的调用栈
+        self._stop_event = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._beat)
+
+        # 统计
+        self.beats = 0
+        self.stalls = 0
+        self.total_stall_ms = 0.0
+        self.max_stall_ms = 0.0
+        self.histogram = [0] * (len(self.buckets_ms) + 1)  # 最后一格为超出最大桶上界
+        self.recent_stalls = deque(maxlen=config.UI_STALL_HISTORY)
+
+    def start(self):
+        """启动心跳定时器与监测线程（UI 线程调用）"""
+        if self._monitor is not None:
+            return
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._timer.start(self.interval_ms)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="EventLoopWatchdog", daemon=True)
+        self._monitor.start()
+        logger.info(f"事件循环卡顿监测已启动（心跳 {self.interval_ms}ms，阈值 {self.threshold_ms}ms）")
+
+    def stop(self):
+        """停止监测"""
+        self._timer.stop()
+        self._stop_event.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout=1)
+            self._monitor = None
+
+    def _beat(self):
+        """心跳（UI 线程）：记录延迟，若刚从卡顿中恢复则结束该次卡顿"""
+        now = time.monotonic()
+        with self._lock:
+            elapsed_ms = (now - self._last_beat) * 1000
+            self._last_beat = now
+            stack, self._stall_stack = self._stall_stack, None
+            self.beats += 1
+            latency_ms = max(0.0, elapsed_ms - self.interval_ms)
+            self.histogram[bisect.bisect_left(self.buckets_ms, latency_ms)] += 1
+            if elapsed_ms < self.threshold_ms:
+                return
+            stall = {
+                'at': int(time.time() - elapsed_ms / 1000),
+                'duration_ms': round(elapsed_ms, 1),
+                'stack': stack or [],
+            }
+            self.stalls += 1
+            self.total_stall_ms += elapsed_ms
+            self.max_stall_ms = max(self.max_stall_ms, elapsed_ms)
+            self.recent_stalls.append(stall)
+        logger.warning(f"界面线程卡顿: {json.dumps(dict(stall, event='ui_stall'), ensure_ascii=False)}")
+
+    def _monitor_loop(self):
+        """监测线程：距上次心跳超过阈值时抓取 UI 线程调用栈"""
+        poll = self.interval_ms / 1000
+        while not self._stop_event.wait(poll):
+            with self._lock:
+                if self._stall_stack is not None:
+                    continue
+                if (time.monotonic() - self._last_beat) * 1000 < self.threshold_ms:
+                    continue
+            frame = sys._current_frames().get(self._main_thread_id)
+            stack = [line.rstrip() for line in traceback.format_stack(frame)] if frame else []
+            with self._lock:
+                # 心跳可能在抓取期间恢复，此时这份调用栈已不属于任何卡顿
+                if (time.monotonic() - self._last_beat) * 1000 >= self.threshold_ms:
+                    self._stall_stack = stack
+
+    def stats(self) -> Dict[str, Any]:
+        """返回卡顿统计与事件循环延迟直方图（键为 "≤Nms"，最后一格为 ">Nms"）"""
+        with self._lock:
+            labels = [f"≤{bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+            return {
+                'beats': self.beats,
+                'stalls': self.stalls,
+                'total_stall_ms': round(self.total_stall_ms, 1),
+                'max_stall_ms': round(self.max_stall_ms, 1),
+                'histogram': dict(zip(labels, self.histogram)),
+                'recent_stalls': list(self.recent_stalls),
+            }
@@ -0,0 +1,164 @@
+"""
+入站消息去重工具
+在 JSON 解析、构造 Message 与数据库写入之前丢弃已处理过的消息
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from src.config import config
+
+
+def peek_field(data: bytes, name: str) -> Optional[str]:
+    """
+    不解析 JSON，直接从原始字节中提取字符串字段（用于快速预检）
+
+    Args:
+        data: 原始 JSON 字节
+        name: 字段名
+
+    Returns:
+        字段值，未找到或值含转义字符时返回 None（调用方应回退到完整解析）
+    """
+    match = re.search(rb'"' + name.encode('ascii') + rb'":\s*"([^"\\]*)"', data)
+    return match.group(1).decode('utf-8', 'replace') if match else None
+
+
+class _BloomFilter:
+    """简单的 Bloom 过滤器（k 个哈希位，固定位数组）"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenIdCache:
+    """
+    有界的已见消息 ID 缓存（LRU + 时间窗口，可选 Bloom 过滤器）
+
+    LRU 精确记录最近 max_size 个 ID；启用 Bloom 后，被 LRU 淘汰的 ID
+    在时间窗口内仍可被识别（两代过滤器轮换，存在极低的误判率）。
+    消息保存失败时调用方通过 forget 撤销记录，重传的同一消息不会被当作重复丢弃。
+    线程安全，可由 MessageService 与 GroupManager 共享。
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None, use_bloom: bool = None):
+        """
+        初始化去重缓存
+
+        Args:
+            max_size: LRU 容量，默认 config.SEEN_CACHE_SIZE
+            ttl: 时间窗口（秒），默认 config.SEEN_CACHE_TTL
+            use_bloom: 是否启用 Bloom 过滤器，默认 config.SEEN_CACHE_BLOOM
+        """
+        self.max_size = max_size or config.SEEN_CACHE_SIZE
+        self.ttl = ttl or config.SEEN_CACHE_TTL
+        self.use_bloom = config.SEEN_CACHE_BLOOM if use_bloom is None else use_bloom
+
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 两代 Bloom 过滤器，每个时间窗口轮换一次
+        self._bloom_current = _BloomFilter(self.max_size * 4) if self.use_bloom else None
+        self._bloom_previous = None
+        self._bloom_rotated_at = time.monotonic()
+        self._forgotten = set()  # 已撤销但仍留在 Bloom 过滤器中的 ID
+
+        # 统计
+        self.checked = 0
+        self.dropped = 0
+
+    def is_duplicate(self, msg_id: str) -> bool:
+        """
+        检查并记录消息 ID
+
+        Args:
+            msg_id: 消息 ID
+
+        Returns:
+            时间窗口内已见过返回 True（调用方应丢弃），否则记录并返回 False
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.checked += 1
+            seen_at = self._seen.get(msg_id)
+            if seen_at is not None and now - seen_at <= self.ttl:
+                self._seen.move_to_end(msg_id)
+                self.dropped += 1
+                return True
+
+            if (seen_at is None and self.use_bloom and msg_id not in self._forgotten
+                    and self._in_bloom(msg_id, now)):
+                self.dropped += 1
+                return True
+
+            self._remember(msg_id, now)
+            return False
+
+    def mark_seen(self, msg_id: str):
+        """记录自己发出的消息 ID（使组播回环在解析前即被丢弃）"""
+        with self._lock:
+            self._remember(msg_id, time.monotonic())
+
+    def forget(self, msg_id: str):
+        """
+        撤销对消息 ID 的记录（消息保存失败时调用）
+
+        Args:
+            msg_id: 消息 ID
+        """
+        with self._lock:
+            self._seen.pop(msg_id, None)
+            # Bloom 过滤器无法删除，记为例外（有界，超出时不再记录）
+            if self.use_bloom and len(self._forgotten) < self.max_size:
+                self._forgotten.add(msg_id)
+
+    def _remember(self, msg_id: str, now: float):
+        self._forgotten.discard(msg_id)
+        self._seen[msg_id] = now
+        self._seen.move_to_end(msg_id)
+        if self.use_bloom:
+            self._bloom_current.add(msg_id)
+
+        # 淘汰超出容量或已过期的最旧条目
+        while self._seen:
+            oldest_id, oldest_at = next(iter(self._seen.items()))
+            if len(self._seen) <= self.max_size and now - oldest_at <= self.ttl:
+                break
+            self._seen.popitem(last=False)
+
+    def _in_bloom(self, msg_id: str, now: float) -> bool:
+        if now - self._bloom_rotated_at > self.ttl:
+            self._bloom_previous = self._bloom_current
+            self._bloom_current = _BloomFilter(self.max_size * 4)
+            self._bloom_rotated_at = now
+        return msg_id in self._bloom_current or (
+            self._bloom_previous is not None and msg_id in self._bloom_previous
+        )
+
+    def stats(self) -> dict:
+        """返回去重统计"""
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'dropped': self.dropped,
+                'size': len(self._seen),
+                'bloom': self.use_bloom
+            }
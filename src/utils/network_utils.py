@@ -7,6 +7,21 @@ import socket
 from typing import Optional, Dict, Any, List
 
 
+def pack_json(data: Dict[str, Any]) -> bytes:
+    """
+    将字典编码为带 4 字节长度前缀的完整帧（便于一次编码、多处发送）
+    
+    Args:
+        data: 要发送的字典数据
+    
+    Returns:
+        长度前缀 + JSON 消息体
+    """
+    json_str = json.dumps(data).encode('utf-8')
+    # 消息长度（前 4 字节，大端字节序）
+    return len(json_str).to_bytes(4, byteorder='big') + json_str
+
+
 def send_json(sock: socket.socket, data: Dict[str, Any]) -> None:
     """
     发送 JSON 数据，采用 4 字节长度前缀协议
@@ -15,12 +30,7 @@ def send_json(sock: socket.socket, data: Dict[str, Any]) -> None:
         sock: 已连接的 socket 对象
         data: 要发送的字典数据
     """
-    json_str = json.dumps(data).encode('utf-8')
-    # 发送消息长度（前 4 字节，大端字节序）
-    length_data = len(json_str).to_bytes(4, byteorder='big')
-    sock.sendall(length_data)
-    # 发送消息内容
-    sock.sendall(json_str)
+    sock.sendall(pack_json(data))
 
 
 def receive_json(sock: socket.socket) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,73 @@
+"""
+界面变更合并器测试
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from PyQt5.QtCore import QCoreApplication
+
+from src.ui.coalescer import ChangeCoalescer
+
+
+def _app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _process_events_for(app, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def test_marks_from_many_threads_flush_as_one_batch():
+    app = _app()
+    coalescer = ChangeCoalescer(interval_ms=20)
+    batches = []
+    totals = []
+    coalescer.register('presence', lambda changes: batches.append(dict(changes)))
+    coalescer.register('counts', lambda changes: totals.append(dict(changes)), merge=lambda a, b: a + b)
+
+    def storm(worker):
+        for i in range(1000):
+            coalescer.mark('presence', f"user_{i % 10}", (worker, i))
+            coalescer.mark('counts', 'group', 1)
+
+    threads = [threading.Thread(target=storm, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _process_events_for(app, 0.1)
+
+    # 4000 次登记合并为一次刷新：每个键一份，合并函数累加
+    assert coalescer.flushes == 1
+    assert len(batches) == 1 and sorted(batches[0]) == [f"user_{i}" for i in range(10)]
+    assert all(value[1] >= 990 for value in batches[0].values())
+    assert totals == [{'group': 4000}]
+    assert coalescer.stats()['marks'] == 8000
+
+
+def test_flushes_are_rate_limited():
+    app = _app()
+    coalescer = ChangeCoalescer(interval_ms=30)
+    flushed_at = []
+    coalescer.register('unread', lambda changes: flushed_at.append(time.monotonic()))
+
+    # 持续登记 0.3 秒：刷新次数受间隔限制，且每批数据都被交付
+    deadline = time.monotonic() + 0.3
+    i = 0
+    while time.monotonic() < deadline:
+        coalescer.mark('unread', f"user_{i}")
+        i += 1
+        app.processEvents()
+    _process_events_for(app, 0.1)
+
+    assert 2 <= coalescer.flushes <= 12
+    assert all(b - a >= 0.025 for a, b in zip(flushed_at, flushed_at[1:]))
@@ -0,0 +1,417 @@
+"""
+数据库管理器测试
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.config import config
+from src.core.models import Group, Message, private_conversation_id
+from src.database.db_manager import (
+    SCHEMA_VERSION, SQL_CONVERSATION_AFTER, SQL_CONVERSATION_BEFORE, SQL_CONVERSATION_LATEST,
+    DatabaseManager
+)
+
+
+def test_wal_mode_enabled(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    assert db.query_one('PRAGMA journal_mode')['journal_mode'] == 'wal'
+    db.close()
+
+
+def test_reads_do_not_wait_for_write_lock(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.set_setting('k', 'v')
+
+    results = []
+    with db.lock:
+        # 写锁被占用时，其他线程的读取仍可完成
+        reader = threading.Thread(target=lambda: results.append(db.get_setting('k')))
+        reader.start()
+        reader.join(timeout=2)
+        assert not reader.is_alive()
+
+    assert results == ['v']
+    assert db.lock_stats()['readers'] >= 1
+    db.close()
+
+
+def test_lock_stats_count_writes(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    before = db.lock_stats()['acquisitions']
+    for i in range(5):
+        db.set_setting(f'k{i}', str(i))
+    stats = db.lock_stats()
+    assert stats['acquisitions'] == before + 5
+    assert stats['wait_max_ms'] >= 0
+    db.close()
+
+
+def test_short_lived_threads_share_bounded_reader_pool(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.set_setting('k', 'v')
+
+    results = []
+    for _ in range(30):
+        threads = [threading.Thread(target=lambda: results.append(db.get_setting('k'))) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    # 300 个线程各读一次，连接数不超过连接池上限
+    assert results == ['v'] * 300
+    assert 1 <= db.lock_stats()['readers'] <= db.reader_pool_size
+    db.close()
+
+
+def test_destroy_removes_wal_files(tmp_path):
+    path = tmp_path / "chat.db"
+    db = DatabaseManager(path)
+    db.get_setting('k')
+    db.destroy()
+    assert not any(os.path.exists(f"{path}{suffix}") for suffix in ('', '-wal', '-shm'))
+
+
+def test_async_writes_are_group_committed(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    before = db.lock_stats()['batches']
+    futures = [db.execute('INSERT INTO settings (key, value) VALUES (?, ?)', (f'k{i}', str(i)), wait=False)
+               for i in range(500)]
+    assert all(f.result(timeout=5) for f in futures)
+
+    stats = db.lock_stats()
+    # 500 次写入应合并为远少于 500 个事务
+    assert stats['batches'] - before < 50
+    assert db.query_one('SELECT COUNT(*) AS n FROM settings')['n'] == 500
+    db.close()
+
+
+def test_failed_write_does_not_abort_batch(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    ok = db.execute('INSERT INTO settings (key, value) VALUES (?, ?)', ('a', '1'), wait=False)
+    bad = db.execute('INSERT INTO no_such_table VALUES (1)', wait=False)
+    also_ok = db.execute('INSERT INTO settings (key, value) VALUES (?, ?)', ('b', '2'), wait=False)
+
+    assert ok.result(timeout=5) and also_ok.result(timeout=5)
+    assert bad.result(timeout=5) is False
+    assert db.get_setting('a') == '1' and db.get_setting('b') == '2'
+    db.close()
+
+
+def test_close_flushes_pending_writes(tmp_path):
+    path = tmp_path / "chat.db"
+    db = DatabaseManager(path)
+    for i in range(100):
+        db.execute('INSERT INTO settings (key, value) VALUES (?, ?)', (f'k{i}', str(i)), wait=False)
+    db.close()
+
+    reopened = DatabaseManager(path)
+    assert reopened.query_one('SELECT COUNT(*) AS n FROM settings')['n'] == 100
+    reopened.close()
+
+
+def _plan(db, sql, params):
+    return ' | '.join(row['detail'] for row in db.query('EXPLAIN QUERY PLAN ' + sql, params))
+
+
+def test_history_queries_use_conversation_index(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+
+    latest = _plan(db, SQL_CONVERSATION_LATEST, ('u:a:b', 50))
+    assert 'idx_messages_conversation' in latest
+    assert 'TEMP B-TREE' not in latest
+
+    for sql in (SQL_CONVERSATION_BEFORE, SQL_CONVERSATION_AFTER):
+        plan = _plan(db, sql, ('g:g1', 100, 'm', 50))
+        # 游标条件直接作为索引查找范围，而非扫描后过滤
+        assert '(timestamp,msg_id)' in plan
+        assert 'TEMP B-TREE' not in plan
+    db.close()
+
+
+def test_private_and_group_history_by_conversation(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.save_messages([
+        Message(msg_id='m1', from_user_id='alice', to_user_id='bob', content='hi', timestamp=1),
+        Message(msg_id='m2', from_user_id='bob', to_user_id='alice', content='yo', timestamp=2),
+        Message(msg_id='m3', from_user_id='alice', to_user_id='carol', content='x', timestamp=3),
+        Message(msg_id='m4', from_user_id='alice', content='g', timestamp=4, is_group=True, group_id='g1'),
+    ])
+
+    assert [m.msg_id for m in db.get_messages('bob', 'alice')] == ['m1', 'm2']
+    assert [m.msg_id for m in db.get_group_messages('g1')] == ['m4']
+    db.close()
+
+
+def test_migration_backfills_conversation_id(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE messages (
+            msg_id TEXT PRIMARY KEY, type TEXT NOT NULL, from_user_id TEXT NOT NULL,
+            from_username TEXT, to_user_id TEXT NOT NULL, to_username TEXT, content TEXT,
+            timestamp INTEGER, is_group INTEGER DEFAULT 0, group_id TEXT,
+            is_read INTEGER DEFAULT 0, status TEXT DEFAULT 'sent', created_at INTEGER
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO messages (msg_id, type, from_user_id, to_user_id, timestamp, is_group, group_id) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [('m1', 'TEXT', 'zed', 'amy', 1, 0, None), ('m2', 'TEXT', 'amy', '', 2, 1, 'g1')]
+    )
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    rows = {r['msg_id']: r['conversation_id'] for r in db.query('SELECT msg_id, conversation_id FROM messages')}
+    assert rows == {'m1': 'u:amy:zed', 'm2': 'g:g1'}
+    assert db.query_one('PRAGMA user_version')['user_version'] == SCHEMA_VERSION
+    assert [m.msg_id for m in db.get_messages('amy', 'zed')] == ['m1']
+    assert [r['conversation_id'] for r in db.get_recent_conversations()] == ['g:g1', 'u:amy:zed']
+    db.close()
+
+
+def test_keyset_pagination_walks_whole_history(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.save_messages([
+        Message(msg_id=f"m{i:04d}", from_user_id='alice', to_user_id='bob',
+                timestamp=1000 + i // 4)  # 同一时间戳内依靠 msg_id 区分
+        for i in range(1000)
+    ])
+    conversation = private_conversation_id('alice', 'bob')
+
+    # 从最新一页向前翻到底
+    pages = []
+    page = db.get_messages_before(conversation, None, 64)
+    while page:
+        pages.append(page)
+        page = db.get_messages_before(conversation, page[0].cursor, 64)
+    backward = [m.msg_id for p in reversed(pages) for m in p]
+    assert backward == [f"m{i:04d}" for i in range(1000)]
+
+    # 从最早一条向后翻到底
+    forward = []
+    page = db.get_messages_after(conversation, None, 64)
+    while page:
+        forward.extend(m.msg_id for m in page)
+        page = db.get_messages_after(conversation, page[-1].cursor, 64)
+    assert forward == backward
+    db.close()
+
+
+def _inbound(msg_id, from_user_id, to_user_id='me', **kwargs):
+    return Message(msg_id=msg_id, from_user_id=from_user_id, to_user_id=to_user_id, **kwargs)
+
+
+def test_unread_counts_maintained_incrementally(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.set_local_user_id('me')
+
+    db.save_message(_inbound('m1', 'alice'))
+    db.save_message(_inbound('m2', 'alice'))
+    db.save_message(_inbound('m2', 'alice'))  # 重复消息被忽略，不重复计数
+    db.save_message(_inbound('m3', 'me', to_user_id='alice'))  # 自己发出的不计
+    db.save_message(_inbound('m4', 'bob', is_read=True))  # 已读的不计
+    assert db.get_unread_count('alice', 'me') == 2
+    assert db.get_unread_count('bob', 'me') == 0
+
+    db.mark_as_read('alice', 'me')
+    assert db.get_unread_count('alice', 'me') == 0
+    assert db.query_one('SELECT COUNT(*) AS n FROM messages WHERE is_read = 0')['n'] == 1  # 仅自己发出的 m3
+    db.close()
+
+
+def test_users_with_unread_in_one_query(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.set_local_user_id('me')
+    for user_id, status in (('me', 'online'), ('alice', 'offline'), ('bob', 'online')):
+        db.execute('INSERT INTO users (user_id, username, status) VALUES (?, ?, ?)', (user_id, user_id, status))
+    db.save_messages([_inbound('m1', 'alice'), _inbound('m2', 'alice'), _inbound('m3', 'bob')])
+
+    rows = db.get_users_with_unread('me')
+    assert [(r['user_id'], r['unread_count']) for r in rows] == [('bob', 1), ('alice', 2)]
+    db.close()
+
+
+def test_local_user_change_rebuilds_unread_counts(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.save_messages([_inbound('m1', 'alice'), _inbound('m2', 'alice')])
+    assert db.get_unread_count('alice', 'me') == 0  # 本机 ID 未知时不计数
+
+    db.set_local_user_id('me')
+    assert db.get_unread_count('alice', 'me') == 2
+    db.close()
+
+
+def test_recent_conversations_materialized_on_save(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.set_local_user_id('me')
+    db.execute('INSERT INTO users (user_id, username) VALUES (?, ?)', ('alice', 'Alice'))
+    db.save_group(Group(group_id='g1', group_name='Team', member_ids=['bob', 'me']))
+    db.save_messages([
+        _inbound('m1', 'alice', content='hi', timestamp=1),
+        _inbound('m2', 'me', to_user_id='alice', content='hello', timestamp=3),
+        Message(msg_id='m3', from_user_id='bob', from_username='Bob', content='standup',
+                timestamp=2, is_group=True, group_id='g1'),
+    ])
+    db.save_message(_inbound('m0', 'alice', content='older', timestamp=0))  # 补写的旧消息不改变最后一条
+
+    rows = db.get_recent_conversations()
+    assert [(r['conversation_id'], r['kind'], r['peer_id'], r['title'], r['snippet'], r['unread_count'])
+            for r in rows] == [
+        ('u:alice:me', 'user', 'alice', 'Alice', 'hello', 2),
+        ('g:g1', 'group', 'g1', 'Team', 'Bob: standup', 1),
+    ]
+    assert [r['conversation_id'] for r in db.get_recent_conversations(conversation_ids=['g:g1'])] == ['g:g1']
+
+    # 删除最后一条消息后回退到剩余消息中最新的一条
+    db.execute("DELETE FROM messages WHERE msg_id = 'm2'")
+    assert db.get_recent_conversations(conversation_ids=['u:alice:me'])[0]['snippet'] == 'hi'
+
+    # 侧边栏读取只扫描会话索引，不读取消息表、不额外排序
+    plan = _plan(db, "SELECT * FROM conversation_state WHERE last_timestamp IS NOT NULL "
+                     "ORDER BY last_timestamp DESC, last_msg_id DESC LIMIT 50", ())
+    assert 'idx_conversation_state_recent' in plan and 'TEMP B-TREE' not in plan
+    db.close()
+
+
+def test_bulk_writes_accept_generators(tmp_path):
+    from src.core.models import User
+    db = DatabaseManager(tmp_path / "chat.db")
+
+    assert db.save_messages(_inbound(f"m{i}", 'alice') for i in range(300))
+    assert db.upsert_users(User(user_id=f"u{i}", username=f"u{i}") for i in range(50))
+    assert db.upsert_users([User(user_id="u0", username="renamed")])
+    assert db.add_group_members('g1', (f"u{i}" for i in range(50)))
+    assert db.add_group_members('g1', [('u0', 'owner'), ('u99', 'owner')])  # u0 已存在，忽略
+
+    assert db.query_one('SELECT COUNT(*) AS n FROM messages')['n'] == 300
+    assert db.query_one('SELECT COUNT(*) AS n FROM users')['n'] == 50
+    assert db.query_one("SELECT username FROM users WHERE user_id = 'u0'")['username'] == 'renamed'
+    assert len(db.get_group_member_ids('g1')) == 51
+    db.close()
+
+
+def test_memory_mode_same_api_and_snapshot(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db", mode='memory')
+    db.set_local_user_id('me')
+    db.save_messages(_inbound(f"m{i}", 'alice', timestamp=i) for i in range(10))
+
+    # 其他线程的只读连接看到同一个内存库
+    results = []
+    reader = threading.Thread(target=lambda: results.append(db.get_unread_count('alice', 'me')))
+    reader.start()
+    reader.join(timeout=2)
+    assert results == [10]
+    assert not (tmp_path / "chat.db").exists()
+
+    snapshot_path = tmp_path / "snapshot.db"
+    assert db.snapshot(snapshot_path)
+    db.destroy()
+
+    restored = DatabaseManager(snapshot_path)
+    assert [m.msg_id for m in restored.get_messages('alice', 'me', limit=3)] == ['m7', 'm8', 'm9']
+    restored.close()
+
+
+def test_memory_mode_reads_only_committed_rows():
+    db = DatabaseManager(mode='memory')
+    inserted = threading.Event()
+
+    def failing_write(cursor):
+        cursor.execute("INSERT INTO settings (key, value) VALUES ('k', 'uncommitted')")
+        inserted.set()
+        time.sleep(0.1)
+        raise RuntimeError("回滚")
+
+    future = db.submit_write(failing_write, wait=False)
+    assert inserted.wait(timeout=2)
+    # 写事务进行中的读取 WAL 快照，不等待该批次结束，只能看到已提交的数据
+    start = time.monotonic()
+    assert db.get_setting('k') is None
+    assert time.monotonic() - start < 0.1
+    assert future.result(timeout=2) is False
+    db.close()
+
+
+def test_memory_instances_are_isolated(tmp_path):
+    first = DatabaseManager(mode='memory')
+    second = DatabaseManager(mode='memory')
+    first.set_setting('k', 'first')
+    assert second.get_setting('k') is None
+    first.close()
+    second.close()
+
+
+def test_memory_mode_uses_wal_file_removed_on_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'DB_MEMORY_DIR', str(tmp_path))
+    db = DatabaseManager(mode='memory')
+    assert db.db_path.parent == tmp_path
+    assert db.query_one('PRAGMA journal_mode')['journal_mode'] == 'wal'
+    db.set_setting('k', 'v')
+    db.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_search_messages_full_text(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.save_messages([
+        Message(msg_id='m1', from_user_id='alice', to_user_id='me', content='明天下午开会讨论发布计划', timestamp=1),
+        Message(msg_id='m2', from_user_id='bob', to_user_id='me', content='发布计划已更新', timestamp=2),
+        Message(msg_id='m3', from_user_id='alice', content='群里说一下发布计划', timestamp=3,
+                is_group=True, group_id='g1'),
+        Message(msg_id='m4', from_user_id='alice', to_user_id='me', content='午饭吃什么', timestamp=4),
+    ])
+    assert db.fts_tokenizer is not None
+
+    hits = db.search_messages('发布计划')
+    assert sorted(h.message.msg_id for h in hits) == ['m1', 'm2', 'm3']
+    assert all('<b>' in h.snippet for h in hits)
+
+    scoped = db.search_messages('发布计划', conversation_id=private_conversation_id('alice', 'me'))
+    assert [h.message.msg_id for h in scoped] == ['m1']
+
+    # 按游标翻页不重复、不遗漏
+    first = db.search_messages('发布计划', limit=2)
+    rest = db.search_messages('发布计划', limit=2, cursor=first[-1].cursor)
+    assert sorted(h.message.msg_id for h in first + rest) == ['m1', 'm2', 'm3']
+
+    # 过短的词退回 LIKE 检索
+    assert [h.message.msg_id for h in db.search_messages('午饭')] == ['m4']
+    db.close()
+
+
+def test_search_index_follows_deletes_and_uses_fts(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.save_message(Message(msg_id='m1', from_user_id='a', to_user_id='b', content='hello world'))
+    db.execute("DELETE FROM messages WHERE msg_id = 'm1'")
+    assert db.search_messages('hello') == []
+
+    plan = _plan(db, "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?", ('"hello"',))
+    assert 'VIRTUAL TABLE INDEX' in plan
+    db.close()
+
+
+def test_query_models_matches_from_dict(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.save_messages([
+        Message(msg_id='m1', from_user_id='a', to_user_id='b', content='x', is_read=True, timestamp=1),
+        Message(msg_id='m2', from_user_id='a', content='y', is_group=True, group_id='g1', timestamp=2),
+    ])
+    db.save_group(Group(group_id='g1', group_name='群', member_ids=['a', 'b']))
+
+    sql = 'SELECT * FROM messages ORDER BY msg_id'
+    decoded = db.query_models(Message, sql)
+    assert decoded == [Message.from_dict(row) for row in db.query(sql)]
+    assert decoded[0].is_read is True and decoded[1].is_group is True
+
+    assert db.get_group('g1').member_ids == ['a', 'b']
+    db.close()
@@ -0,0 +1,96 @@
+"""
+入站消息去重缓存测试
+"""
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.core.group_manager import GroupManager
+from src.database.db_manager import DatabaseManager
+from src.core.models import Group
+from src.utils.dedup import SeenIdCache, peek_field
+
+
+def test_duplicates_are_counted_and_dropped():
+    cache = SeenIdCache(max_size=100, ttl=60)
+    assert not cache.is_duplicate("msg_1")
+    assert cache.is_duplicate("msg_1")
+    assert cache.is_duplicate("msg_1")
+    assert not cache.is_duplicate("msg_2")
+    assert cache.stats()['dropped'] == 2
+
+
+def test_lru_is_bounded():
+    cache = SeenIdCache(max_size=10, ttl=60, use_bloom=False)
+    for i in range(50):
+        cache.is_duplicate(f"msg_{i}")
+    assert cache.stats()['size'] == 10
+    assert not cache.is_duplicate("msg_0")  # 已被淘汰
+
+
+def test_bloom_remembers_evicted_ids():
+    cache = SeenIdCache(max_size=10, ttl=60, use_bloom=True)
+    for i in range(50):
+        cache.is_duplicate(f"msg_{i}")
+    assert cache.is_duplicate("msg_0")
+
+
+def test_peek_field_matches_json_dumps_output():
+    data = json.dumps({'type': 'GROUP_MESSAGE', 'msg_type': 'TEXT', 'msg_id': 'msg_abc',
+                       'group_id': 'group_1'}).encode('utf-8')
+    assert peek_field(data, 'msg_id') == 'msg_abc'
+    assert peek_field(data, 'group_id') == 'group_1'
+    assert peek_field(data, 'missing') is None
+
+
+def test_multicast_duplicates_skip_database(tmp_path):
+    db = DatabaseManager(tmp_path / "dedup.db")
+    received = []
+    manager = GroupManager(db, on_group_message_received=received.append, seen_cache=SeenIdCache())
+    manager.groups["group_1"] = Group(group_id="group_1", multicast_ip="239.0.0.203")
+    manager.groups["group_2"] = Group(group_id="group_2", multicast_ip="239.0.0.204")
+
+    data = json.dumps({'type': 'GROUP_MESSAGE', 'msg_id': 'msg_dup', 'group_id': 'group_1',
+                       'from_user_id': 'peer', 'content': 'hi', 'timestamp': 1}).encode('utf-8')
+    # 其他群组的 socket 也会收到同一个包，应被忽略且不影响去重
+    manager._handle_multicast_data("group_2", data, ('127.0.0.1', 0))
+    for _ in range(3):
+        manager._handle_multicast_data("group_1", data, ('127.0.0.1', 0))
+    # 回调在消息提交后触发，关闭时写线程会先落盘全部排队的写入
+    db.close()
+
+    assert len(received) == 1
+    assert received[0].group_id == "group_1"
+    assert manager.seen_cache.stats()['dropped'] == 2
+    manager.fanout.close()
+
+
+def test_failed_save_is_not_notified(tmp_path):
+    db = DatabaseManager(tmp_path / "dedup.db")
+    received = []
+    manager = GroupManager(db, on_group_message_received=received.append, seen_cache=SeenIdCache())
+    manager.groups["group_1"] = Group(group_id="group_1", multicast_ip="239.0.0.205")
+    # 消息表不可写时保存失败，回调不应收到未落盘的消息
+    db.execute('DROP TABLE messages')
+
+    data = json.dumps({'type': 'GROUP_MESSAGE', 'msg_id': 'msg_lost', 'group_id': 'group_1',
+                       'from_user_id': 'peer', 'content': 'hi', 'timestamp': 1}).encode('utf-8')
+    manager._handle_multicast_data("group_1", data, ('127.0.0.1', 0))
+    db.close()
+
+    assert received == []
+    # 保存失败后撤销去重记录，重传不会被当作重复丢弃
+    assert not manager.seen_cache.is_duplicate('msg_lost')
+    manager.fanout.close()
+
+
+def test_forget_allows_retransmission_with_bloom():
+    cache = SeenIdCache(max_size=2, ttl=60, use_bloom=True)
+    assert not cache.is_duplicate("msg_1")
+    cache.forget("msg_1")
+    assert not cache.is_duplicate("msg_1")
+    assert cache.is_duplicate("msg_1")
@@ -0,0 +1,145 @@
+"""
+群消息单播扇出测试
+"""
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.config import config
+from src.core.group_manager import GroupManager
+from src.core.models import Group, User
+from src.core.user_manager import UserManager
+from src.database.db_manager import DatabaseManager
+from src.network.fanout import FanoutSender
+from src.utils.network_utils import receive_json
+
+
+def _listener(received):
+    """启动一个持续读取长连接消息的接收端"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(5)
+
+    def loop():
+        conn, _ = server.accept()
+        with conn:
+            while True:
+                msg = receive_json(conn)
+                if msg is None:
+                    break
+                received.append(msg)
+
+    threading.Thread(target=loop, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def test_fanout_reaches_all_members_over_pooled_connections():
+    inboxes = {f"user_{i}": [] for i in range(5)}
+    targets = [(uid, '127.0.0.1', _listener(inbox)) for uid, inbox in inboxes.items()]
+    sender = FanoutSender(max_workers=2)
+
+    for n in range(3):
+        report = sender.send(f"msg_{n}", {'type': 'GROUP_MESSAGE', 'msg_id': f"msg_{n}"}, targets).result()
+        assert sorted(report.delivered) == sorted(inboxes)
+        assert not report.failed
+        assert report.total_ms >= max(report.member_ms.values())
+
+    time.sleep(0.2)
+    for inbox in inboxes.values():
+        assert [m['msg_id'] for m in inbox] == ["msg_0", "msg_1", "msg_2"]
+    sender.close()
+
+
+def test_fanout_reports_unreachable_member():
+    closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    closed.bind(('127.0.0.1', 0))
+    port = closed.getsockname()[1]
+    closed.close()
+
+    sender = FanoutSender()
+    report = sender.send("msg_x", {'type': 'GROUP_MESSAGE'}, [("ghost", '127.0.0.1', port)]).result()
+    assert report.failed == ["ghost"]
+    sender.close()
+
+
+def test_fanout_send_does_not_wait_for_slow_members():
+    sender = FanoutSender(max_workers=2)
+    sender._deliver = lambda addr, frame, start: time.sleep(0.3) or 300.0
+
+    began = time.perf_counter()
+    future = sender.send("msg_slow", {'type': 'GROUP_MESSAGE'}, [("a", '127.0.0.1', 1), ("b", '127.0.0.1', 2)])
+    # 调用方（UI 线程）立即返回，报告在全部成员完成后由写入线程汇总
+    assert time.perf_counter() - began < 0.1 and not future.done()
+    report = future.result(timeout=2)
+    assert sorted(report.delivered) == ["a", "b"] and report.total_ms >= 300
+    sender.close()
+
+
+def test_switches_to_unicast_when_multicast_is_silent(tmp_path):
+    db = DatabaseManager(tmp_path / "fanout.db")
+    user_manager = UserManager(db)
+    user_manager.current_user = User(user_id="me", username="me")
+    user_manager._save_user_to_db(User(user_id="peer", username="peer", ip_address="127.0.0.1"))
+
+    manager = GroupManager(db, user_manager=user_manager)
+    manager.set_current_user(user_manager.current_user)
+    manager.groups["g"] = Group(group_id="g", member_ids=["me", "peer"], multicast_ip="239.0.0.202")
+    manager._listen_started["g"] = time.time() - 3600
+
+    # 观察期内既没收到自己的回环也没收到对方的数据
+    manager._check_delivery_mode("g")
+    assert manager.get_delivery_mode("g") == 'unicast'
+
+    # 组播恢复
+    manager._note_multicast_heard("g", {'user_id': "me"})
+    manager._note_multicast_heard("g", {'from_user_id': "peer"})
+    manager._check_delivery_mode("g")
+    assert manager.get_delivery_mode("g") == 'multicast'
+    manager.fanout.close()
+
+
+def test_member_coming_online_late_gets_full_grace_period(tmp_path):
+    db = DatabaseManager(tmp_path / "fanout.db")
+    user_manager = UserManager(db)
+    user_manager.current_user = User(user_id="me", username="me")
+
+    manager = GroupManager(db, user_manager=user_manager)
+    manager.set_current_user(user_manager.current_user)
+    manager.groups["g"] = Group(group_id="g", member_ids=["me", "peer"], multicast_ip="239.0.0.206")
+    manager._listen_started["g"] = time.time() - 3600
+    manager._note_multicast_heard("g", {'user_id': "me"})
+
+    # 对方在开始监听很久之后才上线，观察期从上线时算起
+    user_manager.add_user(User(user_id="peer", username="peer", ip_address="127.0.0.1"))
+    db.submit_write(lambda cursor: None, wait=True).result(timeout=5)  # 等待异步写入的用户提交
+    manager._check_delivery_mode("g")
+    assert manager.get_delivery_mode("g") == 'multicast'
+
+    # 上线后超过超时时间仍无组播数据才切换为单播
+    user_manager._online_since["peer"] -= config.GROUP_MULTICAST_SILENCE_TIMEOUT + 1
+    manager._note_multicast_heard("g", {'user_id': "me"})
+    manager._check_delivery_mode("g")
+    assert manager.get_delivery_mode("g") == 'unicast'
+    manager.fanout.close()
+
+
+def test_send_group_message_returns_none_when_save_fails(tmp_path):
+    db = DatabaseManager(tmp_path / "fanout.db")
+    manager = GroupManager(db)
+    manager.groups["g"] = Group(group_id="g", member_ids=["me"], multicast_ip="239.0.0.207")
+    sent = []
+    manager._send_multicast = lambda group, payload: sent.append(payload)
+
+    assert manager.send_group_message("g", "me", "me", "hello") is not None
+    db.execute('DROP TABLE messages')
+    # 保存失败时不发送，也不返回消息
+    assert manager.send_group_message("g", "me", "me", "lost") is None
+    assert [payload['content'] for payload in sent] == ['hello']
+    db.close()
+    manager.fanout.close()
@@ -0,0 +1,71 @@
+"""
+群成员反熵同步测试
+"""
+import socket
+import sys
+import threading
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.core.group_manager import GroupManager
+from src.core.membership import (
+    MEMBERSHIP_BUCKETS, bucket_digests, membership_digest, diff_buckets, members_in_buckets
+)
+from src.core.models import Group, User
+from src.database.db_manager import DatabaseManager
+from src.utils.network_utils import receive_json
+
+
+def test_digest_is_order_independent():
+    ids = [f"user_{i}" for i in range(50)]
+    assert membership_digest(ids) == membership_digest(list(reversed(ids)))
+    assert membership_digest(ids) != membership_digest(ids + ["user_new"])
+    assert len(bucket_digests(ids)) == MEMBERSHIP_BUCKETS
+
+
+def test_diff_only_touches_changed_bucket():
+    ids = [f"user_{i}" for i in range(200)]
+    differing = diff_buckets(bucket_digests(ids), bucket_digests(ids + ["user_new"]))
+    assert len(differing) == 1
+    assert "user_new" in members_in_buckets(ids + ["user_new"], differing)
+
+
+def _manager(db_path, user_id, member_ids):
+    manager = GroupManager(DatabaseManager(db_path))
+    manager.set_current_user(User(user_id=user_id, username=user_id))
+    group = Group(group_id="group_ae", group_name="反熵测试群", owner_id="a",
+                  multicast_ip="239.0.0.201", member_ids=list(member_ids))
+    manager.db_manager.save_group(group)
+    for member_id in member_ids:
+        manager.db_manager.add_group_member(group.group_id, member_id)
+    manager.groups[group.group_id] = group
+    return manager
+
+
+def test_reconcile_exchanges_missing_members(tmp_path):
+    # a 漏收了 c 的邀请，b 漏收了 d 的邀请
+    a = _manager(tmp_path / "a.db", "a", ["a", "b", "d"])
+    b = _manager(tmp_path / "b.db", "b", ["a", "b", "c"])
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            b.handle_membership_request(receive_json(conn), conn)
+        server.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    assert a.reconcile_with_peer("group_ae", '127.0.0.1', server.getsockname()[1])
+    thread.join(timeout=5)
+
+    for manager in (a, b):
+        assert sorted(manager.groups["group_ae"].member_ids) == ["a", "b", "c", "d"]
+        assert sorted(manager.db_manager.get_group_member_ids("group_ae")) == ["a", "b", "c", "d"]
+        assert manager.db_manager.get_group("group_ae").member_ids == manager.groups["group_ae"].member_ids
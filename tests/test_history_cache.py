@@ -0,0 +1,129 @@
+"""
+会话历史预取缓存测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from PyQt5.QtCore import QCoreApplication
+
+from src.core.models import Message
+from src.database.db_manager import DatabaseManager
+from src.ui.history_cache import HistoryCache, rank_conversations
+from src.ui.models.message_list_model import MessageListModel
+
+
+def _message(i, sender='alice', receiver='me', content=None):
+    return Message(msg_id=f"m{i:04d}", from_user_id=sender, from_username=sender, to_user_id=receiver,
+                   content=content or f"消息 {i}", timestamp=1700000000 + i, status='sent')
+
+
+def test_cache_serves_latest_page_and_validates_against_database():
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_message(i) for i in range(30))
+    cache = HistoryCache(db, window_size=10)
+
+    assert cache.get('u:alice:me') is None
+    cache.warm(['u:alice:me'])
+    page = cache.get('u:alice:me')
+    assert [m.msg_id for m in page] == [f"m{i:04d}" for i in range(20, 30)]
+
+    # 提交后 record 的新消息追加到窗口末尾，仍然命中
+    db.save_message(_message(30))
+    cache.record(_message(30))
+    assert cache.get('u:alice:me')[-1].msg_id == 'm0030' and len(cache.get('u:alice:me')) == 10
+
+    # 绕过 record 写入的消息（如历史同步）由后台核对发现，条目随之失效
+    db.save_message(_message(31))
+    shown = cache.get('u:alice:me')
+    assert not cache.validate('u:alice:me', shown[-1].cursor)
+    assert cache.get('u:alice:me') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (4, 2, 0.667)
+    db.close()
+
+
+class _ForbiddenDB:
+    """任何访问都失败的数据库（用于验证 get 不查询数据库）"""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"get 不应访问数据库: {name}")
+
+
+def test_get_only_reads_memory():
+    cache = HistoryCache(_ForbiddenDB(), window_size=10)
+    cache.put('u:alice:me', [_message(i) for i in range(5)])
+    cache.record(_message(5))
+    assert [m.msg_id for m in cache.get('u:alice:me')][-1] == 'm0005'
+    assert cache.get('u:bob:me') is None
+
+
+def test_cache_evicts_least_recently_used_within_byte_budget():
+    db = DatabaseManager(mode='memory')
+    for offset, sender in enumerate(('a', 'b', 'c')):
+        db.save_messages(_message(offset * 100 + i, sender, content='x' * 1000) for i in range(10))
+    cache = HistoryCache(db, max_bytes=40000, window_size=10)
+
+    cache.warm(['u:a:me', 'u:b:me'])
+    cache.get('u:a:me')  # a 最近使用过，b 成为最久未使用的条目
+    cache.warm(['u:c:me'])
+
+    stats = cache.stats()
+    assert stats['bytes'] <= 40000 and stats['evictions'] == 1
+    assert cache.get('u:b:me') is None and cache.get('u:a:me') is not None
+    db.close()
+
+
+def test_rank_prefers_unread_then_recent():
+    rows = [
+        {'conversation_id': 'old', 'unread_count': 0, 'last_timestamp': 1},
+        {'conversation_id': 'new', 'unread_count': 0, 'last_timestamp': 9},
+        {'conversation_id': 'unread', 'unread_count': 3, 'last_timestamp': 5},
+    ]
+    assert rank_conversations(rows, 2) == ['unread', 'new']
+
+
+class _NoHistoryDB:
+    """禁止访问消息历史的数据库包装（用于验证切换会话命中缓存）"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_messages_before(self, *args):
+        raise AssertionError("命中缓存时不应查询消息表")
+
+
+def test_model_opens_prefetched_conversation_from_memory():
+    QCoreApplication.instance() or QCoreApplication([])
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_message(i, 'bob', 'me') for i in range(5))
+    cache = HistoryCache(db, window_size=50)
+    cache.warm(['u:bob:me'])
+
+    model = MessageListModel(_NoHistoryDB(db), window_size=50, history_cache=cache)
+    model.set_current_user_id('me')
+    model.set_active_session('user', user_id='bob')
+    assert model.rowCount() == 5 and not model.loading
+    assert cache.stats()['hits'] == 1
+    db.close()
+
+
+def test_model_reloads_when_validation_finds_stale_page():
+    QCoreApplication.instance() or QCoreApplication([])
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_message(i, 'bob', 'me') for i in range(5))
+    cache = HistoryCache(db, window_size=50)
+    cache.warm(['u:bob:me'])
+    db.save_message(_message(5, 'bob', 'me'))  # 绕过 record 写入
+
+    model = MessageListModel(db, window_size=50, history_cache=cache)
+    model.set_current_user_id('me')
+    model.set_active_session('user', user_id='bob')
+    # 先显示缓存页，核对发现过期后换上最新一页
+    assert model.rowCount() == 6
+    assert cache.get('u:bob:me')[-1].msg_id == 'm0005'
+    db.close()
@@ -0,0 +1,115 @@
+"""
+群聊历史同步测试
+"""
+import socket
+import sys
+import threading
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.core.history_sync import HistorySyncService
+from src.core.models import Group, Message, User
+from src.core.user_manager import UserManager
+from src.database.db_manager import DatabaseManager
+from src.utils.network_utils import receive_json
+
+
+GROUP_ID = "group_sync_test"
+
+
+def _make_group():
+    return Group(
+        group_id=GROUP_ID,
+        group_name="同步测试群",
+        owner_id="owner",
+        multicast_ip="239.0.0.200",
+        member_ids=["owner", "late_joiner"]
+    )
+
+
+def _requester(db, user_id, **kwargs):
+    """以指定身份创建请求方同步服务"""
+    user_manager = UserManager(db)
+    user_manager.current_user = User(user_id=user_id, username=user_id)
+    return HistorySyncService(db, user_manager, **kwargs)
+
+
+def _serve(service, count):
+    """启动一个只处理历史同步请求的迷你 TCP 服务"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(5)
+
+    def loop():
+        for _ in range(count):
+            conn, _ = server.accept()
+            with conn:
+                service.handle_request(receive_json(conn), conn)
+        server.close()
+
+    threading.Thread(target=loop, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def _seed(db, total):
+    db.save_group(_make_group())
+    db.save_messages([
+        Message(
+            msg_id=f"msg_{i:05d}",
+            from_user_id="owner",
+            from_username="owner",
+            content=f"历史消息 {i}",
+            timestamp=1000 + i // 3,  # 多条消息共享同一时间戳
+            is_group=True,
+            group_id=GROUP_ID,
+            status='sent'
+        )
+        for i in range(total)
+    ])
+
+
+def test_sync_pages_all_history(tmp_path):
+    responder_db = DatabaseManager(tmp_path / "responder.db")
+    requester_db = DatabaseManager(tmp_path / "requester.db")
+    _seed(responder_db, 450)
+    requester_db.save_group(_make_group())
+
+    port = _serve(HistorySyncService(responder_db, page_size=100), 1)
+    requester = _requester(requester_db, "late_joiner", page_size=100)
+
+    assert requester.sync_from_peer(GROUP_ID, '127.0.0.1', port) == 450
+    messages = requester_db.get_group_messages(GROUP_ID, limit=1000)
+    assert sorted(m.msg_id for m in messages) == [f"msg_{i:05d}" for i in range(450)]
+    assert all(m.is_read for m in messages)
+
+
+def test_sync_resumes_from_cursor(tmp_path):
+    responder_db = DatabaseManager(tmp_path / "responder.db")
+    requester_db = DatabaseManager(tmp_path / "requester.db")
+    _seed(responder_db, 250)
+    requester_db.save_group(_make_group())
+
+    port = _serve(HistorySyncService(responder_db, page_size=100), 2)
+
+    # 第一次同步被页数上限截断，游标停在第 100 条
+    capped = _requester(requester_db, "late_joiner", page_size=100, max_pages=1)
+    assert capped.sync_from_peer(GROUP_ID, '127.0.0.1', port) == 100
+
+    # 第二次同步从游标之后续传剩余消息
+    resumed = _requester(requester_db, "late_joiner", page_size=100)
+    assert resumed.sync_from_peer(GROUP_ID, '127.0.0.1', port) == 150
+    assert len(requester_db.get_group_messages(GROUP_ID, limit=1000)) == 250
+
+
+def test_sync_rejects_non_member(tmp_path):
+    responder_db = DatabaseManager(tmp_path / "responder.db")
+    requester_db = DatabaseManager(tmp_path / "requester.db")
+    _seed(responder_db, 10)
+
+    port = _serve(HistorySyncService(responder_db), 1)
+    stranger = _requester(requester_db, "stranger")
+
+    assert stranger.sync_from_peer(GROUP_ID, '127.0.0.1', port) == 0
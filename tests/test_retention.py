@@ -0,0 +1,84 @@
+"""
+消息保留策略测试
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.config import config
+from src.core.models import Message
+from src.database.db_manager import DatabaseManager
+from src.database.retention import RetentionJob
+
+
+def _seed(db, count, **kwargs):
+    db.save_messages(
+        Message(msg_id=f"{kwargs.get('group_id') or 'p'}_{i:05d}", content='x' * 200,
+                timestamp=1000 + i, **kwargs)
+        for i in range(count)
+    )
+
+
+def test_trims_each_conversation_to_limit(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    db.set_local_user_id('me')
+    _seed(db, 1200, from_user_id='alice', to_user_id='me')
+    _seed(db, 50, from_user_id='alice', is_group=True, group_id='g1')
+
+    job = RetentionJob(db, max_count=100, max_age=0, batch_size=128)
+    result = job.run_once()
+
+    assert result['deleted'] == 1100
+    assert result['pages_freed'] > 0
+    private = db.get_messages('alice', 'me', limit=1000)
+    assert len(private) == 100 and private[0].msg_id == 'p_01100'
+    assert len(db.get_group_messages('g1', limit=1000)) == 50
+    # 被清理的未读消息同步扣减未读计数，全文索引同步删除
+    assert db.get_unread_count('alice', 'me') == 100
+    assert db.query_one('SELECT COUNT(*) AS n FROM messages_fts')['n'] == 150
+    db.close()
+
+
+def test_trims_by_age(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    now = int(time.time())
+    db.save_messages([
+        Message(msg_id='old', from_user_id='a', to_user_id='b', timestamp=now - 7200),
+        Message(msg_id='new', from_user_id='a', to_user_id='b', timestamp=now),
+    ])
+
+    job = RetentionJob(db, max_count=0, max_age=3600)
+    assert job.run_once()['deleted'] == 1
+    assert [m.msg_id for m in db.get_messages('a', 'b')] == ['new']
+    assert job.stats()['rows_deleted'] == 1
+    db.close()
+
+
+def test_default_limits_keep_synced_and_scrollable_history(tmp_path):
+    # 默认启用条数上限，且不小于一次历史同步拉取的条数与消息窗口可滚动的行数
+    synced = config.HISTORY_SYNC_PAGE_SIZE * config.HISTORY_SYNC_MAX_PAGES
+    assert config.MESSAGE_HISTORY_LIMIT >= max(synced, config.MESSAGE_WINDOW_MAX_ROWS)
+
+    db = DatabaseManager(tmp_path / "chat.db")
+    _seed(db, config.MESSAGE_WINDOW_MAX_ROWS + 100, from_user_id='alice', to_user_id='me')
+    job = RetentionJob(db)
+    assert job.run_once()['deleted'] == 0
+    assert len(db.get_messages('alice', 'me', limit=10000)) == config.MESSAGE_WINDOW_MAX_ROWS + 100
+    db.close()
+
+
+def test_job_runs_by_default_and_zero_limits_opt_out(tmp_path):
+    db = DatabaseManager(tmp_path / "chat.db")
+    job = RetentionJob(db)
+    job.start()
+    assert job._thread is not None and job._thread.is_alive()
+    job.stop()
+
+    disabled = RetentionJob(db, max_count=0, max_age=0)
+    disabled.start()
+    assert disabled._thread is None
+    db.close()
@@ -0,0 +1,275 @@
+"""
+UI 数据模型测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from PyQt5.QtCore import QCoreApplication, QThreadPool
+
+from src.core.models import Group, Message
+from src.database.db_manager import DatabaseManager
+from src.ui.models.conversation_list_model import ConversationListModel
+from src.ui.models.message_list_model import MessageListModel
+from src.ui.models.group_list_model import GroupListModel
+from src.ui.models.user_list_model import UserListModel
+
+
+def _private(i, sender='alice', receiver='bob'):
+    return Message(msg_id=f"m{i:04d}", from_user_id=sender, from_username=sender, to_user_id=receiver,
+                   content=f"消息 {i}", timestamp=1700000000 + i, status='sent')
+
+
+class _CountingDB:
+    """记录查询次数的数据库包装"""
+
+    def __init__(self, db):
+        self.db = db
+        self.queries = 0
+
+    def get_messages_before(self, *args):
+        self.queries += 1
+        return self.db.get_messages_before(*args)
+
+
+def test_message_model_serves_rows_from_window():
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_private(i, *(('alice', 'bob') if i % 2 else ('bob', 'alice'))) for i in range(10))
+    counting = _CountingDB(db)
+
+    model = MessageListModel(counting, window_size=5)
+    model.set_current_user_id('alice')
+    model.set_active_session('user', user_id='bob')
+    assert counting.queries == 1
+
+    # 窗口为最近 5 条（从旧到新），重复取数不再查询数据库
+    assert model.rowCount() == 5
+    for _ in range(3):
+        for row in range(model.rowCount()):
+            for role in model.roleNames():
+                model.data(model.index(row), role)
+    assert counting.queries == 1
+
+    assert model.data(model.index(0), MessageListModel.ContentRole) == "消息 5"
+    assert model.data(model.index(4), MessageListModel.ContentRole) == "消息 9"
+    assert model.data(model.index(4), MessageListModel.IsMineRole) is True
+    assert model.data(model.index(3), MessageListModel.IsMineRole) is False
+
+    # 有新数据时刷新重新加载窗口
+    db.save_message(_private(10, 'bob', 'alice'))
+    model.refresh()
+    assert counting.queries == 2
+    assert model.data(model.index(4), MessageListModel.ContentRole) == "消息 10"
+    db.close()
+
+
+def test_message_model_appends_rows_incrementally():
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_private(i) for i in range(3))
+    model = MessageListModel(db)
+    model.set_current_user_id('alice')
+    model.set_active_session('user', user_id='bob')
+
+    events = []
+    model.modelReset.connect(lambda: events.append('reset'))
+    model.rowsInserted.connect(lambda parent, first, last: events.append(('inserted', first, last)))
+    model.dataChanged.connect(lambda top, bottom, roles: events.append(('changed', top.row(), list(roles))))
+
+    # 新消息只插入新行；已在窗口中的消息被跳过
+    assert model.append_messages([_private(3), _private(4), _private(2)]) == 2
+    assert model.append_messages([_private(4)]) == 0
+    assert model.rowCount() == 5
+
+    # 状态更新只通知对应行的对应角色
+    assert model.update_message('m0003', status='failed')
+    assert model.data(model.index(3), MessageListModel.StatusRole) == 'failed'
+    assert not model.update_message('missing', status='sent')
+
+    assert events == [('inserted', 3, 4), ('changed', 3, [MessageListModel.StatusRole])]
+    db.close()
+
+
+def test_message_model_fetches_older_pages_within_bounded_window():
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_private(i) for i in range(100))
+    model = MessageListModel(db, window_size=10, max_rows=25)
+    model.set_current_user_id('alice')
+    model.set_active_session('user', user_id='bob')
+    assert model.rowCount() == 10 and model.hasOlder
+
+    # 视图在末尾自动询问时不加载，滚动到顶部请求后才向上翻页
+    assert not model.canFetchMore()
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.fetchOlder()
+    assert inserted == [(0, 9)]
+    assert model.data(model.index(0), MessageListModel.ContentRole) == "消息 80"
+
+    # 继续向上翻页，窗口保持在 max_rows 以内，淘汰最新的行
+    model.fetchOlder()
+    model.fetchOlder()
+    assert model.rowCount() == 25
+    assert model.hasNewer
+    assert model.data(model.index(0), MessageListModel.ContentRole) == "消息 60"
+    assert model.data(model.index(24), MessageListModel.ContentRole) == "消息 84"
+    assert model.update_message('m0084', status='read')
+    assert not model.update_message('m0099', status='read')
+
+    # 窗口底部被淘汰时新消息不追加，滚动回底部时按游标重新加载
+    assert model.append_messages([_private(100)]) == 0
+    db.save_message(_private(100))
+    while model.hasNewer:
+        model.fetchNewer()
+    assert model.rowCount() == 25
+    assert model.data(model.index(24), MessageListModel.ContentRole) == "消息 100"
+    assert model.update_message('m0090', status='read')
+    db.close()
+
+
+def test_message_model_loads_in_thread_pool_and_drops_stale_results():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    db = DatabaseManager(mode='memory')
+    db.save_messages(_private(i) for i in range(5))
+    db.save_messages(_private(i, 'alice', 'carol') for i in range(5, 8))
+    pool = QThreadPool()
+    model = MessageListModel(db, thread_pool=pool)
+    model.set_current_user_id('alice')
+
+    loading = []
+    model.loadingChanged.connect(lambda: loading.append(model.loading))
+
+    # 快速切换会话：先前会话的结果到达时被丢弃
+    model.set_active_session('user', user_id='bob')
+    assert model.loading and model.rowCount() == 0
+    model.set_active_session('user', user_id='carol')
+    # 加载期间到达的新消息在首屏结果之后追加
+    model.append_messages([_private(8, 'carol', 'alice')])
+
+    pool.waitForDone()
+    app.processEvents()
+
+    assert model.stale_results == 1
+    assert [model.data(model.index(row), MessageListModel.ContentRole) for row in range(model.rowCount())] == [
+        "消息 5", "消息 6", "消息 7", "消息 8"
+    ]
+    assert not model.loading
+    assert loading == [True, False]
+    db.close()
+
+
+def test_user_model_emits_row_level_changes():
+    model = UserListModel()
+    model.reset_users([
+        {'user_id': uid, 'username': name, 'ip_address': '10.0.0.1', 'status': status, 'unread_count': 0}
+        for uid, name, status in (('u1', 'alice', 'online'), ('u2', 'bob', 'online'), ('u3', 'carol', 'offline'))
+    ])
+
+    events = []
+    model.rowsInserted.connect(lambda parent, first, last: events.append(('inserted', first)))
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(('removed', first)))
+    model.rowsMoved.connect(lambda parent, start, end, dest, row: events.append(('moved', start, row)))
+    model.dataChanged.connect(lambda top, bottom, roles: events.append(('changed', top.row(), list(roles))))
+
+    # 内容不变的心跳不产生通知
+    assert not model.upsert_user('u1', username='alice', ip='10.0.0.1', status='online')
+    assert events == []
+
+    # 未读计数只改一行
+    model.set_unread('u2', 3)
+    assert events == [('changed', 1, [UserListModel.UnreadCountRole])]
+
+    # 上线：从离线区移动到在线区的有序位置
+    events.clear()
+    model.upsert_user('u3', status='online')
+    assert events == [('changed', 2, [UserListModel.StatusRole])]
+    model.upsert_user('u1', status='offline')
+    assert events[1:] == [('moved', 0, 3), ('changed', 2, [UserListModel.StatusRole])]
+
+    # 新用户插入到有序位置；下线移动到末尾
+    events.clear()
+    model.upsert_user('u4', username='aaron', status='online')
+    assert events == [('inserted', 0)]
+    assert [model.data(model.index(row), UserListModel.UsernameRole) for row in range(model.rowCount())] == [
+        'aaron', 'bob', 'carol', 'alice'
+    ]
+
+    # 切换当前会话只通知新旧两行
+    events.clear()
+    model.set_current('u2')
+    model.set_current('u4')
+    assert events == [('changed', 1, [UserListModel.IsCurrentRole]), ('changed', 1, [UserListModel.IsCurrentRole]),
+                      ('changed', 0, [UserListModel.IsCurrentRole])]
+    assert model.get('u4')['is_current'] and not model.get('u2')['is_current']
+
+    assert model.remove_user('u2') and events[-1] == ('removed', 1)
+    assert model.get('u3') == model.get(model.data(model.index(1), UserListModel.UserIdRole))
+
+
+def _group_message(i, group_id, sender='bob'):
+    return Message(msg_id=f"g{i:04d}", from_user_id=sender, from_username=sender, content=f"群消息 {i}",
+                   timestamp=1700000000 + i, is_group=True, group_id=group_id)
+
+
+def test_group_model_loads_summaries_and_updates_one_row_per_message():
+    db = DatabaseManager(mode='memory')
+    db.set_local_user_id('alice')
+    for gid, name in (('g1', 'alpha'), ('g2', 'beta'), ('g3', 'gamma')):
+        db.save_group(Group(group_id=gid, group_name=name, owner_id='alice', multicast_ip='239.0.0.1',
+                            member_ids=['alice', 'bob'], updated_at=1600000000))
+    db.save_messages([_group_message(1, 'g1'), _group_message(2, 'g2'), _group_message(3, 'g2', 'alice')])
+
+    model = GroupListModel()
+    model.reset_groups(db.get_group_summaries())
+    rows = [model.get(model.data(model.index(row), GroupListModel.GroupIdRole)) for row in range(model.rowCount())]
+    # 按最近活动排序；g2 最后一条为自己发送，不计未读
+    assert [row['group_id'] for row in rows] == ['g2', 'g1', 'g3']
+    assert rows[0]['last_message'] == "alice: 群消息 3" and rows[0]['unread_count'] == 1
+    assert rows[1]['member_count'] == 2 and rows[2]['last_message'] == ''
+
+    events = []
+    model.rowsMoved.connect(lambda parent, start, end, dest, row: events.append(('moved', start, row)))
+    model.dataChanged.connect(lambda top, bottom, roles: events.append(('changed', top.row())))
+    model.modelReset.connect(lambda: events.append('reset'))
+
+    model.record_message(_group_message(4, 'g3'), unread=1)
+    assert events == [('moved', 2, 0), ('changed', 0)]
+    assert model.get('g3')['unread_count'] == 1 and model.get('g3')['last_message'] == "bob: 群消息 4"
+
+    # 已在顶部的群组只更新该行
+    events.clear()
+    model.record_message(_group_message(5, 'g3'), unread=1)
+    assert events == [('changed', 0)] and model.get('g3')['unread_count'] == 2
+
+    # 标记会话已读后重新加载的计数为 0
+    db.mark_conversation_as_read('g:g2')
+    assert {row['group_id']: row['unread_count'] for row in db.get_group_summaries()}['g2'] == 0
+    db.close()
+
+
+def test_conversation_model_merges_private_and_group_by_last_activity():
+    db = DatabaseManager(mode='memory')
+    db.set_local_user_id('alice')
+    db.save_group(Group(group_id='g1', group_name='alpha', owner_id='alice', multicast_ip='239.0.0.1',
+                        member_ids=['alice', 'bob']))
+    db.save_messages([_private(1, 'bob', 'alice'), _group_message(2, 'g1'), _private(3, 'alice', 'carol')])
+
+    model = ConversationListModel()
+    model.reset_conversations(db.get_recent_conversations())
+    keys = [model.data(model.index(row), ConversationListModel.ConversationIdRole) for row in range(model.rowCount())]
+    assert keys == ['u:alice:carol', 'g:g1', 'u:alice:bob']
+    assert model.get('g:g1')['snippet'] == "bob: 群消息 2" and model.get('g:g1')['unread_count'] == 1
+    assert model.get('u:alice:bob')['kind'] == 'user' and model.get('u:alice:bob')['peer_id'] == 'bob'
+
+    events = []
+    model.rowsMoved.connect(lambda parent, start, end, dest, row: events.append(('moved', start, row)))
+    model.dataChanged.connect(lambda top, bottom, roles: events.append(('changed', top.row())))
+
+    # 新消息只重新读取该会话并把它移到顶部
+    db.save_message(_private(4, 'bob', 'alice'))
+    model.update_conversations(db.get_recent_conversations(conversation_ids=['u:alice:bob']))
+    assert events == [('moved', 2, 0), ('changed', 0)]
+    assert model.get('u:alice:bob')['snippet'] == '消息 4' and model.get('u:alice:bob')['unread_count'] == 2
+    db.close()
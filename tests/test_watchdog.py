@@ -0,0 +1,45 @@
+"""
+事件循环卡顿监测测试
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from PyQt5.QtCore import QCoreApplication
+
+from src.ui.watchdog import EventLoopWatchdog
+
+
+def _process_events_for(app, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def _blocking_call(seconds):
+    time.sleep(seconds)
+
+
+def test_stall_is_measured_with_main_thread_stack():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    watchdog = EventLoopWatchdog(interval_ms=10, threshold_ms=100)
+    watchdog.start()
+    _process_events_for(app, 0.15)
+    assert watchdog.stats()['stalls'] == 0
+
+    # 阻塞 UI 线程：恢复后的第一次心跳记录一次卡顿，调用栈由监测线程在卡顿期间抓取
+    _blocking_call(0.3)
+    _process_events_for(app, 0.05)
+    watchdog.stop()
+
+    stats = watchdog.stats()
+    assert stats['stalls'] == 1 and stats['max_stall_ms'] >= 250
+    stall = stats['recent_stalls'][0]
+    assert any('_blocking_call' in line for line in stall['stack'])
+    assert sum(stats['histogram'].values()) == stats['beats']
+    assert stats['histogram']['>2000ms'] == 0 and stats['histogram']['≤500ms'] >= 1